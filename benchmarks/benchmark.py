@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+
+#------------------------------------------------------------------------
+# pylive: benchmarks/benchmark.py
+#
+# Measures the performance of scanning, queries and commands against the
+# AbletonOSC simulator, writing results as JSON. Run from the repository root:
+#
+#   python3 -m benchmarks.benchmark --output baseline.json
+#   python3 -m benchmarks.benchmark --compare baseline.json
+#------------------------------------------------------------------------
+import gc
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import statistics
+import tracemalloc
+
+import live
+from live.simulator import AbletonOSCSimulator
+
+#------------------------------------------------------------------------
+# Registry of benchmark functions. Each returns a dict mapping result names
+# to (value, unit, better), where better is "lower" or "higher".
+#------------------------------------------------------------------------
+BENCHMARKS = {}
+
+def benchmark(fn):
+    BENCHMARKS[fn.__name__] = fn
+    return fn
+
+def timed(fn, repeats: int = 3) -> float:
+    """
+    Returns the shortest time taken to call fn, over a number of repeats.
+    """
+    durations = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - t0)
+    return min(durations)
+
+def count_objects(set: live.Set) -> int:
+    """
+    Returns the number of Track, Clip, Device and Parameter objects in a scanned set.
+    """
+    count = 0
+    for track in set.tracks:
+        count += 1 + len(track.active_clips)
+        for device in track.devices:
+            count += 1 + len(device.parameters)
+    return count
+
+#------------------------------------------------------------------------
+# Benchmarks
+#------------------------------------------------------------------------
+
+@benchmark
+def scan(args) -> dict:
+    results = {}
+    for num_tracks in args.track_counts:
+        with AbletonOSCSimulator(num_tracks=num_tracks, num_scenes=16, devices_per_track=2, parameters_per_device=16):
+            for mode in ("file", "network"):
+                #------------------------------------------------------------------------
+                # Each repeat scans a new Set, as rescanning an unchanged structure
+                # from file returns early.
+                #------------------------------------------------------------------------
+                duration = timed(lambda: live.Set().scan(mode=mode), repeats=args.repeats)
+                results["scan_%s_%d_tracks" % (mode, num_tracks)] = (duration, "s", "lower")
+    return results
+
+@benchmark
+def query_rtt(args) -> dict:
+    with AbletonOSCSimulator(num_tracks=128):
+        query = live.Query()
+        for _ in range(10):
+            query.query("/live/song/get/tempo")
+
+        rtts = []
+        for _ in range(args.iterations):
+            t0 = time.perf_counter()
+            query.query("/live/song/get/tempo")
+            rtts.append(time.perf_counter() - t0)
+
+        queries = [("/live/track/get/volume", (index,)) for index in range(128)]
+        bulk_duration = timed(lambda: query.query_many(queries), repeats=args.repeats)
+
+    return {
+        "query_rtt_p50": (statistics.median(rtts), "s", "lower"),
+        "query_rtt_p99": (sorted(rtts)[int(len(rtts) * 0.99) - 1], "s", "lower"),
+        "query_many_128_rtt": (bulk_duration, "s", "lower"),
+    }
+
+@benchmark
+def cmd_throughput(args) -> dict:
+    with AbletonOSCSimulator(num_tracks=8):
+        query = live.Query()
+        count = args.iterations * 10
+        duration = timed(lambda: [query.cmd("/live/song/set/tempo", (120.0,)) for _ in range(count)], repeats=args.repeats)
+    return {
+        "cmd_rate": (count / duration, "msg/s", "higher"),
+    }
+
+@benchmark
+def parameter_throughput(args) -> dict:
+    with AbletonOSCSimulator(num_tracks=1, devices_per_track=1, parameters_per_device=64):
+        set = live.Set()
+        set.scan(mode="file")
+        parameters = set.tracks[0].devices[0].parameters
+        values = [random.random() for _ in range(args.iterations * 10)]
+
+        def set_values():
+            for index, value in enumerate(values):
+                parameters[index % len(parameters)].value = value
+
+        duration = timed(set_values, repeats=args.repeats)
+    return {
+        "parameter_set_rate": (len(values) / duration, "msg/s", "higher"),
+    }
+
+@benchmark
+def memory(args) -> dict:
+    num_tracks = max(args.track_counts)
+    with AbletonOSCSimulator(num_tracks=num_tracks, num_scenes=16, devices_per_track=2, parameters_per_device=16):
+        set = live.Set()
+        set.scan(mode="file")
+        set.reset()
+        gc.collect()
+
+        #------------------------------------------------------------------------
+        # Devices and parameters are created lazily, so count the objects
+        # (creating them) before measuring.
+        #------------------------------------------------------------------------
+        tracemalloc.start()
+        set.scan(mode="file")
+        object_count = count_objects(set)
+        gc.collect()
+        allocated, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "bytes_per_object": (allocated / object_count, "B", "lower"),
+    }
+
+#------------------------------------------------------------------------
+# Running and comparing results
+#------------------------------------------------------------------------
+
+def run(args) -> dict:
+    results = {}
+    for name in args.benchmarks:
+        logging.info("Running benchmark: %s" % name)
+        for result_name, (value, unit, better) in BENCHMARKS[name](args).items():
+            logging.info(" - %s: %.6g %s" % (result_name, value, unit))
+            results[result_name] = {"value": value, "unit": unit, "better": better}
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compare results with a baseline.
+
+    Args:
+        results: The results of run().
+        baseline: The results of a previous run().
+        threshold: The relative change beyond which a result is a regression.
+
+    Returns:
+        A list of (name, baseline value, value, relative change) for each regression.
+    """
+    regressions = []
+    print("%-32s %12s %12s %9s" % ("benchmark", "baseline", "current", "change"))
+    for name, result in results["results"].items():
+        if name not in baseline["results"]:
+            continue
+        baseline_value = baseline["results"][name]["value"]
+        if baseline_value == 0:
+            continue
+        change = (result["value"] - baseline_value) / baseline_value
+        if result["better"] == "higher":
+            change = -change
+        print("%-32s %12.6g %12.6g %+8.1f%%%s" % (name, baseline_value, result["value"], change * 100,
+                                                  "  REGRESSION" if change > threshold else ""))
+        if change > threshold:
+            regressions.append((name, baseline_value, result["value"], change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pylive against the AbletonOSC simulator")
+    parser.add_argument("benchmarks", nargs="*", default=list(BENCHMARKS.keys()), help="Benchmarks to run (default: all)")
+    parser.add_argument("-o", "--output", type=str, help="Write results to the given JSON file")
+    parser.add_argument("-c", "--compare", type=str, help="Compare results with a baseline JSON file")
+    parser.add_argument("-t", "--threshold", type=float, default=0.2, help="Relative change treated as a regression (default: 0.2)")
+    parser.add_argument("--tracks", dest="track_counts", type=int, nargs="+", default=[10, 100, 1000], help="Track counts for scan benchmarks")
+    parser.add_argument("--iterations", type=int, default=1000, help="Iterations for query and command benchmarks")
+    parser.add_argument("--repeats", type=int, default=3, help="Repeats of each timing, of which the fastest is used")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error("Unknown benchmark: %s (available: %s)" % (name, ", ".join(BENCHMARKS)))
+
+    results = run(args)
+    if args.output:
+        with open(args.output, "w") as fd:
+            json.dump(results, fd, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare, "r") as fd:
+            baseline = json.load(fd)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("%d regression(s) beyond %d%%" % (len(regressions), args.threshold * 100))
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,12 @@ logging.getLogger("live").setLevel(logging.INFO)
 def main():
     set = Set(scan=True)
 
+    #------------------------------------------------------------------------
+    # Coalesce tempo changes, so that only the latest value is sent to Live
+    # every 0.02s, however quickly the tempo is updated.
+    #------------------------------------------------------------------------
+    set.live.start_coalescing(interval=0.02)
+
     tempo_default = 120.0
     tempo_range = tempo_default * 0.5
     sleep = 0.01
@@ -25,11 +25,51 @@ clip.play()
 """
 
 __author__ = "Daniel Jones <http://www.erase.net/>"
-__all__ = ["Query", "Set", "Track", "Group", "Clip", "Device", "Parameter", "Scene"]
+__all__ = ["Query", "AsyncQuery", "Set", "Track", "Group", "Clip", "Device", "Parameter", "Scene", "WireTracer", "Fleet"]
 
 from .object import *
 from .constants import *
-from .classes import *
+from .exceptions import *
 from .query import *
 
-from .exceptions import *
+#------------------------------------------------------------------------
+# The remaining submodules are imported when one of their names is first
+# accessed, so that importing live is fast, and scripts only load the
+# parts that they use. Maps each name to the submodule that defines it;
+# submodules themselves map to their own names.
+#------------------------------------------------------------------------
+_LAZY_NAMES = {
+    "Set": "classes",
+    "Track": "classes",
+    "Group": "classes",
+    "Clip": "classes",
+    "ClipSlots": "classes",
+    "Device": "classes",
+    "Parameter": "classes",
+    "Scene": "classes",
+    "AsyncQuery": "async_query",
+    "AsyncSubscription": "async_query",
+    "Fleet": "fleet",
+    "WireTracer": "tracer",
+    "read_trace": "tracer",
+    "classes": "classes",
+    "async_query": "async_query",
+    "fleet": "fleet",
+    "tracer": "tracer",
+    "receiver": "receiver",
+    "simulator": "simulator",
+}
+
+def __getattr__(name: str):
+    import importlib
+
+    module_name = _LAZY_NAMES.get(name)
+    if module_name is None:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    module = importlib.import_module("." + module_name, __name__)
+    value = module if name == module_name else getattr(module, name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+from collections import deque
+
+from live.exceptions import LiveConnectionError
+from live.osc import encode_message
+from live.query import query_key
+
+from pythonosc.osc_packet import OscPacket, ParseError
+
+class AsyncQuery:
+    """
+    asyncio counterpart to Query, which sends and receives OSC over a datagram
+    endpoint on the running event loop rather than a background thread.
+
+        async with live.AsyncQuery() as live_async:
+            tempo = await live_async.query("/live/song/get/tempo")
+            volumes = await asyncio.gather(*(live_async.get(track, "volume") for track in set.tracks))
+
+    AsyncQuery listens on the same port as Query (which is where AbletonOSC
+    sends its replies), so a threaded Query that is listening must be stopped
+    with Query.stop() before an AsyncQuery can be started.
+    """
+
+    def __init__(self, address=("127.0.0.1", 11000), listen_port=11001):
+        self.osc_address = address
+        self.listen_port = listen_port
+        self.osc_timeout = 3.0
+        self.logger = logging.getLogger(__name__)
+
+        self.transport = None
+
+        #------------------------------------------------------------------------
+        # Optional WireTracer, which records all OSC traffic. Disabled by default.
+        #------------------------------------------------------------------------
+        self.tracer = None
+
+        #------------------------------------------------------------------------
+        # Futures awaiting a response, keyed by query_key(), in the order that
+        # their queries were sent.
+        #------------------------------------------------------------------------
+        self.pending_queries = {}
+
+        #------------------------------------------------------------------------
+        # Subscriptions to incoming messages, keyed by OSC address.
+        #------------------------------------------------------------------------
+        self.subscriptions = {}
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        self.stop()
+
+    async def start(self) -> None:
+        """
+        Bind the listening endpoint. Called automatically on the first cmd() or query().
+        """
+        if self.transport is None:
+            loop = asyncio.get_running_loop()
+            self.transport, _ = await loop.create_datagram_endpoint(lambda: _AsyncQueryProtocol(self),
+                                                                    local_addr=(self.osc_address[0], self.listen_port))
+
+    def stop(self) -> None:
+        """
+        Unbind the listening endpoint, and end any active subscriptions.
+        """
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+        for subscriptions in list(self.subscriptions.values()):
+            for subscription in list(subscriptions):
+                subscription.close()
+
+    async def cmd(self, msg: str, args: tuple = ()) -> None:
+        """
+        Send a Live command without expecting a response back:
+
+            await live_async.cmd("/live/song/set/tempo", (110.0,))
+        """
+        await self.start()
+        self.logger.debug("OSC output: %s %s", msg, args)
+        if self.tracer is not None:
+            self.tracer.record("out", msg, args)
+
+        try:
+            self.transport.sendto(encode_message(msg, args), self.osc_address)
+        except Exception as e:
+            raise LiveConnectionError("Couldn't send message to Live (is AbletonOSC present and activated?): %s" % e)
+
+    async def query(self, msg: str, args: tuple = (), timeout: float = None) -> list:
+        """
+        Send a Live command and wait for its response, without blocking the event loop:
+
+            tempo = (await live_async.query("/live/song/get/tempo"))[0]
+
+        Returns a list of values.
+        """
+        key = query_key(msg, tuple(args))
+        future = asyncio.get_running_loop().create_future()
+        if key not in self.pending_queries:
+            self.pending_queries[key] = deque()
+        self.pending_queries[key].append(future)
+
+        try:
+            await self.cmd(msg, args)
+            if timeout is None:
+                timeout = self.osc_timeout
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.logger.debug("Timeout during query (%s, %s)", msg, args)
+            raise LiveConnectionError("Timed out waiting for response to query: %s %s. Is Live running and LiveOSC installed?" % (msg, args))
+        finally:
+            queue = self.pending_queries.get(key)
+            if queue is not None and future in queue:
+                queue.remove(future)
+            if not queue:
+                self.pending_queries.pop(key, None)
+
+    async def query_many(self, queries: list, timeout: float = None) -> list:
+        """
+        Send a batch of queries together, and return their responses in request order.
+
+        Args:
+            queries: A list of (address, args) tuples.
+            timeout: The timeout for each query, in seconds.
+        """
+        return await asyncio.gather(*(self.query(msg, args, timeout) for msg, args in queries))
+
+    async def get(self, obj, prop: str):
+        """
+        Query a property of a Set, Track or Clip:
+
+            volume = await live_async.get(set.tracks[0], "volume")
+
+        Args:
+            obj: The Set, Track or Clip object.
+            prop: The name of the property, as accessed synchronously (e.g. obj.volume).
+        """
+        fget = getattr(type(obj), prop).fget
+        if not hasattr(fget, "address"):
+            raise ValueError("Property cannot be queried asynchronously: %s" % prop)
+        args = obj._index_args()
+        rv = await self.query(fget.address, args)
+        return rv[len(args)]
+
+    async def set(self, obj, prop: str, value) -> None:
+        """
+        Set a property of a Set, Track or Clip:
+
+            await live_async.set(set, "tempo", 110.0)
+        """
+        fset = getattr(type(obj), prop).fset
+        if not hasattr(fset, "address"):
+            raise ValueError("Property cannot be set asynchronously: %s" % prop)
+        await self.cmd(fset.address, obj._index_args() + (value,))
+
+    def subscribe(self, address: str, maxsize: int = 1024) -> "AsyncSubscription":
+        """
+        Subscribe to incoming messages with a given address, returning an async iterator
+        of argument lists:
+
+            await live_async.cmd("/live/song/start_listen/beat")
+            async for data in live_async.subscribe("/live/song/get/beat"):
+                print("Beat %d" % data[0])
+
+        Args:
+            address: The OSC address to subscribe to.
+            maxsize: The maximum number of messages to buffer. If a subscriber falls
+                     behind, the oldest messages are discarded.
+        """
+        subscription = AsyncSubscription(self, address, maxsize)
+        if address not in self.subscriptions:
+            self.subscriptions[address] = []
+        self.subscriptions[address].append(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: "AsyncSubscription") -> None:
+        subscriptions = self.subscriptions.get(subscription.address, [])
+        if subscription in subscriptions:
+            subscriptions.remove(subscription)
+        if not subscriptions:
+            self.subscriptions.pop(subscription.address, None)
+
+    def handler(self, address: str, data: tuple) -> None:
+        self.logger.debug("OSC input: %s %s" % (address, data))
+        if self.tracer is not None:
+            self.tracer.record("in", address, data)
+
+        for subscription in self.subscriptions.get(address, ()):
+            subscription.put(list(data))
+
+        queue = self.pending_queries.get(query_key(address, data))
+        while queue:
+            future = queue.popleft()
+            if not future.done():
+                future.set_result(list(data))
+                break
+
+class AsyncSubscription:
+    """
+    An async iterator over incoming messages with a given OSC address.
+    Created by AsyncQuery.subscribe().
+    """
+
+    def __init__(self, query: AsyncQuery, address: str, maxsize: int = 1024):
+        self.query = query
+        self.address = address
+        self.queue = asyncio.Queue(maxsize)
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> list:
+        if self.closed and self.queue.empty():
+            raise StopAsyncIteration
+        data = await self.queue.get()
+        if data is None:
+            raise StopAsyncIteration
+        return data
+
+    def put(self, data: list) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(data)
+
+    def close(self) -> None:
+        """
+        End the subscription. Any iterating consumer stops after draining buffered messages.
+        """
+        if not self.closed:
+            self.closed = True
+            self.query._unsubscribe(self)
+            self.put(None)
+
+class _AsyncQueryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, query: AsyncQuery):
+        self.query = query
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        try:
+            packet = OscPacket(data)
+        except ParseError:
+            self.query.logger.warning("Couldn't parse incoming OSC datagram from %s", addr)
+            return
+        for timed_message in packet.messages:
+            self.query.handler(timed_message.message.address, tuple(timed_message.message.params))
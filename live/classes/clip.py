@@ -1,20 +1,29 @@
 import logging
 
-import live.query
-import live.object
+import live
 from live.constants import *
-from live.query import Query
+from live.osc import MessageTemplate
+
+CLIP_SLOT_FIRE = MessageTemplate("/live/clip_slot/fire")
+CLIP_STOP = MessageTemplate("/live/clip/stop")
 
 def make_getter(class_identifier, prop):
+    address = MessageTemplate("/live/%s/get/%s" % (class_identifier, prop))
+
     def fn(self):
-        return self.live.query("/live/%s/get/%s" % (class_identifier, prop), (self.track.index, self.index,))[2]
+        return self.live.get_property(address, (self.track.index, self.index))
 
+    fn.address = address
     return fn
 
 def make_setter(class_identifier, prop):
+    address = MessageTemplate("/live/%s/set/%s" % (class_identifier, prop))
+    get_address = "/live/%s/get/%s" % (class_identifier, prop)
+
     def fn(self, value):
-        self.live.cmd("/live/%s/set/%s" % (class_identifier, prop), (self.track.index, self.index, value))
+        self.live.set_property(address, get_address, (self.track.index, self.index), value)
 
+    fn.address = address
     return fn
 
 class Clip:
@@ -22,6 +31,9 @@ class Clip:
     An object representing a single clip in a Live set.
     """
 
+    __slots__ = ("track", "index", "name", "length", "state")
+    logger = logging.getLogger(__name__)
+
     def __init__(self, track, index: int, name: str, length: float = 4):
         """ Create a new clip.
 
@@ -32,17 +44,18 @@ class Clip:
             length: Length of the clip, in beats
         """
         self.track = track
-        self.set = self.track.set
         self.index = index
         self.name = name
         self.length = length
         self.state = CLIP_STATUS_STOPPED
-        self.logger = logging.getLogger(__name__)
-        # self.live = Query()
+
+    @property
+    def set(self):
+        return self.track.set
 
     @property
     def live(self):
-        return Query()
+        return self.track.live
 
     def __str__(self):
         name = ": %s" % self.name if self.name else ""
@@ -69,13 +82,20 @@ class Clip:
         self.index = d["index"]
         self.name = d["name"]
         self.length = d["length"]
+        self.state = d.get("state", CLIP_STATUS_STOPPED)
+
+    def _index_args(self) -> tuple:
+        """
+        Returns the object indices that identify this object in an OSC query.
+        """
+        return (self.track.index, self.index)
 
     def play(self):
         """
         Start playing clip.
         Must use clip_slot (not clip) as this is also used in group tracks, which have clip_slots without clips.
         """
-        self.live.cmd("/live/clip_slot/fire", (self.track.index, self.index))
+        self.live.cmd(CLIP_SLOT_FIRE, (self.track.index, self.index))
         self.track.playing = True
         if type(self.track) is live.Group:
             for track in self.track.tracks:
@@ -94,7 +114,7 @@ class Clip:
         """
         Stop playing clip.
         """
-        self.live.cmd("/live/clip/stop", (self.track.index, self.index))
+        self.live.cmd(CLIP_STOP, (self.track.index, self.index))
         self.track.playing = False
 
     def add_note(self,
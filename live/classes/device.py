@@ -1,13 +1,19 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
+from collections.abc import Mapping
 from .track import Track
+from ..osc import MessageTemplate
 if TYPE_CHECKING:
     from .set import Set
     from .parameter import Parameter
+    from ..query import Query
     
 
+import random
 import logging
 
+DEVICE_SET_PARAMETERS_VALUE = MessageTemplate("/live/device/set/parameters/value")
+
 class Device:
     """
     Represents an instrument or audio effect residing within a Track.
@@ -20,7 +26,10 @@ class Device:
         parameters: List of Parameter objects
     """
 
-    def __init__(self, track: Track, index: int, name: str):
+    __slots__ = ("track", "index", "name", "_parameters", "_parameter_data")
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, track: Track, index: int, name: str, parameter_data: Optional[list[dict]] = None):
         """
         Encapsulates a Live Device object.
 
@@ -28,12 +37,14 @@ class Device:
             track (Track): The track that this device belongs to
             index (int): The index of this device in the track
             name (str): The name of the track in Live
+            parameter_data (list): (Optional) records describing the device's parameters, from
+                                   which its Parameter objects are created on first access
         """
         self.track = track
         self.index = index
         self.name = name
-        self.parameters: list[Parameter] = []
-        self.logger = logging.getLogger(__name__)
+        self.parameters = []
+        self._parameter_data = parameter_data
 
     def __str__(self):
         return "Device (%d,%d): %s" % (self.track.index, self.index, self.name)
@@ -52,6 +63,31 @@ class Device:
         self.name = d["name"]
         self.parameters = d["parameters"]
 
+    @property
+    def parameters(self) -> list[Parameter]:
+        """
+        List of Parameter objects. When the device has been scanned from a file, these
+        are created from its parameter records when first accessed.
+        """
+        if self._parameter_data is not None:
+            from .parameter import Parameter
+
+            parameters = []
+            for parameter_index, parameter_data in enumerate(self._parameter_data):
+                parameter = Parameter(self, parameter_index, parameter_data["name"], parameter_data["value"])
+                parameter.min = parameter_data["min"]
+                parameter.max = parameter_data["max"]
+                parameter.is_quantized = parameter_data["is_quantized"]
+                parameters.append(parameter)
+            self._parameters = parameters
+            self._parameter_data = None
+        return self._parameters
+
+    @parameters.setter
+    def parameters(self, parameters: list[Parameter]) -> None:
+        self._parameters = parameters
+        self._parameter_data = None
+
     @property
     def set(self) -> Set:
         """
@@ -59,16 +95,75 @@ class Device:
         """
         return self.track.set
 
-    def set_parameter(self, index: int, value: float) -> None:
+    @property
+    def live(self) -> Query:
+        """
+        The Query used to communicate with the Live instance containing this device.
+        """
+        return self.track.live
+
+    def _find_parameter(self, index) -> Parameter:
         if type(index) == int:
-            parameter = self.parameters[index]
+            return self.parameters[index]
         else:
-            parameter = next(p for p in self.parameters if p.name == index)
-        parameter.value = value
+            return next(p for p in self.parameters if p.name == index)
+
+    def set_parameter(self, index: int, value: float) -> None:
+        self._find_parameter(index).value = value
 
     def get_parameter(self, index: int) -> float:
-        if type(index) == int:
-            parameter = self.parameters[index]
+        return self._find_parameter(index).value
+
+    def set_parameters(self, values) -> None:
+        """
+        Set the values of many of this device's parameters at once.
+
+        Args:
+            values: Either a sequence (such as a list or NumPy array) of values for the
+                    device's parameters, starting from its first parameter, which is sent
+                    as a single message; or a dict mapping parameter indices or names to
+                    values, which are sent together in a single bundle.
+        """
+        from .parameter import DEVICE_SET_PARAMETER_VALUE, DEVICE_GET_PARAMETER_VALUE
+
+        if isinstance(values, Mapping):
+            updates = [(self._find_parameter(index), value) for index, value in values.items()]
         else:
-            parameter = next(p for p in self.parameters if p.name == index)
-        return parameter.value
+            #--------------------------------------------------------------------------------
+            # Convert NumPy arrays to lists of Python values, which can be encoded as OSC.
+            #--------------------------------------------------------------------------------
+            values = values.tolist() if hasattr(values, "tolist") else list(values)
+            parameters = self.parameters
+            if len(values) > len(parameters):
+                raise ValueError("Too many values for %s: %d values for %d parameters" % (self, len(values), len(parameters)))
+            updates = list(zip(parameters, values))
+
+        #--------------------------------------------------------------------------------
+        # Values set individually may still be held back by the coalescer. Drop them,
+        # so that they aren't sent after (and override) the values set here.
+        #--------------------------------------------------------------------------------
+        coalescer = self.live.coalescer
+        if coalescer is not None:
+            for parameter, value in updates:
+                coalescer.discard(DEVICE_SET_PARAMETER_VALUE, (self.track.index, self.index, parameter.index))
+
+        if isinstance(values, Mapping):
+            with self.live.batch():
+                for parameter, value in updates:
+                    self.live.cmd(DEVICE_SET_PARAMETER_VALUE, (self.track.index, self.index, parameter.index, value))
+        else:
+            self.live.cmd(DEVICE_SET_PARAMETERS_VALUE, (self.track.index, self.index, *values))
+
+        for parameter, value in updates:
+            parameter._value = value
+            self.live.set_local(DEVICE_GET_PARAMETER_VALUE, (self.track.index, self.index, parameter.index), value)
+
+    def randomise(self) -> None:
+        """
+        Set each of the device's parameters to a uniformly random value within
+        [min, max], rounded to an integer for quantized parameters, in a single message.
+        """
+        values = [random.randint(int(parameter.min), int(parameter.max)) if parameter.is_quantized
+                  else random.uniform(parameter.min, parameter.max)
+                  for parameter in self.parameters]
+        self.set_parameters(values)
@@ -12,8 +12,11 @@ class Group(Track):
     Represents a grouped set of Track objects.
     """
 
-    def __init__(self, set, track_index: int, group_index: int, name: str, group: Group):
-        Track.__init__(self, set, track_index, name, group)
+    __slots__ = ("track_index", "group_index", "tracks")
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, set, track_index: int, group_index: int, name: str, group: Group, num_scenes: int = 0):
+        Track.__init__(self, set, track_index, name, group, num_scenes)
 
         self.track_index = track_index
         self.group_index = group_index
@@ -25,7 +28,6 @@ class Group(Track):
         self.group: Group = None
 
         self.tracks: list[Track] = []
-        self.logger = logging.getLogger(__name__)
 
     def __str__(self):
         string = "Group (%d): %s" % (self.group_index, self.name)
@@ -58,8 +60,7 @@ class Group(Track):
     @property
     def active_clips(self) -> list[Clip]:
         """ Return a dictionary of all non-empty clipslots: { index : Clip, ... } """
-        active_clips = [n for n in self.clips if n is not None]
-        return active_clips
+        return self.clips.active()
 
     @property
     def is_playing(self):
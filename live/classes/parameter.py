@@ -2,7 +2,10 @@ import logging
 import random
 from .device import Device
 from .track import Track
-from ..query import Query
+from ..osc import MessageTemplate
+
+DEVICE_SET_PARAMETER_VALUE = MessageTemplate("/live/device/set/parameter/value")
+DEVICE_GET_PARAMETER_VALUE = MessageTemplate("/live/device/get/parameter/value")
 
 class Parameter:
     """
@@ -10,6 +13,10 @@ class Parameter:
     effects unit.)
     """
 
+    __slots__ = ("device", "index", "name", "_value", "min", "max", "is_quantized")
+    logger = logging.getLogger(__name__)
+    indent = 3
+
     def __init__(self, device: Device, index: int, name: str, value: float):
         """
         Args:
@@ -25,12 +32,30 @@ class Parameter:
         self.min = 0.0
         self.max = 1.0
         self.is_quantized = False
-        self.indent = 3
-        self.logger = logging.getLogger(__name__)
+
+    def __getstate__(self):
+        return {
+            "device": self.device,
+            "index": self.index,
+            "name": self.name,
+            "_value": self._value,
+            "min": self.min,
+            "max": self.max,
+            "is_quantized": self.is_quantized,
+        }
+
+    def __setstate__(self, d: dict):
+        self.device = d["device"]
+        self.index = d["index"]
+        self.name = d["name"]
+        self._value = d["_value"]
+        self.min = d["min"]
+        self.max = d["max"]
+        self.is_quantized = d["is_quantized"]
 
     @property
     def live(self):
-        return Query()
+        return self.device.track.live
 
     def __str__(self):
         return "Parameter (%d,%d,%d): %s (range %.3f-%.3f)" % (self.device.track.index, self.device.index, self.index, self.name, self.min, self.max)
@@ -56,8 +81,8 @@ class Parameter:
             value (float): The value to set.
         """
         self._value = value
-        self.live.cmd("/live/device/set/parameter/value",
-                      (self.device.track.index, self.device.index, self.index, value))
+        self.live.set_property(DEVICE_SET_PARAMETER_VALUE, DEVICE_GET_PARAMETER_VALUE,
+                               (self.device.track.index, self.device.index, self.index), value)
 
     def get_value(self) -> float:
         """
@@ -66,8 +91,8 @@ class Parameter:
         Returns:
             The parameter's current value in Live.
         """
-        return self.live.query("/live/device/get/parameter/value",
-                               (self.device.track.index, self.device.index, self.index))
+        return self.live.get_property(DEVICE_GET_PARAMETER_VALUE,
+                                      (self.device.track.index, self.device.index, self.index))
 
     value = property(get_value, set_value, doc="Query or set the value of this parameter")
 
@@ -2,14 +2,12 @@ import re
 import os
 import sys
 import math
-import glob
 import json
 import time
-import pickle
 import logging
-import tempfile
+import operator
+import functools
 import threading
-import subprocess
 from typing import Optional
 
 from .clip import Clip
@@ -18,23 +16,97 @@ from .group import Group
 from .scene import Scene
 from .device import Device
 from .parameter import Parameter
+from ..osc import MessageTemplate, message_size
+from ..mirror import DEFAULT_MIRRORED_PROPERTIES
 from ..query import Query
 from ..constants import CLIP_STATUS_STOPPED
 from ..exceptions import LiveIOError, LiveConnectionError
 
+SONG_START_PLAYING = MessageTemplate("/live/song/start_playing")
+SONG_CONTINUE_PLAYING = MessageTemplate("/live/song/continue_playing")
+SONG_STOP_PLAYING = MessageTemplate("/live/song/stop_playing")
+SONG_STOP_ALL_CLIPS = MessageTemplate("/live/song/stop_all_clips")
+SONG_GET_TRACK_DATA = MessageTemplate("/live/song/get/track_data")
+
+#--------------------------------------------------------------------------------
+# Properties queried for each block of tracks by a network scan.
+#--------------------------------------------------------------------------------
+SCAN_TRACK_PROPERTIES = ("track.name", "track.is_foldable", "track.group_track")
+SCAN_CLIP_PROPERTIES = ("clip.name", "clip.length")
+SCAN_DEVICE_PROPERTIES = ("track.num_devices", "device.name")
+SCAN_PARAMETER_PROPERTIES = ("name", "value", "min", "max", "is_quantized")
+
+#--------------------------------------------------------------------------------
+# Target maximum size of each track_data response, in bytes. A UDP datagram can
+# carry up to 64KB; the remainder is headroom for tracks whose names are longer
+# than those seen so far.
+#--------------------------------------------------------------------------------
+SCAN_RESPONSE_SIZE = 32768
+
+#--------------------------------------------------------------------------------
+# Estimated size of the track_data responses for each track, in bytes, used
+# to size the first blocks of a network scan.
+#--------------------------------------------------------------------------------
+SCAN_BYTES_PER_TRACK = 64
+SCAN_BYTES_PER_CLIP_SLOT = 40
+
 def make_getter(class_identifier, prop):
-    # TODO: Replacement for name_cache
+    address = MessageTemplate("/live/%s/get/%s" % (class_identifier, prop))
+
     def fn(self):
-        return self.live.query("/live/%s/get/%s" % (class_identifier, prop))[0]
+        return self.live.get_property(address)
 
+    fn.address = address
     return fn
 
 def make_setter(class_identifier, prop):
+    address = MessageTemplate("/live/%s/set/%s" % (class_identifier, prop))
+    get_address = "/live/%s/get/%s" % (class_identifier, prop)
+
     def fn(self, value):
-        self.live.cmd("/live/%s/set/%s" % (class_identifier, prop), (value,))
+        self.live.set_property(address, get_address, (), value)
 
+    fn.address = address
     return fn
 
+def get_song_structure_path() -> str:
+    """
+    Returns the path of the .json file to which AbletonOSC exports the song structure.
+    """
+    if sys.platform == "darwin":
+        #--------------------------------------------------------------------------------
+        # On macOS, tempfile.gettempdir() uses a process-specific directory.
+        # Use global temp dir (/tmp) as this is the directory used by AbletonOSC.
+        #--------------------------------------------------------------------------------
+        tempdir = "/tmp"
+    else:
+        import tempfile
+        tempdir = tempfile.gettempdir()
+    return os.path.join(tempdir, "abletonosc-song-structure.json")
+
+#--------------------------------------------------------------------------------
+# The counts of changes returned by Set.rescan().
+#--------------------------------------------------------------------------------
+RESCAN_CHANGES = ("tracks_added", "tracks_removed", "clips_added", "clips_removed",
+                  "devices_added", "devices_removed")
+
+def _track_key(track: Track) -> tuple:
+    """
+    Returns the key by which rescan() matches a scanned track to an existing one.
+    """
+    return (track.name, track.is_group)
+
+def parse_json(contents: bytes):
+    """
+    Parse a JSON document, using orjson if it is installed, as it is several times
+    faster than the json module.
+    """
+    try:
+        import orjson
+    except ImportError:
+        return json.loads(contents)
+    return orjson.loads(contents)
+
 class Set:
     """
     Set represents an entire Live set. It communicates via OSC to Live,
@@ -48,7 +120,7 @@ class Set:
     for its contents by calling the scan() method.
     """
 
-    def __init__(self, scan: bool = False):
+    def __init__(self, scan: bool = False, live: Optional[Query] = None):
         """
         Create a new Set object.
         If scan is True, automatically connects to Live and queries the full set of tracks,
@@ -56,6 +128,8 @@ class Set:
 
         Args:
             scan: If True, automatically scans the contents of the set.
+            live: The Query used to communicate with Live. Defaults to the shared Query
+                  for the Live instance at 127.0.0.1:11000.
         """
         # --------------------------------------------------------------------------
         # Indicates whether the set has been synchronised with Live
@@ -63,16 +137,11 @@ class Set:
         self.scanned = False
 
         # --------------------------------------------------------------------------
-        # Set caching to True to avoid re-querying properties such as tempo each
-        # time they are requested. Increases efficiency in cases where no other
-        # processes are going to modify Live's state.
-        # --------------------------------------------------------------------------
-        self.caching = False
-
-        # --------------------------------------------------------------------------
-        # For batch queries, limit the max number of tracks to query.
+        # For batch queries, limit the max number of tracks to query, and the
+        # number of devices whose parameters a network scan queries at once.
         # --------------------------------------------------------------------------
         self.max_tracks_per_query = 256
+        self.max_devices_per_query = 64
 
         # --------------------------------------------------------------------------
         # Create mutexes and events for inter-thread handling (to catch on-beat
@@ -81,7 +150,13 @@ class Set:
         self._add_mutexes()
 
         self.logger = logging.getLogger(__name__)
-        self.live = Query()
+        self.live = live if live is not None else Query()
+
+        # --------------------------------------------------------------------------
+        # The arguments of start_mirroring(), so that mirrored properties can be
+        # subscribed again after a rescan.
+        # --------------------------------------------------------------------------
+        self._mirrored_properties = None
 
         self.groups: list[Group] = []
         self.tracks: list[Track] = []
@@ -91,8 +166,6 @@ class Set:
         if scan:
             self.scan()
 
-        self.start_beat_listener()
-
     def __str__(self):
         return "Set"
 
@@ -107,11 +180,42 @@ class Set:
         self.groups = d["groups"]
         self.tracks = d["tracks"]
         self.scenes = d["scenes"]
+        if not hasattr(self, "live"):
+            self.live = Query()
+        if not hasattr(self, "logger"):
+            self.logger = logging.getLogger(__name__)
+            self.scanned = bool(self.tracks)
+            self._structure_digest = None
+            self._mirrored_properties = None
+            self._add_mutexes()
+
+        #------------------------------------------------------------------------
+        # Tracks and scenes communicate with Live via their Set's Query, so
+        # must refer to the Set that they have been loaded into.
+        #------------------------------------------------------------------------
+        for track in self.tracks:
+            track.set = self
+        for scene in self.scenes:
+            scene.set = self
+
+    def _index_args(self) -> tuple:
+        """
+        Returns the object indices that identify this object in an OSC query.
+        The Set is implicit, so has none.
+        """
+        return ()
 
     def reset(self):
         self.groups = []
         self.tracks = []
         self.scenes = []
+        self.scanned = False
+
+        # --------------------------------------------------------------------------------
+        # Digest of the song structure file when last scanned, so that an unchanged
+        # structure need not be parsed again.
+        # --------------------------------------------------------------------------------
+        self._structure_digest = None
 
     # --------------------------------------------------------------------------------
     # SCAN
@@ -130,8 +234,13 @@ class Set:
                          This is slower, but can be used if Live is on a different computer.
                   "auto" uses "file" for a local install, and "network" for a remote instance.
         """
+        # --------------------------------------------------------------------------------
+        # Cached values are keyed by object indices, which may now refer to
+        # different objects.
+        # --------------------------------------------------------------------------------
+        self._invalidate_cache()
 
-        if mode == "auto" or mode == "local":
+        if mode in ("auto", "file", "local"):
             self._scan_via_file()
         elif mode == "network":
             self._scan_via_network()
@@ -139,7 +248,8 @@ class Set:
             raise ValueError("Invalid value for 'mode': %s" % mode)
 
     def _scan_via_network(self,
-                          scan_device_parameters: bool = False) -> None:
+                          scan_device_parameters: bool = False,
+                          stop_playing: bool = True) -> None:
         """
         Interrogates the currently open Ableton Live set for its structure:
         number of tracks, clips, scenes, etc.
@@ -148,14 +258,17 @@ class Set:
 
         Args:
             scan_device_parameters: Queries tracks for devices and their corresponding parameters
+            stop_playing: Stops playback before scanning
         """
 
         # --------------------------------------------------------------------------------
         # Stop playback before scanning, and clear existing tracks/groups
         # --------------------------------------------------------------------------------
-        self.stop_playing()
+        if stop_playing:
+            self.stop_playing()
         self.tracks = []
         self.groups = []
+        self._structure_digest = None
 
         # --------------------------------------------------------------------------------
         # Determine total number of tracks/scenes
@@ -167,164 +280,428 @@ class Set:
 
         self.logger.info("scan: Scanning %d tracks" % num_tracks)
 
-        tracks_per_block = 1
-        num_track_blocks = int(math.ceil(num_tracks / tracks_per_block))
-
         # --------------------------------------------------------------------------------
-        # Scan tracks
+        # Scan tracks in blocks, each described by three track_data responses. Blocks
+        # are sized so that each response fits within SCAN_RESPONSE_SIZE, based on the
+        # largest response per track seen so far (initially, an estimate from the
+        # number of scenes).
+        #
+        # track_data responses don't echo the indices of the tracks queried, so are
+        # matched to their queries in the order that they arrive. Only one is in flight
+        # at a time, as responses that arrive out of order would otherwise be assigned
+        # to the wrong block.
         # --------------------------------------------------------------------------------
-        for track_block_index in range(num_track_blocks):
-            track_index_min = track_block_index * tracks_per_block
+        bytes_per_track = SCAN_BYTES_PER_TRACK + SCAN_BYTES_PER_CLIP_SLOT * num_scenes
+        measured_bytes_per_track = 0
+        track_index_min = 0
+        while track_index_min < num_tracks:
+            tracks_per_block = max(1, min(self.max_tracks_per_query, SCAN_RESPONSE_SIZE // bytes_per_track))
             track_index_max = min(track_index_min + tracks_per_block, num_tracks)
-            tracks_in_block = track_index_max - track_index_min
 
             self.logger.debug(" - Scanning tracks %d-%d" % (track_index_min, track_index_max))
-            rv = self.live.query("/live/song/get/track_data", (
-                track_index_min, track_index_max, "track.name", "track.is_foldable", "track.group_track"))
-            for track_index_in_block in range(tracks_in_block):
-                track_index = track_index_min + track_index_in_block
-                track_offset = track_index_in_block * 3
-                track_name, track_is_group, track_group_track = rv[track_offset:track_offset + 3]
-                track_group = self.tracks[track_group_track] if track_group_track is not None else None
-                if track_is_group:
-                    group_index = len(self.groups)
-                    group = Group(self, track_index, group_index, track_name, track_group)
-                    self.tracks.append(group)
-                    self.groups.append(group)
-                else:
-                    track = Track(self, track_index, track_name, track_group)
-                    self.tracks.append(track)
-                    if track_group:
-                        track_group.tracks.append(track)
-
-            # --------------------------------------------------------------------------------
-            # Scan clips
-            # --------------------------------------------------------------------------------
-            self.logger.debug(" - Scanning tracks %d-%d: clips" % (track_index_min, track_index_max))
-            rv = self.live.query("/live/song/get/track_data",
-                                 (track_index_min, track_index_max, "clip.name", "clip.length"))
-            for track_index_in_block in range(tracks_in_block):
-                track_index = track_index_min + track_index_in_block
-                track = self.tracks[track_index]
-                clips_data = rv[(track_index_in_block * 2 * num_scenes):((track_index_in_block + 1) * 2 * num_scenes)]
-                clip_names = clips_data[0:num_scenes]
-                clip_lengths = clips_data[num_scenes:num_scenes * 2]
-                for clip_index, (clip_name, clip_length) in enumerate(zip(clip_names, clip_lengths)):
-                    if clip_name is not None:
-                        clip = Clip(track, clip_index, clip_name, clip_length)
-                        track.clips[clip_index] = clip
-                        if track.group is not None and track.group.clips[clip_index] is None:
-                            track.group.clips[clip_index] = Clip(track.group, clip_index, "", clip_length)
-
-            # --------------------------------------------------------------------------------
-            # Scan devices
-            # --------------------------------------------------------------------------------
-            self.logger.debug(" - Scanning tracks %d-%d: devices" % (track_index_min, track_index_max))
-            rv = self.live.query("/live/song/get/track_data",
-                                 (track_index_min, track_index_max, "track.num_devices", "device.name"))
-            rv_index = 0
-            for track_index_in_block in range(tracks_in_block):
-                track_index = track_index_min + track_index_in_block
-                track = self.tracks[track_index]
-                device_count = rv[rv_index]
-                rv_index += 1
-                for device_index in range(device_count):
-                    device_name = rv[rv_index]
-                    rv_index += 1
-                    device = Device(track, device_index, device_name)
-
-                    if scan_device_parameters:
-                        rv_num_params = self.live.query("/live/device/get/num_parameters", (track_index, device_index))[2:]
-                        rv_param_names = self.live.query("/live/device/get/parameters/name", (track_index, device_index))[2:]
-                        rv_param_values = self.live.query("/live/device/get/parameters/value", (track_index, device_index))[2:]
-                        rv_param_min = self.live.query("/live/device/get/parameters/min", (track_index, device_index))[2:]
-                        rv_param_max = self.live.query("/live/device/get/parameters/max", (track_index, device_index))[2:]
-                        rv_param_quantized = self.live.query("/live/device/get/parameters/is_quantized",
-                                                             (track_index, device_index))[2:]
-
-                        all_parameters = []
-
-                        for i in range(rv_num_params[0]):
-                            all_parameters.append({
-                                "name": rv_param_names[i],
-                                "value": rv_param_values[i],
-                                "min": rv_param_min[i],
-                                "max": rv_param_max[i],
-                                "is_quantized": rv_param_quantized[i]
-                            })
-
-                        device.parameters = []
-                        for parameter_index, parameter_data in enumerate(all_parameters):
-                            parameter = Parameter(device, parameter_index, parameter_data["name"], parameter_data["value"])
-                            parameter.min = parameter_data["min"]
-                            parameter.max = parameter_data["max"]
-                            parameter.is_quantized = parameter_data["is_quantized"]
-                            device.parameters.append(parameter)
-
-                    track.devices.append(device)
+            responses = [self.live.query(SONG_GET_TRACK_DATA, (track_index_min, track_index_max) + properties)
+                         for properties in (SCAN_TRACK_PROPERTIES, SCAN_CLIP_PROPERTIES, SCAN_DEVICE_PROPERTIES)]
+            self._add_scanned_tracks(track_index_min, track_index_max, num_scenes, *responses)
+            for rv in responses:
+                response_size = message_size(SONG_GET_TRACK_DATA, rv)
+                measured_bytes_per_track = max(measured_bytes_per_track,
+                                               math.ceil(response_size / (track_index_max - track_index_min)))
+            bytes_per_track = max(1, measured_bytes_per_track)
+            track_index_min = track_index_max
+
+        if scan_device_parameters:
+            self._scan_device_parameters([device for track in self.tracks for device in track.devices])
 
         self.scanned = True
 
+    def _scan_device_parameters(self, devices: list[Device]) -> None:
+        """
+        Queries the parameters of each of the given devices, replacing their lists of
+        Parameter objects. The parameters of up to max_devices_per_query devices are
+        queried at once, so that each batch of devices costs roughly one round trip.
+
+        Args:
+            devices: The Device objects to scan.
+        """
+        for device_index_min in range(0, len(devices), self.max_devices_per_query):
+            block = devices[device_index_min:device_index_min + self.max_devices_per_query]
+            queries = []
+            for device in block:
+                for prop in SCAN_PARAMETER_PROPERTIES:
+                    queries.append(("/live/device/get/parameters/%s" % prop, (device.track.index, device.index)))
+
+            self.logger.debug(" - Scanning parameters of %d devices" % len(block))
+            responses = self.live.query_many(queries)
+            for block_index, device in enumerate(block):
+                #--------------------------------------------------------------------------------
+                # Each response is prefixed by the track and device indices.
+                #--------------------------------------------------------------------------------
+                names, values, mins, maxes, quantized = [rv[2:] for rv in responses[block_index * 5:block_index * 5 + 5]]
+                if not len(names) == len(values) == len(mins) == len(maxes) == len(quantized):
+                    raise LiveConnectionError("Unexpected response when scanning parameters of %s" % device)
+
+                device.parameters = []
+                for parameter_index, name in enumerate(names):
+                    parameter = Parameter(device, parameter_index, name, values[parameter_index])
+                    parameter.min = mins[parameter_index]
+                    parameter.max = maxes[parameter_index]
+                    parameter.is_quantized = quantized[parameter_index]
+                    device.parameters.append(parameter)
+
+    def _add_scanned_tracks(self,
+                            track_index_min: int,
+                            track_index_max: int,
+                            num_scenes: int,
+                            track_rv: list,
+                            clip_rv: list,
+                            device_rv: list) -> None:
+        """
+        Create the Track, Group, Clip and Device objects for a block of tracks, from
+        the responses to the track_data queries made by _scan_via_network().
+        """
+        tracks_in_block = track_index_max - track_index_min
+        if len(track_rv) != tracks_in_block * len(SCAN_TRACK_PROPERTIES) or \
+                len(clip_rv) != tracks_in_block * len(SCAN_CLIP_PROPERTIES) * num_scenes:
+            raise LiveConnectionError("Unexpected response when scanning tracks %d-%d" % (track_index_min, track_index_max))
+
+        for track_index_in_block in range(tracks_in_block):
+            track_index = track_index_min + track_index_in_block
+            track_offset = track_index_in_block * 3
+            track_name, track_is_group, track_group_track = track_rv[track_offset:track_offset + 3]
+            track_group = self.tracks[track_group_track] if track_group_track is not None else None
+            if track_is_group:
+                group_index = len(self.groups)
+                group = Group(self, track_index, group_index, track_name, track_group, num_scenes)
+                self.tracks.append(group)
+                self.groups.append(group)
+            else:
+                track = Track(self, track_index, track_name, track_group, num_scenes)
+                self.tracks.append(track)
+                if track_group:
+                    track_group.tracks.append(track)
+
+        # --------------------------------------------------------------------------------
+        # Clips
+        # --------------------------------------------------------------------------------
+        for track_index_in_block in range(tracks_in_block):
+            track = self.tracks[track_index_min + track_index_in_block]
+            clips_data = clip_rv[(track_index_in_block * 2 * num_scenes):((track_index_in_block + 1) * 2 * num_scenes)]
+            clip_names = clips_data[0:num_scenes]
+            clip_lengths = clips_data[num_scenes:num_scenes * 2]
+            for clip_index, (clip_name, clip_length) in enumerate(zip(clip_names, clip_lengths)):
+                if clip_name is not None:
+                    clip = Clip(track, clip_index, clip_name, clip_length)
+                    track.clips[clip_index] = clip
+                    if track.group is not None and track.group.clips[clip_index] is None:
+                        track.group.clips[clip_index] = Clip(track.group, clip_index, "", clip_length)
+
+        # --------------------------------------------------------------------------------
+        # Devices
+        # --------------------------------------------------------------------------------
+        rv_index = 0
+        for track_index_in_block in range(tracks_in_block):
+            track_index = track_index_min + track_index_in_block
+            track = self.tracks[track_index]
+            device_count = device_rv[rv_index]
+            rv_index += 1
+            for device_index in range(device_count):
+                device_name = device_rv[rv_index]
+                rv_index += 1
+                device = Device(track, device_index, device_name)
+                track.devices.append(device)
+
     def _scan_via_file(self) -> None:
         """
         Scans the contents of the Live set by exporting the song structure to a local .json file.
         Note that this will not work if the Live set is running on another system, i.e. over a network.
+
+        If the exported structure is unchanged since the last scan, the existing objects are kept.
+        Devices and parameters are created from the exported records when first accessed.
         """
-        rv = self.live.query("/live/song/export/structure")
+        contents, num_scenes, digest = self._export_structure()
+        if self.scanned and digest == self._structure_digest:
+            self.logger.info("Song structure unchanged since last scan")
+            return
+        self._load_structure(contents, num_scenes, digest)
+
+    def _export_structure(self) -> tuple:
+        """
+        Exports the song structure to a local .json file, and reads it.
+
+        Returns:
+            A tuple of (contents, num_scenes, digest), where digest identifies the
+            structure, for comparison with that of the last scan.
+        """
+        rv, (num_scenes,) = self.live.query_many([("/live/song/export/structure", ()),
+                                                  ("/live/song/get/num_scenes", ())])
         assert rv[0] == 1
 
+        json_path = get_song_structure_path()
+        with open(json_path, "rb") as fd:
+            contents = fd.read()
+
+        #--------------------------------------------------------------------------------
+        # The exported structure lists only occupied clip slots, so the number of
+        # scenes is also part of the digest.
+        #--------------------------------------------------------------------------------
+        import hashlib
+        digest = hashlib.blake2b(contents, digest_size=16)
+        digest.update(b"%d" % num_scenes)
+        return contents, num_scenes, digest.digest()
+
+    def _load_structure(self, contents: bytes, num_scenes: int, digest: bytes) -> None:
+        """
+        Populates this Set's tracks, groups and clips from an exported song structure.
+        """
+        data = parse_json(contents)
+        del contents
+
         self.tracks = []
         self.groups = []
+        for track_data in data["tracks"]:
+            track_group = self.tracks[track_data["group_track"]] if track_data["group_track"] is not None else None
+            if track_data["is_foldable"]:
+                group_index = len(self.groups)
+                track = Group(self, track_data["index"], group_index, track_data["name"], track_group, num_scenes)
+                self.tracks.append(track)
+                self.groups.append(track)
+            else:
+                track = Track(self, track_data["index"], track_data["name"], track_group, num_scenes)
+                self.tracks.append(track)
+                if track_group:
+                    track_group.tracks.append(track)
 
-        if sys.platform == "darwin":
-            #--------------------------------------------------------------------------------
-            # On macOS, tempfile.gettempdir() uses a process-specific directory.
-            # Use global temp dir (/tmp) as this is the directory used by AbletonOSC.
-            #--------------------------------------------------------------------------------
-            tempdir = "/tmp"
-        else:
-            tempdir = tempfile.gettempdir()
-        json_path = os.path.join(tempdir, "abletonosc-song-structure.json")
-
-        with open(json_path, "r") as fd:
-            data = json.load(fd)
-            tracks = data["tracks"]
-            for track_data in tracks:
-                track_group = self.tracks[track_data["group_track"]] if track_data["group_track"] is not None else None
-                if track_data["is_foldable"]:
-                    group_index = len(self.groups)
-                    group = Group(self, track_data["index"], group_index, track_data["name"], track_group)
-                    self.tracks.append(group)
-                    self.groups.append(group)
-                else:
-                    track = Track(self, track_data["index"], track_data["name"], track_group)
-                    self.tracks.append(track)
-                    if track_group:
-                        track_group.tracks.append(track)
-
-                for clip_data in track_data["clips"]:
-                    clip = Clip(track, clip_data["index"], clip_data["name"], clip_data["length"])
-                    track.clips[clip.index] = clip
-                    if track.group is not None and track.group.clips[clip.index] is None:
-                        track.group.clips[clip.index] = Clip(track.group, clip.index, "", clip.length)
-
-                for device_index, device_data in enumerate(track_data["devices"]):
-                    device = Device(track, device_index, device_data["name"])
-                    device.parameters = []
-                    for parameter_index, parameter_data in enumerate(device_data["parameters"]):
-                        parameter = Parameter(device, parameter_index, parameter_data["name"], parameter_data["value"])
-                        parameter.min = parameter_data["min"]
-                        parameter.max = parameter_data["max"]
-                        parameter.is_quantized = parameter_data["is_quantized"]
-                        device.parameters.append(parameter)
-                    track.devices.append(device)
+            for clip_data in track_data["clips"]:
+                clip = Clip(track, clip_data["index"], clip_data["name"], clip_data["length"])
+                track.clips[clip.index] = clip
+                if track.group is not None and track.group.clips[clip.index] is None:
+                    track.group.clips[clip.index] = Clip(track.group, clip.index, "", clip.length)
+
+            if track_data["devices"]:
+                track._device_data = track_data["devices"]
 
+        self._structure_digest = digest
         self.scanned = True
 
         num_tracks = len(self.tracks)
         num_clips = sum([len(track.active_clips) for track in self.tracks])
         self.logger.info("Discovered %d clips in %d tracks" % (num_clips, num_tracks))
 
+    # --------------------------------------------------------------------------------
+    # RESCAN
+    # --------------------------------------------------------------------------------
+
+    def rescan(self, mode: str = "auto", scan_device_parameters: bool = False) -> dict:
+        """
+        Scans the Live set again, and reconciles the result with this Set's existing
+        Track, Group, Clip, Device and Parameter objects. Objects which are unchanged
+        are kept, updating their indices if they have moved, so that references held
+        to them remain valid; only objects which have been added, removed or changed
+        are replaced. Unlike scan(), does not stop playback.
+
+        Tracks are matched by name and type, preferring a track at the same index.
+        Clips are matched by slot, name and length, and devices by index and name.
+
+        For file scans, if the exported structure is unchanged since the last scan,
+        returns immediately. If properties are being mirrored, they are subscribed
+        again for the objects' new indices.
+
+        Args:
+            mode: The scan mode, as for scan().
+            scan_device_parameters: For network scans, also queries device parameters.
+
+        Returns:
+            A dict of counts of the tracks, clips and devices added and removed:
+            { "tracks_added", "tracks_removed", "clips_added", "clips_removed",
+              "devices_added", "devices_removed" }
+        """
+        scanned = Set(live=self.live)
+        if mode in ("auto", "file", "local"):
+            #--------------------------------------------------------------------------------
+            # If the exported structure is unchanged since the last scan, there is
+            # nothing to reconcile.
+            #--------------------------------------------------------------------------------
+            contents, num_scenes, digest = self._export_structure()
+            if self.scanned and digest == self._structure_digest:
+                self.logger.info("rescan: song structure unchanged since last scan")
+                return dict.fromkeys(RESCAN_CHANGES, 0)
+            self._invalidate_cache()
+            scanned._load_structure(contents, num_scenes, digest)
+        elif mode == "network":
+            self._invalidate_cache()
+            scanned._scan_via_network(scan_device_parameters=scan_device_parameters, stop_playing=False)
+        else:
+            raise ValueError("Invalid value for 'mode': %s" % mode)
+
+        with self._rescan_lock:
+            tracks = list(self.tracks)
+            changes = self._reconcile(scanned)
+            self._structure_digest = scanned._structure_digest
+
+            #--------------------------------------------------------------------------------
+            # Mirrored properties are keyed by object indices, which may now refer to
+            # different objects, and added objects are not yet mirrored.
+            #--------------------------------------------------------------------------------
+            if self.live.mirror is not None and (any(changes.values()) or self.tracks != tracks):
+                self.live.mirror.clear()
+                if self._mirrored_properties is not None:
+                    self.start_mirroring(*self._mirrored_properties)
+        self.logger.info("rescan: %s" % (", ".join("%d %s" % (count, name.replace("_", " "))
+                                                   for name, count in changes.items() if count) or "no changes"))
+        return changes
+
+    def _reconcile(self, scanned: "Set") -> dict:
+        """
+        Update this Set's object graph to match that of a newly-scanned Set,
+        keeping existing objects where possible. See rescan().
+        """
+        changes = dict.fromkeys(RESCAN_CHANGES, 0)
+
+        # --------------------------------------------------------------------------------
+        # Match each scanned track to an existing track: first at the same index,
+        # then anywhere else in the set.
+        # --------------------------------------------------------------------------------
+        matches = [None] * len(scanned.tracks)
+        unmatched = {}
+        for index, track in enumerate(scanned.tracks):
+            if index < len(self.tracks) and _track_key(self.tracks[index]) == _track_key(track):
+                matches[index] = self.tracks[index]
+        matched = set(id(track) for track in matches if track is not None)
+        for track in self.tracks:
+            if id(track) not in matched:
+                unmatched.setdefault(_track_key(track), []).append(track)
+        for index, track in enumerate(scanned.tracks):
+            if matches[index] is None and unmatched.get(_track_key(track)):
+                matches[index] = unmatched[_track_key(track)].pop(0)
+
+        changes["tracks_removed"] = sum(len(tracks) for tracks in unmatched.values())
+        for tracks in unmatched.values():
+            for track in tracks:
+                changes["clips_removed"] += len(track.active_clips)
+                changes["devices_removed"] += len(track.devices)
+
+        # --------------------------------------------------------------------------------
+        # Rebuild the track and group lists, reusing matched tracks.
+        # --------------------------------------------------------------------------------
+        tracks = {}
+        groups = []
+        for index, scanned_track in enumerate(scanned.tracks):
+            track = matches[index]
+            if track is None:
+                track = scanned_track
+                changes["tracks_added"] += 1
+                changes["clips_added"] += len(track.active_clips)
+                changes["devices_added"] += len(track.devices)
+            else:
+                track.index = index
+                self._reconcile_clips(track, scanned_track, changes)
+                self._reconcile_devices(track, scanned_track, changes)
+            track.set = self
+            tracks[id(scanned_track)] = track
+            if track.is_group:
+                track.track_index = index
+                track.group_index = len(groups)
+                track.tracks = []
+                groups.append(track)
+
+        for scanned_track in scanned.tracks:
+            track = tracks[id(scanned_track)]
+            track.group = tracks[id(scanned_track.group)] if scanned_track.group is not None else None
+            if track.group is not None and not track.is_group:
+                track.group.tracks.append(track)
+
+        self.tracks[:] = [tracks[id(track)] for track in scanned.tracks]
+        self.groups[:] = groups
+        self.scanned = True
+        return changes
+
+    def _reconcile_clips(self, track: Track, scanned_track: Track, changes: dict) -> None:
+        for clip_index, scanned_clip in enumerate(scanned_track.clips):
+            clip = track.clips[clip_index] if clip_index < len(track.clips) else None
+            if scanned_clip is None:
+                if clip is not None:
+                    changes["clips_removed"] += 1
+            elif clip is not None and clip.name == scanned_clip.name and clip.length == scanned_clip.length:
+                continue
+            else:
+                if clip is not None:
+                    changes["clips_removed"] += 1
+                changes["clips_added"] += 1
+                scanned_clip.track = track
+            if clip_index < len(track.clips):
+                track.clips[clip_index] = scanned_clip
+            else:
+                track.clips.append(scanned_clip)
+        del track.clips[len(scanned_track.clips):]
+
+    def _reconcile_devices(self, track: Track, scanned_track: Track, changes: dict) -> None:
+        devices = []
+        for device_index, scanned_device in enumerate(scanned_track.devices):
+            device = track.devices[device_index] if device_index < len(track.devices) else None
+            if device is not None and device.name == scanned_device.name:
+                if scanned_device.parameters:
+                    self._reconcile_parameters(device, scanned_device)
+                devices.append(device)
+            else:
+                if device is not None:
+                    changes["devices_removed"] += 1
+                changes["devices_added"] += 1
+                scanned_device.track = track
+                devices.append(scanned_device)
+        changes["devices_removed"] += max(0, len(track.devices) - len(scanned_track.devices))
+        track.devices[:] = devices
+
+    def _reconcile_parameters(self, device: Device, scanned_device: Device) -> None:
+        if [parameter.name for parameter in device.parameters] != [parameter.name for parameter in scanned_device.parameters]:
+            for parameter in scanned_device.parameters:
+                parameter.device = device
+            device.parameters[:] = scanned_device.parameters
+            return
+        for parameter, scanned_parameter in zip(device.parameters, scanned_device.parameters):
+            parameter._value = scanned_parameter._value
+            parameter.min = scanned_parameter.min
+            parameter.max = scanned_parameter.max
+            parameter.is_quantized = scanned_parameter.is_quantized
+
+    def start_auto_rescan(self, mode: str = "auto") -> None:
+        """
+        Listen for changes to the number of tracks or scenes in the Live set, and
+        call rescan() whenever they change.
+
+        Args:
+            mode: The scan mode, as for scan().
+        """
+        self.stop_auto_rescan()
+        self._auto_rescan_mode = mode
+        self._auto_rescan_counts = {}
+        for prop in ("num_tracks", "num_scenes"):
+            subscription = self.live.add_handler("/live/song/get/%s" % prop,
+                                                 functools.partial(self._auto_rescan_handler, prop))
+            self._auto_rescan_subscriptions.append(subscription)
+            self.live.cmd("/live/song/start_listen/%s" % prop)
+
+    def stop_auto_rescan(self) -> None:
+        """
+        Stop rescanning automatically.
+        """
+        for subscription in self._auto_rescan_subscriptions:
+            self.live.cmd("/live/song/stop_listen/%s" % subscription.pattern.rsplit("/", 1)[1])
+            self.live.remove_handler(subscription.pattern, subscription)
+        self._auto_rescan_subscriptions = []
+
+    def _auto_rescan_handler(self, prop: str, count: int) -> None:
+        # --------------------------------------------------------------------------------
+        # The first value is sent when listening starts, and is the baseline.
+        # --------------------------------------------------------------------------------
+        previous = self._auto_rescan_counts.get(prop)
+        self._auto_rescan_counts[prop] = count
+        if previous is not None and count != previous:
+            self.logger.info("%s changed from %d to %d, rescanning" % (prop, previous, count))
+            try:
+                self.rescan(self._auto_rescan_mode)
+            except LiveConnectionError as e:
+                self.logger.warning("rescan failed: %s" % e)
+
     # TODO: Retire all of these methods now scanning is basically instant
     def load_or_scan(self, filename: str = "set", **kwargs):
         """
@@ -355,6 +732,8 @@ class Set:
         """
         Read a saved Set structure from disk.
         """
+        import pickle
+
         filename = "%s.pickle" % filename
         try:
             data = pickle.load(open(filename, "rb"))
@@ -383,6 +762,8 @@ class Set:
         TODO: Add a __reduce__ function to do this in an idiomatic way.
         TODO: Do we still need this now scanning is fast?
         """
+        import pickle
+
         filename = "%s.pickle" % filename
         with open(filename, "wb") as fd:
             pickle.dump(self, fd)
@@ -423,6 +804,71 @@ class Set:
         for scene in self.scenes:
             print(" - %s" % scene)
 
+    def to_arrays(self) -> dict:
+        """
+        Returns a columnar snapshot of the set's parameters and clips, as NumPy arrays,
+        for vectorized analysis. The snapshot is built from the scanned data: Device and
+        Parameter objects that have not yet been accessed are not created, and no
+        queries are made to Live. Parameter values are those read by the last scan.
+
+        Requires numpy (pip3 install pylive[numpy]).
+
+        Returns:
+            A dict with keys "parameters" and "clips", each a dict of equal-length arrays:
+
+             - parameters: track, device, index, value, min, max, is_quantized
+             - clips: track, index, length
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("Set.to_arrays() requires numpy: pip3 install pylive[numpy]")
+
+        parameter_columns = {"track": [], "device": [], "index": [], "value": [],
+                             "min": [], "max": [], "is_quantized": []}
+        clip_columns = {"track": [], "index": [], "length": []}
+
+        for track in self.tracks:
+            #--------------------------------------------------------------------------------
+            # Read the raw device and parameter records where objects have not yet been
+            # created from them.
+            #--------------------------------------------------------------------------------
+            if track._device_data is not None:
+                devices = [(device_index, device_data["parameters"], None)
+                           for device_index, device_data in enumerate(track._device_data)]
+            else:
+                devices = [(device.index, device._parameter_data, device) for device in track.devices]
+
+            for device_index, parameter_data, device in devices:
+                if parameter_data is not None:
+                    count = len(parameter_data)
+                    parameter_columns["value"].extend(map(operator.itemgetter("value"), parameter_data))
+                    parameter_columns["min"].extend(map(operator.itemgetter("min"), parameter_data))
+                    parameter_columns["max"].extend(map(operator.itemgetter("max"), parameter_data))
+                    parameter_columns["is_quantized"].extend(map(operator.itemgetter("is_quantized"), parameter_data))
+                else:
+                    parameters = device.parameters
+                    count = len(parameters)
+                    parameter_columns["value"].extend(map(operator.attrgetter("_value"), parameters))
+                    parameter_columns["min"].extend(map(operator.attrgetter("min"), parameters))
+                    parameter_columns["max"].extend(map(operator.attrgetter("max"), parameters))
+                    parameter_columns["is_quantized"].extend(map(operator.attrgetter("is_quantized"), parameters))
+                parameter_columns["track"].extend([track.index] * count)
+                parameter_columns["device"].extend([device_index] * count)
+                parameter_columns["index"].extend(range(count))
+
+            clips = track.clips.active()
+            clip_columns["track"].extend([track.index] * len(clips))
+            clip_columns["index"].extend(clip.index for clip in clips)
+            clip_columns["length"].extend(clip.length for clip in clips)
+
+        dtypes = {"track": np.int32, "device": np.int32, "index": np.int32, "value": np.float64,
+                  "min": np.float64, "max": np.float64, "is_quantized": np.bool_, "length": np.float64}
+        return {
+            "parameters": {name: np.array(column, dtype=dtypes[name]) for name, column in parameter_columns.items()},
+            "clips": {name: np.array(column, dtype=dtypes[name]) for name, column in clip_columns.items()},
+        }
+
     def _next_beat_callback(self, beats):
         self._next_beat_event.set()
 
@@ -474,10 +920,13 @@ class Set:
     def _add_mutexes(self):
         self._next_beat_event = threading.Event()
         self._startup_event = threading.Event()
+        self._rescan_lock = threading.Lock()
+        self._auto_rescan_subscriptions = []
 
     def _delete_mutexes(self):
         self._next_beat_event = None
         self._startup_event = None
+        self._rescan_lock = None
 
     def _update_tempo(self, tempo):
         pass
@@ -532,6 +981,9 @@ class Set:
         # Assume that the alphabetically-last Ableton binary is the one we 
         # want (ie, greatest version number.)
         # ------------------------------------------------------------------------
+        import glob
+        import subprocess
+
         ableton = sorted(glob.glob("/Applications/Ableton*.app"))[-1]
         subprocess.call(["open", "-a", ableton, path])
 
@@ -550,6 +1002,8 @@ class Set:
         """
         root = os.path.expanduser("~/Library/Preferences/Ableton")
         log_path_wildcard = os.path.join(root, "Live *", "Log.txt")
+        import glob
+
         log_paths = glob.glob(log_path_wildcard)
 
         if log_paths:
@@ -631,26 +1085,101 @@ class Set:
     # --------------------------------------------------------------------------------
 
     def start_playing(self) -> None:
-        self.live.cmd("/live/song/start_playing")
+        self.live.cmd(SONG_START_PLAYING)
 
     def continue_playing(self) -> None:
-        self.live.cmd("/live/song/continue_playing")
+        self.live.cmd(SONG_CONTINUE_PLAYING)
 
     def stop_playing(self) -> None:
-        self.live.cmd("/live/song/stop_playing")
+        self.live.cmd(SONG_STOP_PLAYING)
 
     def stop_all_clips(self) -> None:
-        self.live.cmd("/live/song/stop_all_clips")
+        self.live.cmd(SONG_STOP_ALL_CLIPS)
 
     is_playing = property(make_getter("song", "is_playing"),
                           doc="Whether the song is playing")
 
     def start_beat_listener(self) -> None:
+        """
+        Ask Live to send beat events. Called automatically when a beat callback
+        is registered, so only needed when handling /live/song/get/beat directly.
+        """
         self.live.cmd("/live/song/start_listen/beat")
 
     def stop_beat_listener(self) -> None:
         self.live.cmd("/live/song/stop_listen/beat")
 
+    # --------------------------------------------------------------------------------
+    # Mirroring
+    # --------------------------------------------------------------------------------
+
+    def start_mirroring(self, properties: Optional[dict] = None, parameters: bool = False):
+        """
+        Keep a local mirror of frequently-read properties, updated by Live's listeners,
+        so that reading them (e.g. set.tempo, track.volume, clip.is_playing) returns
+        immediately rather than making a query. Properties that are not mirrored are
+        queried as usual. Tracks and clips are mirrored as of the last scan.
+
+        Args:
+            properties: A dict mapping "song", "track" and "clip" to lists of property
+                        names to mirror. Defaults to DEFAULT_MIRRORED_PROPERTIES.
+            parameters: If True, also mirrors the value of every device parameter.
+
+        Returns:
+            The StateMirror.
+        """
+        if properties is None:
+            properties = DEFAULT_MIRRORED_PROPERTIES
+        self._mirrored_properties = (properties, parameters)
+        mirror = self.live.start_mirroring()
+        for prop in properties.get("song", []):
+            mirror.add("song", prop)
+        for track in self.tracks:
+            for prop in properties.get("track", []):
+                mirror.add("track", prop, (track.index,))
+            if track.is_group:
+                #--------------------------------------------------------------------------------
+                # A Group's clips are placeholders for the clips of its tracks,
+                # with no counterpart in Live.
+                #--------------------------------------------------------------------------------
+                continue
+            for clip in track.active_clips:
+                for prop in properties.get("clip", []):
+                    mirror.add("clip", prop, (track.index, clip.index))
+            if parameters:
+                for device in track.devices:
+                    for parameter in device.parameters:
+                        mirror.add("device", "parameter/value", (track.index, device.index, parameter.index))
+        return mirror
+
+    def stop_mirroring(self) -> None:
+        """
+        Stop mirroring properties. Subsequent reads query Live.
+        """
+        self._mirrored_properties = None
+        self.live.stop_mirroring()
+
+    # --------------------------------------------------------------------------------
+    # Caching
+    # --------------------------------------------------------------------------------
+
+    @property
+    def caching(self) -> bool:
+        """
+        Set caching to True to avoid re-querying properties such as tempo each
+        time they are requested. Increases efficiency in cases where no other
+        processes are going to modify Live's state. The cache is shared by all
+        objects that use the same Query; see Query.start_caching().
+        """
+        return self.live.cache is not None
+
+    @caching.setter
+    def caching(self, caching: bool) -> None:
+        if caching:
+            self.live.start_caching()
+        else:
+            self.live.stop_caching()
+
     # --------------------------------------------------------------------------------
     # Undo/redo
     # --------------------------------------------------------------------------------
@@ -687,6 +1216,7 @@ class Set:
             track_index: The index of the track to create. If -1, creates after the last existing track.
         """
         self.live.cmd("/live/song/create_audio_track", track_index)
+        self._invalidate_cache()
 
     def create_midi_track(self, track_index: int) -> None:
         """
@@ -696,6 +1226,7 @@ class Set:
             track_index: The index of the track to create. If -1, creates after the last existing track.
         """
         self.live.cmd("/live/song/create_midi_track", track_index)
+        self._invalidate_cache()
 
     def duplicate_track(self, track_index: int) -> None:
         """
@@ -705,6 +1236,7 @@ class Set:
             track_index: The index of the track to delete.
         """
         self.live.cmd("/live/song/duplicate_track", track_index)
+        self._invalidate_cache()
 
     def delete_track(self, track_index: int) -> None:
         """
@@ -714,6 +1246,7 @@ class Set:
             track_index: The index of the track to delete.
         """
         self.live.cmd("/live/song/delete_track", track_index)
+        self._invalidate_cache()
 
     def delete_return_track(self, track_index: int) -> None:
         """
@@ -723,6 +1256,15 @@ class Set:
             track_index: The index of the return track to delete.
         """
         self.live.cmd("/live/song/delete_return_track", track_index)
+        self._invalidate_cache()
+
+    def _invalidate_cache(self) -> None:
+        """
+        Discard all cached property values, after a change to the set's structure
+        which changes the objects that the indices of tracks, clips or scenes refer to.
+        """
+        if self.live.cache is not None:
+            self.live.cache.invalidate()
 
     def get_track_named(self, name: str) -> Optional[Track]:
         """
@@ -763,6 +1305,9 @@ class Set:
             scene_index: The index of the scene to create. If -1, the scene is created after the last scene.
         """
         self.live.cmd("/live/song/create_scene", scene_index)
+        self._invalidate_cache()
+        for track in self.tracks:
+            track.clips.insert_slot(scene_index if scene_index >= 0 else len(track.clips))
 
     def delete_scene(self, scene_index: int) -> None:
         """
@@ -772,6 +1317,10 @@ class Set:
             scene_index: The index of the scene to delete.
         """
         self.live.cmd("/live/song/delete_scene", scene_index)
+        self._invalidate_cache()
+        for track in self.tracks:
+            if scene_index < len(track.clips):
+                track.clips.delete_slot(scene_index)
 
     # --------------------------------------------------------------------------------
     # Cues
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from ..constants import CLIP_STATUS_PLAYING, CLIP_STATUS_STARTING
 from ..exceptions import LiveInvalidOperationException
+from ..osc import MessageTemplate
 from ..query import Query
 from typing import TYPE_CHECKING, Optional
 from .clip import Clip
@@ -15,18 +16,124 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+TRACK_STOP_ALL_CLIPS = MessageTemplate("/live/track/stop_all_clips")
+
 def make_getter(class_identifier, prop):
+    address = MessageTemplate("/live/%s/get/%s" % (class_identifier, prop))
+
     def fn(self):
-        return self.live.query("/live/%s/get/%s" % (class_identifier, prop), (self.index,))[1]
+        return self.live.get_property(address, (self.index,))
 
+    fn.address = address
     return fn
 
 def make_setter(class_identifier, prop):
+    address = MessageTemplate("/live/%s/set/%s" % (class_identifier, prop))
+    get_address = "/live/%s/get/%s" % (class_identifier, prop)
+
     def fn(self, value):
-        self.live.cmd("/live/%s/set/%s" % (class_identifier, prop), (self.index, value))
+        self.live.set_property(address, get_address, (self.index,), value)
 
+    fn.address = address
     return fn
 
+class ClipSlots(list):
+    """
+    The clip slots of a Track: a list containing a Clip or None for each scene.
+    Also keeps an index of its occupied slots, so that a track's clips can be
+    listed without examining every slot.
+    """
+
+    def __init__(self, slots=()):
+        super().__init__(slots)
+        self._reindex()
+
+    def __reduce__(self):
+        return (self.__class__, (list(self),))
+
+    def _reindex(self) -> None:
+        self.occupied = {index for index, clip in enumerate(self) if clip is not None}
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        if isinstance(index, slice):
+            self._reindex()
+            return
+        if index < 0:
+            index += len(self)
+        if value is None:
+            self.occupied.discard(index)
+        else:
+            self.occupied.add(index)
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._reindex()
+
+    def __iadd__(self, slots):
+        super().__iadd__(slots)
+        self._reindex()
+        return self
+
+    def append(self, clip: Optional[Clip]) -> None:
+        super().append(clip)
+        if clip is not None:
+            self.occupied.add(len(self) - 1)
+
+    def extend(self, slots) -> None:
+        super().extend(slots)
+        self._reindex()
+
+    def insert(self, index: int, clip: Optional[Clip]) -> None:
+        super().insert(index, clip)
+        self._reindex()
+
+    def pop(self, index: int = -1) -> Optional[Clip]:
+        clip = super().pop(index)
+        self._reindex()
+        return clip
+
+    def remove(self, clip: Optional[Clip]) -> None:
+        super().remove(clip)
+        self._reindex()
+
+    def clear(self) -> None:
+        super().clear()
+        self.occupied = set()
+
+    def active(self) -> list[Clip]:
+        """
+        Returns the clips in occupied slots, in slot order.
+        """
+        return [self[index] for index in sorted(self.occupied)]
+
+    def resize(self, size: int) -> None:
+        """
+        Add empty slots, or remove slots from the end, so that there are `size` slots.
+        """
+        if size > len(self):
+            super().extend([None] * (size - len(self)))
+        else:
+            del self[size:]
+
+    def insert_slot(self, index: int) -> None:
+        """
+        Insert an empty slot, as when a scene is created, renumbering the clips after it.
+        """
+        self.insert(index, None)
+        for clip in self[index + 1:]:
+            if clip is not None:
+                clip.index += 1
+
+    def delete_slot(self, index: int) -> None:
+        """
+        Remove a slot, as when a scene is deleted, renumbering the clips after it.
+        """
+        del self[index]
+        for clip in self[index:]:
+            if clip is not None:
+                clip.index -= 1
+
 class Track:
     """
     Represents a single Track, either audio or MIDI.
@@ -34,13 +141,18 @@ class Track:
     May be contained within a Group.
     """
 
-    def __init__(self, set: Set, index: int, name: str, group: Group = None):
+    __slots__ = ("set", "index", "name", "group", "is_group", "playing", "clip_init",
+                 "_clips", "_devices", "_device_data")
+    logger = logger
+
+    def __init__(self, set: Set, index: int, name: str, group: Group = None, num_scenes: int = 0):
         """
         Args:
             set: The containing Set object
             index: The numerical index of this Track within the Set
             name: Human-readable name
             group: (Optional) reference to containing Group object
+            num_scenes: (Optional) the number of scenes, and hence clip slots
         """
         self.set: Set = set
         self.index: int = index
@@ -48,10 +160,10 @@ class Track:
         self.group: Group = group
 
         self.is_group: bool = False
+        self.playing: bool = False
         self.clip_init = None
-        self.clips: list[Optional[Clip]] = [None] * 1024
-        self.devices: list[Device] = []
-        self.live: Query = Query()
+        self.clips = [None] * num_scenes
+        self.devices = []
 
     def __str__(self):
         if self.group:
@@ -70,6 +182,7 @@ class Track:
             "is_group": self.is_group,
             "clips": self.clips,
             "devices": self.devices,
+            "set": self.set,
         }
 
     def __setstate__(self, d: dict):
@@ -77,8 +190,56 @@ class Track:
         self.name = d["name"]
         self.group = d["group"]
         self.is_group = d["is_group"]
+        self.playing = False
+        self.clip_init = None
         self.clips = d["clips"]
         self.devices = d["devices"]
+        self.set = d.get("set")
+
+    @property
+    def clips(self) -> ClipSlots:
+        """
+        List of clip slots, containing a Clip object or None for each scene.
+        """
+        return self._clips
+
+    @clips.setter
+    def clips(self, clips: list[Optional[Clip]]) -> None:
+        self._clips = clips if type(clips) is ClipSlots else ClipSlots(clips)
+
+    @property
+    def devices(self) -> list[Device]:
+        """
+        List of Device objects. When the track has been scanned from a file, these
+        are created from its device records when first accessed.
+        """
+        if self._device_data is not None:
+            from .device import Device
+
+            self._devices = [Device(self, device_index, device_data["name"], device_data["parameters"])
+                             for device_index, device_data in enumerate(self._device_data)]
+            self._device_data = None
+        return self._devices
+
+    @devices.setter
+    def devices(self, devices: list[Device]) -> None:
+        self._devices = devices
+        self._device_data = None
+
+    @property
+    def live(self) -> Query:
+        """
+        The Query used to communicate with the Live instance containing this track.
+        """
+        if self.set is None:
+            return Query()
+        return self.set.live
+
+    def _index_args(self) -> tuple:
+        """
+        Returns the object indices that identify this object in an OSC query.
+        """
+        return (self.index,)
 
     @property
     def active_clips(self) -> list[Clip]:
@@ -86,8 +247,7 @@ class Track:
         # TODO: Not a great name / concept - revisit or remove
         Return a list of all non-null clips.
         """
-        active_clips = [n for n in self.clips if n is not None]
-        return active_clips
+        return self.clips.active()
 
     def create_clip(self, clip_index: int, length: float) -> Clip:
         """
@@ -103,10 +263,13 @@ class Track:
         Raises:
             LiveInvalidOperationException: If the clip already exists
         """
+        if clip_index >= len(self.clips):
+            self.clips.resize(clip_index + 1)
         if self.clips[clip_index] is not None:
             raise LiveInvalidOperationException("Clip [%d, %d] already exists" % (self.index, clip_index))
         else:
             self.live.cmd("/live/clip_slot/create_clip", (self.index, clip_index, length))
+            self._invalidate_cached_clip(clip_index)
             self.clips[clip_index] = Clip(self, clip_index, length)
             return self.clips[clip_index]
 
@@ -120,17 +283,26 @@ class Track:
         Raises:
             LiveInvalidOperationException: If the clip already exists
         """
-        if self.clips[clip_index] is None:
+        if clip_index >= len(self.clips) or self.clips[clip_index] is None:
             raise LiveInvalidOperationException("Clip [%d, %d] does not exist" % (self.index, clip_index))
         else:
             self.live.cmd("/live/clip_slot/delete_clip", (self.index, clip_index))
+            self._invalidate_cached_clip(clip_index)
             self.clips[clip_index] = None
 
+    def _invalidate_cached_clip(self, clip_index: int) -> None:
+        #------------------------------------------------------------------------
+        # The clip slot's cached properties describe the clip that was previously
+        # in it, if any.
+        #------------------------------------------------------------------------
+        if self.live.cache is not None:
+            self.live.cache.invalidate(indices=(self.index, clip_index))
+
     def stop(self):
         """
         Immediately stop the track from playing.
         """
-        self.live.cmd("/live/track/stop_all_clips", (self.index,))
+        self.live.cmd(TRACK_STOP_ALL_CLIPS, (self.index,))
 
     #------------------------------------------------------------------------
     # Query devices
@@ -237,4 +409,4 @@ class Track:
         return self.live.query("/live/track/get/send", (self.index, send_index))[1]
 
     def set_send(self, send_index: int, value: float):
-        self.live.cmd("/live/track/set/send", (self.index, send_index, value))
+        self.live.cmd_latest("/live/track/set/send", (self.index, send_index, value))
@@ -0,0 +1,113 @@
+import logging
+import threading
+from typing import Callable, Optional
+
+class CommandCoalescer:
+    """
+    Coalesces commands which set continuously-changing values, such as tempo or
+    parameter modulation. Only the newest pending value for each (address,
+    object indices) is kept, and pending values are sent periodically from a
+    background thread, at up to a maximum message rate.
+
+    Commands are assumed to take the form (*indices, value), as with the
+    setters of Set, Track, Clip and Parameter objects.
+    """
+
+    def __init__(self,
+                 send_fn: Callable[[str, tuple], None],
+                 interval: float = 0.01,
+                 max_rate: Optional[float] = None):
+        """
+        Args:
+            send_fn: Function to send a single command, taking (address, args).
+            interval: The interval between sends of pending values, in seconds.
+            max_rate: If specified, the maximum number of commands to send per second.
+                      Values which are still pending are sent in subsequent intervals,
+                      longest-waiting first.
+        """
+        self.send_fn = send_fn
+        self.interval = interval
+        self.max_rate = max_rate
+        self.logger = logging.getLogger(__name__)
+
+        #------------------------------------------------------------------------
+        # Pending commands, keyed by (address, indices). As dicts retain
+        # insertion order, and updating an existing key does not change its
+        # position, the longest-waiting key is always first.
+        #------------------------------------------------------------------------
+        self.pending: dict[tuple, tuple] = {}
+        self.lock = threading.Lock()
+
+        #------------------------------------------------------------------------
+        # Held while pending commands are being sent, so that discard() doesn't
+        # return while a command that it would have dropped is still to be sent.
+        #------------------------------------------------------------------------
+        self.send_lock = threading.RLock()
+
+        self.drain_stop_event = threading.Event()
+        self.drain_thread = threading.Thread(target=self._drain_periodically, daemon=True)
+        self.drain_thread.start()
+
+    def add(self, msg: str, args: tuple) -> None:
+        """
+        Queue a command, replacing any pending value for the same address and indices.
+        """
+        args = tuple(args)
+        with self.lock:
+            self.pending[(msg, args[:-1])] = (msg, args)
+
+    def drain(self, limit: Optional[int] = None) -> int:
+        """
+        Send pending commands.
+
+        Args:
+            limit: The maximum number of commands to send. If None, sends all.
+
+        Returns:
+            The number of commands sent.
+        """
+        with self.send_lock:
+            with self.lock:
+                if limit is None or limit >= len(self.pending):
+                    commands = list(self.pending.values())
+                    self.pending.clear()
+                else:
+                    commands = []
+                    for _ in range(limit):
+                        commands.append(self.pending.pop(next(iter(self.pending))))
+
+            for msg, args in commands:
+                self.send_fn(msg, args)
+        return len(commands)
+
+    def discard(self, msg: str, indices: tuple) -> None:
+        """
+        Drop any pending value for the given address and indices, for example because
+        it has been superseded by a command sent by other means.
+        """
+        with self.send_lock, self.lock:
+            self.pending.pop((msg, tuple(indices)), None)
+
+    def flush(self) -> None:
+        """
+        Send all pending commands, regardless of the maximum rate.
+        """
+        self.drain()
+
+    def stop(self) -> None:
+        """
+        Stop the background thread, and send any pending commands.
+        """
+        self.drain_stop_event.set()
+        self.drain_thread.join()
+        self.flush()
+
+    def _drain_periodically(self) -> None:
+        limit = None
+        if self.max_rate is not None:
+            limit = max(1, int(self.max_rate * self.interval))
+        while not self.drain_stop_event.wait(self.interval):
+            try:
+                self.drain(limit)
+            except Exception as e:
+                self.logger.warning("Couldn't send coalesced commands to Live: %s", e)
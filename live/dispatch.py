@@ -0,0 +1,293 @@
+import re
+import logging
+import threading
+from collections import deque
+from typing import Callable, Optional
+
+#------------------------------------------------------------------------
+# Characters which indicate that a segment of an OSC address pattern
+# contains a wildcard, as opposed to a literal string.
+#------------------------------------------------------------------------
+WILDCARD_CHARACTERS = set("*?[]{}")
+
+#------------------------------------------------------------------------
+# Maximum number of distinct addresses whose matches are cached.
+#------------------------------------------------------------------------
+MAX_MATCH_CACHE_SIZE = 4096
+
+def compile_segment_pattern(segment: str) -> re.Pattern:
+    """
+    Compile one segment of an OSC address pattern to a regular expression.
+    Supports the OSC wildcards *, ?, [abc], [!abc] and {foo,bar}.
+    """
+    regex = ""
+    index = 0
+    while index < len(segment):
+        char = segment[index]
+        if char == "*":
+            regex += ".*"
+        elif char == "?":
+            regex += "."
+        elif char == "[" and "]" in segment[index:]:
+            end = segment.index("]", index)
+            regex += compile_character_class(segment[index + 1:end])
+            index = end
+        elif char == "{" and "}" in segment[index:]:
+            end = segment.index("}", index)
+            regex += "(?:%s)" % "|".join(re.escape(option) for option in segment[index + 1:end].split(","))
+            index = end
+        else:
+            regex += re.escape(char)
+        index += 1
+    return re.compile(regex + r"\Z")
+
+def compile_character_class(members: str) -> str:
+    """
+    Compile the members of an OSC [abc] character class to a regular expression
+    character class. A leading ! negates the class, and a - between two members
+    denotes a range, as in [a-z]; all other characters match literally.
+    """
+    negate = members.startswith("!")
+    if negate:
+        members = members[1:]
+    regex = ""
+    index = 0
+    while index < len(members):
+        if index + 2 < len(members) and members[index + 1] == "-":
+            regex += "%s-%s" % (re.escape(members[index]), re.escape(members[index + 2]))
+            index += 3
+        else:
+            regex += re.escape(members[index])
+            index += 1
+    return "[%s%s]" % ("^" if negate else "", regex)
+
+def handler_arity(handler: Callable) -> Optional[int]:
+    """
+    Returns the number of positional arguments that a handler accepts,
+    or None if it accepts any number.
+    """
+    import inspect
+
+    try:
+        signature = inspect.signature(handler)
+    except (TypeError, ValueError):
+        return None
+    arity = 0
+    for parameter in signature.parameters.values():
+        if parameter.kind == parameter.VAR_POSITIONAL:
+            return None
+        if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD):
+            arity += 1
+    return arity
+
+class AddressTrieNode:
+    def __init__(self):
+        self.children: dict[str, AddressTrieNode] = {}
+        self.pattern_children: dict[str, tuple[re.Pattern, AddressTrieNode]] = {}
+        self.values: list = []
+
+class AddressTrie:
+    """
+    Maps OSC address patterns to values, matching addresses segment by
+    segment. Literal segments are looked up directly; segments containing
+    wildcards are compiled to regular expressions when they are added.
+    The results of matching each address are cached until the trie changes.
+    """
+
+    def __init__(self):
+        self.root = AddressTrieNode()
+        self.lock = threading.Lock()
+        self.match_cache: dict[str, list] = {}
+
+    def add(self, pattern: str, value) -> None:
+        with self.lock:
+            node = self.root
+            for segment in pattern.strip("/").split("/"):
+                if WILDCARD_CHARACTERS & set(segment):
+                    if segment not in node.pattern_children:
+                        node.pattern_children[segment] = (compile_segment_pattern(segment), AddressTrieNode())
+                    node = node.pattern_children[segment][1]
+                else:
+                    node = node.children.setdefault(segment, AddressTrieNode())
+            node.values.append(value)
+            self.match_cache = {}
+
+    def get(self, pattern: str) -> list:
+        """
+        Returns the values added with exactly the given pattern.
+        """
+        with self.lock:
+            node = self._find_node(pattern)
+            return list(node.values) if node is not None else []
+
+    def remove(self, pattern: str, value) -> bool:
+        """
+        Remove a value added with the given pattern.
+
+        Returns:
+            True if the value was found and removed, False otherwise.
+        """
+        with self.lock:
+            node = self._find_node(pattern)
+            if node is None or value not in node.values:
+                return False
+            node.values.remove(value)
+            self.match_cache = {}
+            return True
+
+    def _find_node(self, pattern: str) -> Optional[AddressTrieNode]:
+        node = self.root
+        for segment in pattern.strip("/").split("/"):
+            if segment in node.children:
+                node = node.children[segment]
+            elif segment in node.pattern_children:
+                node = node.pattern_children[segment][1]
+            else:
+                return None
+        return node
+
+    def match(self, address: str) -> list:
+        """
+        Returns all values whose patterns match the given address.
+        """
+        match_cache = self.match_cache
+        if address in match_cache:
+            return match_cache[address]
+
+        nodes = [self.root]
+        for segment in address.strip("/").split("/"):
+            next_nodes = []
+            for node in nodes:
+                if segment in node.children:
+                    next_nodes.append(node.children[segment])
+                for regex, child in node.pattern_children.values():
+                    if regex.match(segment):
+                        next_nodes.append(child)
+            nodes = next_nodes
+            if not nodes:
+                break
+
+        values = [value for node in nodes for value in node.values]
+        if len(match_cache) >= MAX_MATCH_CACHE_SIZE:
+            match_cache.clear()
+        match_cache[address] = values
+        return values
+
+class Subscription:
+    """
+    A handler subscribed to an EventDispatcher. Events for each subscription
+    are queued and executed in order, one at a time.
+    """
+
+    def __init__(self, pattern: str, handler: Callable, max_queue: int):
+        self.pattern = pattern
+        self.handler = handler
+        self.arity = handler_arity(handler)
+        self.queue = deque(maxlen=max_queue)
+        self.lock = threading.Lock()
+        self.running = False
+        self.dropped = 0
+
+    def __call__(self, args: tuple) -> None:
+        if self.arity is None:
+            self.handler(*args)
+        else:
+            self.handler(*args[:self.arity])
+
+class EventDispatcher:
+    """
+    Dispatches incoming OSC messages to subscribed handlers, executing them on
+    a bounded pool of worker threads so that slow handlers never delay the
+    receipt of messages or query responses.
+
+    Handlers are matched by OSC address pattern, with wildcard support:
+
+        dispatcher.subscribe("/live/track/get/*", handler)
+
+    Each handler is called with as many of the message's arguments as it
+    accepts. Any number of handlers can subscribe to the same address, and
+    each receives events in the order they arrived. If a handler falls more
+    than max_queue events behind, its oldest pending events are discarded.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 1024):
+        """
+        Args:
+            max_workers: The maximum number of threads used to execute handlers.
+            max_queue: The maximum number of pending events per handler.
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.trie = AddressTrie()
+        self.executor = None
+        self.executor_lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def subscribe(self, pattern: str, handler: Callable) -> Subscription:
+        """
+        Subscribe a handler to all messages whose address matches a pattern.
+
+        Returns:
+            The Subscription, which can be passed to unsubscribe().
+        """
+        subscription = Subscription(pattern, handler, self.max_queue)
+        self.trie.add(pattern, subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.trie.remove(subscription.pattern, subscription)
+
+    def unsubscribe_handler(self, pattern: str, handler: Callable) -> None:
+        """
+        Unsubscribe all subscriptions of a handler to a given pattern.
+        """
+        for subscription in self.trie.get(pattern):
+            if subscription.handler == handler:
+                self.unsubscribe(subscription)
+
+    def has_subscribers(self, address: str) -> bool:
+        return len(self.trie.match(address)) > 0
+
+    def dispatch(self, address: str, args: tuple) -> None:
+        """
+        Queue a message for each matching handler. Never blocks on handler execution.
+        """
+        for subscription in self.trie.match(address):
+            with subscription.lock:
+                if len(subscription.queue) == subscription.queue.maxlen:
+                    subscription.dropped += 1
+                    self.logger.debug("Handler for %s is falling behind, dropping event", subscription.pattern)
+                subscription.queue.append(args)
+                if subscription.running:
+                    continue
+                subscription.running = True
+            self._get_executor().submit(self._run_subscription, subscription)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the worker threads, optionally waiting for pending events to be handled.
+        """
+        with self.executor_lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _get_executor(self):
+        if self.executor is None:
+            with self.executor_lock:
+                if self.executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    self.executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="pylive-handler")
+        return self.executor
+
+    def _run_subscription(self, subscription: Subscription) -> None:
+        while True:
+            with subscription.lock:
+                if not subscription.queue:
+                    subscription.running = False
+                    return
+                args = subscription.queue.popleft()
+            try:
+                subscription(args)
+            except Exception:
+                self.logger.exception("Exception in handler for %s", subscription.pattern)
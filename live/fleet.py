@@ -0,0 +1,139 @@
+import logging
+from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from live.query import Query
+
+class Fleet:
+    """
+    Controls a number of Live instances together, each via its own Query.
+    Commands are sent to every instance, and queries are made to all instances
+    in parallel, so that a query to the whole fleet costs roughly one round trip:
+
+        fleet = live.Fleet.from_endpoints([
+            (("127.0.0.1", 11000), 11001),
+            (("127.0.0.1", 11010), 11011),
+        ])
+        fleet.cmd("/live/song/set/tempo", (120.0,))
+        tempos = fleet.query("/live/song/get/tempo")
+
+    Responses are returned as a list, in the same order as the fleet's queries.
+    """
+
+    def __init__(self, queries: list[Query], max_workers: Optional[int] = None):
+        """
+        Args:
+            queries: The Query object for each Live instance.
+            max_workers: The maximum number of threads used to make queries in parallel.
+                         Defaults to one per instance.
+        """
+        self.queries = list(queries)
+        self.max_workers = max_workers or max(1, len(self.queries))
+        self.executor = None
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_endpoints(cls, endpoints: list[tuple], **kwargs) -> "Fleet":
+        """
+        Create a Fleet from a list of ((host, port), listen_port) endpoints.
+        """
+        return cls([Query(address=address, listen_port=listen_port) for address, listen_port in endpoints], **kwargs)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def __iter__(self):
+        return iter(self.queries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stop the fleet's worker threads. The Query objects are left running.
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def stop(self) -> None:
+        """
+        Stop the fleet's worker threads, and stop each Query.
+        """
+        self.close()
+        for query in self.queries:
+            query.stop()
+
+    def cmd(self, msg: str, args: tuple = ()) -> None:
+        """
+        Send a command to every Live instance.
+        """
+        for query in self.queries:
+            query.cmd(msg, args)
+
+    def cmd_latest(self, msg: str, args: tuple) -> None:
+        """
+        Send a command setting a continuously-changing value to every Live instance.
+        See Query.cmd_latest().
+        """
+        for query in self.queries:
+            query.cmd_latest(msg, args)
+
+    def query(self, msg: str, args: tuple = (), timeout: float = None, return_exceptions: bool = False) -> list:
+        """
+        Make the same query to every Live instance in parallel.
+
+        Args:
+            msg: The OSC address to query.
+            args: The query arguments.
+            timeout: The timeout for each query, in seconds.
+            return_exceptions: If True, an exception raised by a query is returned in place
+                               of its response, rather than being raised.
+
+        Returns:
+            A list containing each instance's response.
+
+        Raises:
+            LiveConnectionError: If any instance does not respond within the timeout.
+        """
+        return self.map(lambda query: query.query(msg, args, timeout=timeout), return_exceptions=return_exceptions)
+
+    def query_many(self, queries: list, timeout: float = None, return_exceptions: bool = False) -> list:
+        """
+        Make a batch of queries to every Live instance in parallel. See Query.query_many().
+
+        Returns:
+            A list containing each instance's list of responses.
+        """
+        return self.map(lambda query: query.query_many(queries, timeout=timeout), return_exceptions=return_exceptions)
+
+    def map(self, fn: Callable[[Query], object], return_exceptions: bool = False) -> list:
+        """
+        Call fn with each instance's Query in parallel, and collect the results.
+
+        Args:
+            fn: A function taking a Query.
+            return_exceptions: If True, an exception raised by fn is returned in place
+                               of its result, rather than being raised.
+
+        Returns:
+            A list containing the result for each instance.
+        """
+        futures = [self._get_executor().submit(fn, query) for query in self.queries]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="pylive-fleet")
+        return self.executor
@@ -0,0 +1,236 @@
+import os
+import time
+import bisect
+import logging
+import threading
+from typing import Callable, Optional
+
+#------------------------------------------------------------------------
+# Upper bounds of the latency histogram's buckets, in seconds: spaced
+# logarithmically from 10us to around 30s, so that each bucket is 20% wider
+# than the last, and percentiles are accurate to within 20%.
+#------------------------------------------------------------------------
+LATENCY_BUCKETS = [1e-5 * 1.2 ** index for index in range(83)]
+
+#------------------------------------------------------------------------
+# Percentiles reported for each latency histogram.
+#------------------------------------------------------------------------
+LATENCY_PERCENTILES = (50, 95, 99)
+
+class LatencyHistogram:
+    """
+    Counts latency samples in fixed, logarithmically-spaced buckets, so that
+    recording a sample is cheap and memory use is constant, regardless of
+    the number of samples.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """
+        Returns an estimate of the given percentile (0-100), or None if no samples
+        have been recorded. The estimate is the upper bound of the bucket that
+        contains the percentile, capped at the largest sample.
+        """
+        if self.count == 0:
+            return None
+        threshold = self.count * percentile / 100
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= threshold and cumulative > 0:
+                if index < len(LATENCY_BUCKETS):
+                    return min(LATENCY_BUCKETS[index], self.max)
+                break
+        return self.max
+
+    def summary(self) -> dict:
+        summary = {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else None,
+            "max": self.max if self.count else None,
+        }
+        for percentile in LATENCY_PERCENTILES:
+            summary["p%d" % percentile] = self.percentile(percentile)
+        return summary
+
+class AddressMetrics:
+    """
+    Counters for the traffic to and from a single OSC address.
+    """
+
+    def __init__(self):
+        self.rtt = LatencyHistogram()
+        self.queries = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.messages_sent = 0
+        self.messages_received = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+class QueryMetrics:
+    """
+    Records per-address latency and throughput metrics for a Query:
+    round-trip time histograms, counts of queries, timeouts and retries,
+    and the numbers of messages and bytes sent and received.
+    """
+
+    def __init__(self):
+        self.addresses: dict[str, AddressMetrics] = {}
+        self.lock = threading.Lock()
+        self.start_time = time.monotonic()
+
+    def _get(self, address: str) -> AddressMetrics:
+        metrics = self.addresses.get(address)
+        if metrics is None:
+            metrics = self.addresses[address] = AddressMetrics()
+        return metrics
+
+    def record_send(self, address: str, size: int) -> None:
+        with self.lock:
+            metrics = self._get(address)
+            metrics.messages_sent += 1
+            metrics.bytes_sent += size
+
+    def record_receive(self, address: str, size: int) -> None:
+        with self.lock:
+            metrics = self._get(address)
+            metrics.messages_received += 1
+            metrics.bytes_received += size
+
+    def record_query(self, address: str, rtt: Optional[float]) -> None:
+        """
+        Record a completed query, with its round-trip time if it is unambiguous.
+        """
+        with self.lock:
+            metrics = self._get(address)
+            metrics.queries += 1
+            if rtt is not None:
+                metrics.rtt.record(rtt)
+
+    def record_timeout(self, address: str) -> None:
+        with self.lock:
+            self._get(address).timeouts += 1
+
+    def record_retry(self, address: str) -> None:
+        with self.lock:
+            self._get(address).retries += 1
+
+    def reset(self) -> None:
+        with self.lock:
+            self.addresses = {}
+            self.start_time = time.monotonic()
+
+    def snapshot(self) -> dict:
+        """
+        Returns the current metrics for each address, with message rates
+        averaged since the metrics were created or last reset.
+        """
+        with self.lock:
+            elapsed = max(time.monotonic() - self.start_time, 1e-9)
+            addresses = {}
+            for address, metrics in self.addresses.items():
+                addresses[address] = {
+                    "queries": metrics.queries,
+                    "timeouts": metrics.timeouts,
+                    "retries": metrics.retries,
+                    "messages_sent": metrics.messages_sent,
+                    "messages_received": metrics.messages_received,
+                    "bytes_sent": metrics.bytes_sent,
+                    "bytes_received": metrics.bytes_received,
+                    "send_rate": metrics.messages_sent / elapsed,
+                    "receive_rate": metrics.messages_received / elapsed,
+                    "rtt": metrics.rtt.summary(),
+                }
+        return {
+            "elapsed": elapsed,
+            "addresses": addresses,
+        }
+
+def format_exposition(stats: dict, prefix: str = "pylive") -> str:
+    """
+    Format a snapshot returned by Query.stats() in the Prometheus text
+    exposition format.
+    """
+    counters = ["queries", "timeouts", "retries", "messages_sent", "messages_received", "bytes_sent", "bytes_received"]
+    gauges = ["send_rate", "receive_rate"]
+    lines = []
+    for name in counters:
+        lines.append("# TYPE %s_%s_total counter" % (prefix, name))
+        for address, metrics in stats["addresses"].items():
+            lines.append('%s_%s_total{address="%s"} %d' % (prefix, name, address, metrics[name]))
+    for name in gauges:
+        lines.append("# TYPE %s_%s gauge" % (prefix, name))
+        for address, metrics in stats["addresses"].items():
+            lines.append('%s_%s{address="%s"} %g' % (prefix, name, address, metrics[name]))
+
+    lines.append("# TYPE %s_rtt_seconds summary" % prefix)
+    for address, metrics in stats["addresses"].items():
+        rtt = metrics["rtt"]
+        if not rtt["count"]:
+            continue
+        for percentile in LATENCY_PERCENTILES:
+            lines.append('%s_rtt_seconds{address="%s",quantile="%g"} %g' % (prefix, address, percentile / 100, rtt["p%d" % percentile]))
+        lines.append('%s_rtt_seconds_sum{address="%s"} %g' % (prefix, address, rtt["mean"] * rtt["count"]))
+        lines.append('%s_rtt_seconds_count{address="%s"} %d' % (prefix, address, rtt["count"]))
+
+    for name in ("receive_queue_depth", "receive_dropped"):
+        if name in stats:
+            lines.append("# TYPE %s_%s gauge" % (prefix, name))
+            lines.append("%s_%s %d" % (prefix, name, stats[name]))
+    return "\n".join(lines) + "\n"
+
+class MetricsExporter:
+    """
+    Periodically writes metrics to a file in the Prometheus text exposition
+    format, for collection by an external agent. Each file is written
+    atomically, so is never read partially-written.
+    """
+
+    def __init__(self, stats_fn: Callable[[], dict], path: str, interval: float = 10.0):
+        """
+        Args:
+            stats_fn: Function returning a metrics snapshot, such as Query.stats.
+            path: The path of the file to write.
+            interval: The interval between writes, in seconds.
+        """
+        self.stats_fn = stats_fn
+        self.path = path
+        self.interval = interval
+        self.logger = logging.getLogger(__name__)
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._export_periodically, daemon=True)
+        self.thread.start()
+
+    def export(self) -> None:
+        temp_path = "%s.tmp" % self.path
+        with open(temp_path, "w") as fd:
+            fd.write(format_exposition(self.stats_fn()))
+        os.replace(temp_path, self.path)
+
+    def stop(self) -> None:
+        """
+        Stop the background thread, and write the final metrics.
+        """
+        self.stop_event.set()
+        self.thread.join()
+        self.export()
+
+    def _export_periodically(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.export()
+            except OSError as e:
+                self.logger.warning("Couldn't write metrics to %s: %s", self.path, e)
@@ -0,0 +1,133 @@
+import logging
+import threading
+import functools
+
+#------------------------------------------------------------------------
+# Returned by StateMirror.get() for properties which aren't mirrored,
+# or whose value hasn't yet been received.
+#------------------------------------------------------------------------
+MISSING = object()
+
+#------------------------------------------------------------------------
+# Properties mirrored by Set.start_mirroring() by default, for each type
+# of object.
+#------------------------------------------------------------------------
+DEFAULT_MIRRORED_PROPERTIES = {
+    "song": ["tempo", "is_playing"],
+    "track": ["volume", "playing_slot_index"],
+    "clip": ["is_playing"],
+}
+
+class StateMirror:
+    """
+    Keeps a local copy of chosen properties of the Live set, which is kept
+    up to date by AbletonOSC's property listeners. Once a property's value has
+    been received, reading it returns immediately, without a round trip to
+    Live, and stays correct when the property is changed within Live.
+
+    Each property is identified by its getter address and object indices:
+
+        mirror.add("track", "volume", (2,))
+        mirror.get("/live/track/get/volume", (2,))
+
+    Generally, a StateMirror is created by Set.start_mirroring() rather than
+    directly, after which the getters of the Set, Track, Clip and Parameter
+    objects return mirrored values where available.
+    """
+
+    def __init__(self, query):
+        """
+        Args:
+            query: The Query used to communicate with Live.
+        """
+        self.query = query
+        self.logger = logging.getLogger(__name__)
+
+        #------------------------------------------------------------------------
+        # Maps (getter address, indices) to the property's last known value.
+        # Mirrored properties whose value has not yet been received are
+        # present in `keys`, but not in `values`.
+        #------------------------------------------------------------------------
+        self.keys: set[tuple] = set()
+        self.values: dict[tuple, object] = {}
+        self.lock = threading.Lock()
+
+        #------------------------------------------------------------------------
+        # Maps each getter address to its handler's Subscription, and the
+        # number of object indices that prefix each update to it.
+        #------------------------------------------------------------------------
+        self.subscriptions = {}
+        self.index_counts: dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, namespace: str, prop: str, indices: tuple = ()) -> None:
+        """
+        Start mirroring a property. Its current value is sent by Live immediately,
+        and subsequently whenever it changes.
+
+        Args:
+            namespace: The AbletonOSC namespace of the object: "song", "track", "clip" or "device".
+            prop: The name of the property, e.g. "volume" or "parameter/value".
+            indices: The indices of the object, as given in queries of the property.
+        """
+        address = "/live/%s/get/%s" % (namespace, prop)
+        key = (address, tuple(indices))
+        with self.lock:
+            if key in self.keys:
+                return
+            self.keys.add(key)
+            if address not in self.subscriptions:
+                self.index_counts[address] = len(indices)
+                self.subscriptions[address] = self.query.add_handler(address, functools.partial(self._update, address))
+        self.query.cmd("/live/%s/start_listen/%s" % (namespace, prop), tuple(indices))
+
+    def remove(self, namespace: str, prop: str, indices: tuple = ()) -> None:
+        """
+        Stop mirroring a property.
+        """
+        address = "/live/%s/get/%s" % (namespace, prop)
+        key = (address, tuple(indices))
+        with self.lock:
+            if key not in self.keys:
+                return
+            self.keys.discard(key)
+            self.values.pop(key, None)
+        self.query.cmd("/live/%s/stop_listen/%s" % (namespace, prop), tuple(indices))
+
+    def clear(self) -> None:
+        """
+        Stop mirroring all properties.
+        """
+        with self.lock:
+            keys = list(self.keys)
+        for address, indices in keys:
+            _, _, namespace, _, prop = address.split("/", 4)
+            self.remove(namespace, prop, indices)
+        with self.lock:
+            for subscription in self.subscriptions.values():
+                self.query.remove_handler(subscription.pattern, subscription)
+            self.subscriptions = {}
+
+    def get(self, address: str, indices: tuple = ()):
+        """
+        Returns the mirrored value of a property, or MISSING if the property is not
+        mirrored or its value has not yet been received.
+        """
+        return self.values.get((address, indices), MISSING)
+
+    def set_local(self, address: str, indices: tuple, value) -> None:
+        """
+        Update the mirrored value of a property that has just been set, so that it
+        can be read back before Live's update is received.
+        """
+        key = (address, indices)
+        if key in self.keys:
+            self.values[key] = value
+
+    def _update(self, address: str, *args) -> None:
+        count = self.index_counts[address]
+        key = (address, tuple(args[:count]))
+        if key in self.keys and len(args) > count:
+            self.values[key] = args[count]
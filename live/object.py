@@ -1,4 +1,10 @@
+import time
 import logging
+import threading
+from typing import Optional
+from collections import OrderedDict
+
+from .mirror import MISSING
 
 logger = logging.getLogger("live")
 
@@ -17,7 +23,8 @@ def name_cache(fn):
     set_tempo.
 
     This will fall out of sync if the value of tempo is externally
-    changed!
+    changed! The properties of Set, Track, Clip and Parameter objects are
+    instead cached by PropertyCache; see Query.start_caching().
     """
 
     name = fn.__name__
@@ -42,3 +49,193 @@ def name_cache(fn):
 
     return cached_fn
 
+
+#------------------------------------------------------------------------
+# Caching policies for PropertyCache:
+#  - CACHE_IMMUTABLE: the property never changes, so is cached indefinitely.
+#  - CACHE_INVALIDATE_ON_WRITE: cached until the property is set.
+#  - CACHE_TTL: cached for a fixed time, and updated with values that are set.
+#  - CACHE_NEVER: always queried, for properties that change on their own.
+#------------------------------------------------------------------------
+CACHE_IMMUTABLE = "immutable"
+CACHE_INVALIDATE_ON_WRITE = "invalidate_on_write"
+CACHE_TTL = "ttl"
+CACHE_NEVER = "never"
+
+#------------------------------------------------------------------------
+# Policies of properties that do not use the cache's default policy,
+# keyed by getter address, as (policy, ttl).
+#------------------------------------------------------------------------
+DEFAULT_CACHE_POLICIES = {
+    "/live/clip/get/is_midi_clip": (CACHE_IMMUTABLE, None),
+    "/live/clip/get/is_audio_clip": (CACHE_IMMUTABLE, None),
+    "/live/song/get/num_tracks": (CACHE_TTL, 1.0),
+    "/live/song/get/num_scenes": (CACHE_TTL, 1.0),
+    "/live/song/get/current_song_time": (CACHE_NEVER, None),
+    "/live/song/get/is_playing": (CACHE_NEVER, None),
+    "/live/song/get/can_undo": (CACHE_NEVER, None),
+    "/live/song/get/can_redo": (CACHE_NEVER, None),
+    "/live/track/get/playing_slot_index": (CACHE_NEVER, None),
+    "/live/track/get/fired_slot_index": (CACHE_NEVER, None),
+    "/live/clip/get/is_playing": (CACHE_NEVER, None),
+}
+
+class PropertyCache:
+    """
+    Caches the values of properties queried from Live, so that reading a property
+    repeatedly only queries Live when necessary. Replaces name_cache.
+
+    Each property is identified by its getter address and object indices, and is
+    cached according to the policy for its address (see set_policy()). Values are
+    written through the cache by property setters, so that reading a property
+    after setting it always returns the value that was set.
+
+    The cache holds at most `max_size` values, discarding the least recently used.
+    """
+
+    def __init__(self,
+                 max_size: int = 65536,
+                 default_policy: str = CACHE_INVALIDATE_ON_WRITE,
+                 default_ttl: Optional[float] = None):
+        """
+        Args:
+            max_size: The maximum number of values to cache.
+            default_policy: The policy of properties with no policy of their own.
+            default_ttl: The time-to-live of the default policy, if it is CACHE_TTL.
+        """
+        self.max_size = max_size
+        self.default_policy = (default_policy, default_ttl)
+        self.policies = dict(DEFAULT_CACHE_POLICIES)
+
+        #------------------------------------------------------------------------
+        # Maps (getter address, indices) to (value, expiry time or None),
+        # in order of least to most recently used.
+        #------------------------------------------------------------------------
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        #------------------------------------------------------------------------
+        # Incremented by every write, so that a value queried while a write
+        # was in progress is not cached.
+        #------------------------------------------------------------------------
+        self.version = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def set_policy(self, address: str, policy: str, ttl: Optional[float] = None) -> None:
+        """
+        Set the caching policy of a property.
+
+        Args:
+            address: The getter address of the property, e.g. "/live/track/get/volume".
+            policy: One of CACHE_IMMUTABLE, CACHE_INVALIDATE_ON_WRITE, CACHE_TTL or CACHE_NEVER.
+            ttl: For CACHE_TTL, the time for which values are cached, in seconds.
+        """
+        if policy not in (CACHE_IMMUTABLE, CACHE_INVALIDATE_ON_WRITE, CACHE_TTL, CACHE_NEVER):
+            raise ValueError("Invalid cache policy: %s" % policy)
+        if policy == CACHE_TTL and ttl is None:
+            raise ValueError("A TTL is required for the CACHE_TTL policy")
+        with self.lock:
+            self.policies[address] = (policy, ttl)
+            for key in [key for key in self.entries if key[0] == address]:
+                del self.entries[key]
+
+    def get_policy(self, address: str) -> tuple:
+        """
+        Returns the (policy, ttl) of a property.
+        """
+        return self.policies.get(address, self.default_policy)
+
+    def lookup(self, address: str, indices: tuple = ()) -> tuple:
+        """
+        Look up the cached value of a property.
+
+        Returns:
+            A tuple of (value, version). The value is MISSING if it is not cached,
+            in which case the version should be passed to store() with the value
+            queried from Live.
+        """
+        key = (address, indices)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or time.monotonic() < expires:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value, self.version
+                del self.entries[key]
+            self.misses += 1
+            return MISSING, self.version
+
+    def store(self, address: str, indices: tuple, value, version: int) -> None:
+        """
+        Cache a value queried from Live, unless a write has been made since the
+        version was returned by lookup().
+        """
+        policy, ttl = self.get_policy(address)
+        if policy == CACHE_NEVER:
+            return
+        with self.lock:
+            if version != self.version:
+                return
+            self._put((address, indices), value, ttl if policy == CACHE_TTL else None)
+
+    def write(self, address: str, indices: tuple, value) -> None:
+        """
+        Update the cache for a property that has been set.
+        """
+        policy, ttl = self.get_policy(address)
+        key = (address, indices)
+        with self.lock:
+            self.version += 1
+            if policy == CACHE_TTL:
+                self._put(key, value, ttl)
+            else:
+                self.entries.pop(key, None)
+
+    def invalidate(self, address: Optional[str] = None, indices: Optional[tuple] = None) -> None:
+        """
+        Discard cached values: of a single property if both address and indices are
+        given, of all objects' values of a property if only address is given, of all
+        properties with the given object indices if only indices are given, or
+        otherwise of all properties.
+        """
+        with self.lock:
+            self.version += 1
+            if address is None and indices is None:
+                self.entries.clear()
+            elif address is None:
+                for key in [key for key in self.entries if key[1] == indices]:
+                    del self.entries[key]
+            elif indices is not None:
+                self.entries.pop((address, indices), None)
+            else:
+                for key in [key for key in self.entries if key[0] == address]:
+                    del self.entries[key]
+
+    def stats(self) -> dict:
+        """
+        Returns the number of cached values, and counts of hits, misses and evictions.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
+
+    def _put(self, key: tuple, value, ttl: Optional[float]) -> None:
+        self.entries[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
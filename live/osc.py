@@ -0,0 +1,267 @@
+import struct
+import logging
+import threading
+from collections.abc import Iterable
+from typing import Callable, Optional
+
+#------------------------------------------------------------------------
+# An OSC bundle is the string "#bundle", a 64-bit timetag (where 1 means
+# "immediately"), and a series of elements, each prefixed by its size.
+#------------------------------------------------------------------------
+BUNDLE_HEADER = b"#bundle\x00" + struct.pack(">Q", 1)
+BUNDLE_ELEMENT_SIZE = struct.Struct(">i")
+
+#------------------------------------------------------------------------
+# Largest UDP payload that fits in a standard Ethernet frame without
+# fragmentation (1500 bytes, less 20 bytes IPv4 and 8 bytes UDP header).
+#------------------------------------------------------------------------
+DEFAULT_MTU = 1472
+
+class Datagram:
+    """
+    Pre-encoded OSC content, which can be passed to a python-osc UDPClient's send().
+    """
+    __slots__ = ("dgram",)
+
+    def __init__(self, dgram: bytes):
+        self.dgram = dgram
+
+#------------------------------------------------------------------------
+# Type tags and struct format characters for argument types that can be
+# packed by a MessageTemplate. Booleans and None are encoded entirely in
+# the type tag, with no payload; as the type tag of a boolean depends on
+# its value, booleans are keyed by value rather than type.
+#------------------------------------------------------------------------
+TEMPLATE_ARG_TYPES = {
+    int: ("i", "i"),
+    float: ("f", "f"),
+    True: ("T", None),
+    False: ("F", None),
+    type(None): ("N", None),
+}
+
+def encode_string(value: str) -> bytes:
+    """
+    Encode a string as a null-terminated OSC string, padded to a multiple of 4 bytes.
+    """
+    dgram = value.encode("utf-8") + b"\x00"
+    return dgram + b"\x00" * (-len(dgram) % 4)
+
+def padded_size(size: int) -> int:
+    """
+    Returns the given size rounded up to a multiple of 4 bytes, as OSC requires.
+    """
+    return (size + 3) & ~3
+
+def message_size(address: str, args=()) -> int:
+    """
+    Returns the size in bytes of an OSC message with the given address and
+    args, without encoding it. Used to account for received traffic, which
+    arrives already decoded.
+    """
+    size = padded_size(len(address.encode("utf-8")) + 1)
+    typetags = 1
+    for arg in _args_tuple(args):
+        typetags += 1
+        if arg is None or type(arg) is bool:
+            continue
+        elif type(arg) is int:
+            size += 4 if -0x80000000 <= arg <= 0x7FFFFFFF else 8
+        elif type(arg) is str:
+            size += padded_size(len(arg.encode("utf-8")) + 1)
+        elif type(arg) is bytes:
+            size += 4 + padded_size(len(arg))
+        else:
+            size += 4
+    return size + padded_size(typetags + 1)
+
+class MessageTemplate(str):
+    """
+    An OSC address whose encoding is computed once, so that each message sent
+    to it only needs its arguments to be packed. Type tags and the struct used
+    to pack the arguments are cached for each combination of argument types.
+
+    MessageTemplate is a str subclass, so can be used anywhere that an OSC
+    address is accepted:
+
+        CLIP_SLOT_FIRE = MessageTemplate("/live/clip_slot/fire")
+        live.cmd(CLIP_SLOT_FIRE, (track_index, clip_index))
+
+    Arguments of types other than int, float, bool and None are encoded by
+    python-osc's OscMessageBuilder.
+    """
+
+    def __new__(cls, address: str):
+        template = super().__new__(cls, address)
+        template.address_dgram = encode_string(address)
+        template.signatures = {}
+        return template
+
+    def pack(self, args=()) -> bytes:
+        """
+        Encode an OSC message to this address with the given arguments.
+        """
+        if type(args) is not tuple:
+            args = _args_tuple(args)
+        types = tuple(map(type, args))
+        if bool in types:
+            types = tuple(arg if arg_type is bool else arg_type for arg, arg_type in zip(args, types))
+        signature = self.signatures.get(types)
+        if signature is None:
+            signature = self.signatures[types] = self._compile_signature(types)
+        if signature is False:
+            return _build_message(self, args)
+
+        typetags, packer, payload_indices = signature
+        try:
+            if payload_indices is None:
+                return self.address_dgram + typetags + packer.pack(*args)
+            return self.address_dgram + typetags + packer.pack(*[args[index] for index in payload_indices])
+        except struct.error:
+            #------------------------------------------------------------------------
+            # Integers beyond 32 bits are encoded as int64 by OscMessageBuilder.
+            #------------------------------------------------------------------------
+            return _build_message(self, args)
+
+    def _compile_signature(self, types: tuple):
+        if any(arg_type not in TEMPLATE_ARG_TYPES for arg_type in types):
+            return False
+
+        typetags = ","
+        packer_format = ">"
+        payload_indices = []
+        for index, arg_type in enumerate(types):
+            typetag, format_char = TEMPLATE_ARG_TYPES[arg_type]
+            typetags += typetag
+            if format_char is not None:
+                packer_format += format_char
+                payload_indices.append(index)
+        if len(payload_indices) == len(types):
+            payload_indices = None
+        return (encode_string(typetags), struct.Struct(packer_format), payload_indices)
+
+def encode_message(address: str, args=()) -> bytes:
+    """
+    Encode an OSC message. As with SimpleUDPClient.send_message(), args may be
+    a single value or an iterable of values. If address is a MessageTemplate,
+    its precomputed encoding is used.
+    """
+    if type(address) is MessageTemplate:
+        return address.pack(args)
+    return _build_message(address, args)
+
+def _args_tuple(args) -> tuple:
+    if args is None:
+        return ()
+    elif not isinstance(args, Iterable) or isinstance(args, (str, bytes)):
+        return (args,)
+    return tuple(args)
+
+def _build_message(address: str, args=()) -> bytes:
+    from pythonosc.osc_message_builder import OscMessageBuilder
+
+    builder = OscMessageBuilder(address=address)
+    if args is None:
+        pass
+    elif not isinstance(args, Iterable) or isinstance(args, (str, bytes)):
+        builder.add_arg(args)
+    else:
+        for arg in args:
+            builder.add_arg(arg)
+    return builder.build().dgram
+
+def encode_bundle(dgrams: list[bytes]) -> bytes:
+    """
+    Encode a list of OSC messages as a bundle, to be processed immediately.
+    """
+    parts = [BUNDLE_HEADER]
+    for dgram in dgrams:
+        parts.append(BUNDLE_ELEMENT_SIZE.pack(len(dgram)))
+        parts.append(dgram)
+    return b"".join(parts)
+
+class BundleBatcher:
+    """
+    Queues outgoing OSC messages and packs them into bundles which fit within
+    a given MTU, reducing the number of datagrams (and syscalls) needed to send
+    many messages. Messages in the same bundle are processed by Live together.
+
+    Queued messages are sent when flush() is called, when the next message
+    would not fit within the current bundle, or periodically if an interval
+    is given.
+    """
+
+    def __init__(self,
+                 send_fn: Callable[[bytes], None],
+                 mtu: int = DEFAULT_MTU,
+                 interval: Optional[float] = None):
+        """
+        Args:
+            send_fn: Function to send a single datagram.
+            mtu: The maximum size of each datagram, in bytes.
+            interval: If specified, flushes queued messages every `interval` seconds
+                      from a background thread.
+        """
+        self.send_fn = send_fn
+        self.mtu = mtu
+        self.interval = interval
+        self.logger = logging.getLogger(__name__)
+
+        self.queue: list[bytes] = []
+        self.queue_size = len(BUNDLE_HEADER)
+        self.lock = threading.Lock()
+
+        self.flush_thread = None
+        self.flush_stop_event = threading.Event()
+        if interval is not None:
+            self.flush_thread = threading.Thread(target=self._flush_periodically, daemon=True)
+            self.flush_thread.start()
+
+    def add(self, dgram: bytes) -> None:
+        """
+        Queue an encoded OSC message for sending.
+        """
+        element_size = BUNDLE_ELEMENT_SIZE.size + len(dgram)
+        with self.lock:
+            if self.queue and self.queue_size + element_size > self.mtu:
+                self._send_queue()
+            self.queue.append(dgram)
+            self.queue_size += element_size
+
+    def flush(self) -> None:
+        """
+        Send all queued messages.
+        """
+        with self.lock:
+            self._send_queue()
+
+    def stop(self) -> None:
+        """
+        Stop the periodic flush thread, and send any queued messages.
+        """
+        if self.flush_thread is not None:
+            self.flush_stop_event.set()
+            self.flush_thread.join()
+            self.flush_thread = None
+        self.flush()
+
+    def _send_queue(self) -> None:
+        if not self.queue:
+            return
+        queue, self.queue = self.queue, []
+        self.queue_size = len(BUNDLE_HEADER)
+
+        #------------------------------------------------------------------------
+        # A lone message is sent as-is, as a bundle would only add overhead.
+        #------------------------------------------------------------------------
+        if len(queue) == 1:
+            self.send_fn(queue[0])
+        else:
+            self.send_fn(encode_bundle(queue))
+
+    def _flush_periodically(self) -> None:
+        while not self.flush_stop_event.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.warning("Couldn't send batched messages to Live: %s", e)
@@ -1,26 +1,133 @@
-import os
-import inspect
+import time
+import functools
 import logging
-import argparse
 import threading
-import tempfile
+import contextlib
+from typing import Callable, Optional, Union
+from collections import deque
 
 from live.exceptions import LiveConnectionError
+from live.coalescer import CommandCoalescer
+from live.dispatch import EventDispatcher, Subscription
+from live.osc import BundleBatcher, Datagram, DEFAULT_MTU, encode_message, message_size
+from live.metrics import QueryMetrics, MetricsExporter
+from live.rtt import RTTEstimator
+from live.mirror import MISSING
+from live.object import PropertyCache
 
-from pythonosc.dispatcher import Dispatcher
-from pythonosc.osc_server import ThreadingOSCUDPServer
-from pythonosc.udp_client import SimpleUDPClient
+#------------------------------------------------------------------------
+# Default ports of the AbletonOSC server, and on which to receive its responses.
+#------------------------------------------------------------------------
+DEFAULT_ADDRESS = ("127.0.0.1", 11000)
+DEFAULT_LISTEN_PORT = 11001
 
-def singleton(cls):
+def shared_per_endpoint(cls):
+    """
+    Class decorator which returns one shared instance of cls for each
+    (address, listen_port) endpoint, so that all objects which communicate
+    with the same Live instance share a single connection. An instance which
+    has been stopped is replaced by a new one on the next call.
+
+    Further arguments configure the instance when it is created. Passing
+    arguments which differ from those of the existing instance for an endpoint
+    raises a ValueError, rather than silently ignoring them.
+    """
     instances = {}
+    arguments = {}
+    lock = threading.Lock()
 
-    def getinstance(*args):
-        if cls not in instances:
-            instances[cls] = cls(*args)
-        return instances[cls]
-
+    def bind_arguments(args: tuple, kwargs: dict) -> dict:
+        #------------------------------------------------------------------------
+        # Arguments are only bound when they need to be compared, to keep
+        # inspect off the import path.
+        #------------------------------------------------------------------------
+        import inspect
+        bound = inspect.signature(cls).bind(None, None, *args, **kwargs)
+        bound.apply_defaults()
+        bound = dict(list(bound.arguments.items())[2:])
+        normalise = getattr(cls, "_normalise_arguments", None)
+        return normalise(bound) if normalise is not None else bound
+
+    def getinstance(address=DEFAULT_ADDRESS, listen_port=DEFAULT_LISTEN_PORT, *args, **kwargs):
+        key = (tuple(address), listen_port)
+        with lock:
+            instance = instances.get(key)
+            if instance is None or instance.stopped:
+                instance = instances[key] = cls(address, listen_port, *args, **kwargs)
+                arguments[key] = (args, kwargs)
+            elif args or kwargs:
+                existing = bind_arguments(*arguments[key])
+                if bind_arguments(args, kwargs) != existing:
+                    raise ValueError("A %s already exists for %s:%d, with different arguments (%s)" %
+                                     (cls.__name__, address[0], listen_port, existing))
+            return instance
+
+    getinstance.instances = instances
     return getinstance
 
+#------------------------------------------------------------------------
+# AbletonOSC prefixes its response to a track, clip, device or scene query
+# with the object indices given in the query, which lets us match a response
+# to the query that requested it. Song-level and application queries have no
+# echoed arguments, and are matched in the order that they were sent.
+#
+# Counts are keyed by the address after /live/: an endpoint, an endpoint
+# with a wildcard final segment, or a namespace. Endpoints that address a
+# sub-object, such as a device parameter or a track send, also echo its index.
+#------------------------------------------------------------------------
+ECHOED_ARGUMENT_COUNTS = {
+    "track": 1,
+    "track/get/send": 2,
+    "scene": 1,
+    "clip": 2,
+    "clip_slot": 2,
+    "device": 2,
+    "device/get/parameter/*": 3,
+}
+
+@functools.lru_cache(maxsize=4096)
+def echoed_argument_count(address: str) -> int:
+    """
+    Returns the number of query arguments that Live echoes back in its response
+    to a query with the given address, from the most specific matching entry
+    of ECHOED_ARGUMENT_COUNTS.
+    """
+    path = address[len("/live/"):] if address.startswith("/live/") else address.lstrip("/")
+    segments = path.split("/")
+    for key in (path, "/".join(segments[:-1] + ["*"]), segments[0]):
+        if key in ECHOED_ARGUMENT_COUNTS:
+            return ECHOED_ARGUMENT_COUNTS[key]
+    return 0
+
+def query_key(address: str, args: tuple) -> tuple:
+    """
+    Returns the key used to match a query to its response: the OSC address,
+    plus any object indices that Live echoes back in the response.
+    """
+    return (address, tuple(args[:echoed_argument_count(address)]))
+
+def is_idempotent(address: str) -> bool:
+    """
+    Returns True if a query can safely be sent more than once: that is, if it
+    only reads state from Live, which is the case for all /get/ queries.
+    """
+    return "/get/" in address
+
+class PendingQuery:
+    """
+    A query that has been sent to Live and is awaiting its response.
+    """
+
+    def __init__(self, address: str, args: tuple):
+        self.address = address
+        self.args = args
+        self.key = query_key(address, args)
+        self.event = threading.Event()
+        self.rv = None
+        self.sent_at = None
+        self.received_at = None
+        self.attempts = 0
+
 #------------------------------------------------------------------------
 # Helper methods to save instantiating an object when making calls.
 #------------------------------------------------------------------------
@@ -28,172 +135,732 @@ def singleton(cls):
 def query(*args, **kwargs):
     return Query().query(*args, **kwargs)
 
+def query_many(*args, **kwargs):
+    return Query().query_many(*args, **kwargs)
+
 def cmd(*args, **kwargs):
     Query().cmd(*args, **kwargs)
 
-@singleton
+def cmd_latest(*args, **kwargs):
+    Query().cmd_latest(*args, **kwargs)
+
+@shared_per_endpoint
 class Query:
     """
     Object responsible for passing OSC queries to the LiveOSC server,
     parsing and proxying responses.
 
-    This object is a singleton, under the assumption that only one Live instance
-    can be running, so only one global Live Query object should be needed.
-
-    Following this assumption, static helper functions also exist:
+    One Query object is shared per Live instance: calling Query() with the
+    same address and listen_port returns the same object. The default
+    instance, at 127.0.0.1:11000, is used by the static helper functions:
 
         live.query(path, *args)
         live.cmd(path, *args)
+
+    To control further Live instances, create a Query for each, and pass it
+    to the Set for that instance:
+
+        query = live.Query(address=("127.0.0.1", 11010), listen_port=11011)
+        set = live.Set(live=query)
+
+    Queries may be made concurrently from multiple threads. Each response is
+    matched to its query by OSC address plus the object indices that Live
+    echoes back, so many queries can be in flight at once.
+
+    Handlers for incoming messages can be registered with add_handler(), and
+    are executed on a bounded pool of worker threads.
     """
 
-    def __init__(self, address=("127.0.0.1", 11000), listen_port=11001):
-        self.beat_callback = None
-        self.startup_callback = None
+    def __init__(self,
+                 address=DEFAULT_ADDRESS,
+                 listen_port=DEFAULT_LISTEN_PORT,
+                 receive_backend: Union[str, type] = "selector",
+                 **receive_backend_kwargs):
+        """
+        Args:
+            address: The (host, port) of the AbletonOSC server.
+            listen_port: The local port on which to receive responses from AbletonOSC.
+            receive_backend: The backend used to receive messages: either "selector", which
+                             receives and decodes on a single thread into a bounded queue,
+                             "threading", which handles each datagram on a new thread,
+                             or a Receiver subclass.
+            receive_backend_kwargs: Additional arguments for the backend, such as the
+                                    SelectorReceiver's queue_size and rcvbuf.
+        """
         self.listen_port = listen_port
         self.logger = logging.getLogger(__name__)
 
         #------------------------------------------------------------------------
         # Handler callbacks for particular messages from Live.
         # Used so that other processes can register callbacks when states change.
+        # Handlers are executed on a pool of worker threads, so never delay the
+        # receipt of query responses.
         #------------------------------------------------------------------------
-        self.handlers = {}
+        self.events = EventDispatcher()
+        self._beat_subscription = None
+        self._startup_subscription = None
 
+        #------------------------------------------------------------------------
+        # The socket used to send messages, and the receiver, are created on
+        # first use, so that scripts which never communicate with Live (for
+        # example, to inspect a saved Set) don't bind the listen port.
+        #------------------------------------------------------------------------
         self.osc_address = address
-        self.osc_client = SimpleUDPClient(*address)
-
-        self.dispatcher = Dispatcher()
-        self.dispatcher.set_default_handler(self.osc_handler)
-        self.osc_server = ThreadingOSCUDPServer((address[0], listen_port),
-                                                self.dispatcher)
+        self.osc_client = None
+        self.receive_backend = receive_backend
+        self.receive_backend_kwargs = receive_backend_kwargs
+        self.receiver = None
+        self.start_lock = threading.Lock()
 
-        self.osc_server_thread = None
-        self.osc_read_event = None
+        #------------------------------------------------------------------------
+        # The overall time to wait for a response to a query. Within this, each
+        # attempt waits for a timeout derived from the measured round-trip time
+        # of queries to the same address, after which idempotent (/get/) queries
+        # are retransmitted, up to max_retries times.
+        #------------------------------------------------------------------------
         self.osc_timeout = 3.0
-        self.osc_server_events = {}
+        self.max_retries = 3
+        self.rtt = RTTEstimator(max_rto=self.osc_timeout)
 
-        self.query_address = None
-        self.query_rv = []
+        #------------------------------------------------------------------------
+        # Optional WireTracer, which records all OSC traffic. Disabled by default.
+        #------------------------------------------------------------------------
+        self.tracer = None
 
-        self.listen()
+        #------------------------------------------------------------------------
+        # Optional per-address latency and throughput metrics, reported by
+        # stats(). Disabled by default; see start_metrics().
+        #------------------------------------------------------------------------
+        self.metrics = None
+        self.metrics_exporter = None
+
+        #------------------------------------------------------------------------
+        # Optional BundleBatcher, which packs outgoing commands into OSC bundles.
+        # Disabled by default; see start_batching().
+        #------------------------------------------------------------------------
+        self.batcher = None
+
+        #------------------------------------------------------------------------
+        # Optional CommandCoalescer, which sends only the latest value of
+        # rapidly-changing properties. Disabled by default; see start_coalescing().
+        #------------------------------------------------------------------------
+        self.coalescer = None
+
+        #------------------------------------------------------------------------
+        # Optional StateMirror, which keeps listener-backed copies of properties
+        # so that they can be read without a round trip. Disabled by default;
+        # see start_mirroring().
+        #------------------------------------------------------------------------
+        self.mirror = None
+
+        #------------------------------------------------------------------------
+        # Optional PropertyCache, which caches property values between queries.
+        # Disabled by default; see start_caching().
+        #------------------------------------------------------------------------
+        self.cache = None
+
+        #------------------------------------------------------------------------
+        # Queries that are awaiting a response, keyed by query_key().
+        # Each key maps to a queue of PendingQuery objects, in the order they
+        # were sent, so that any number of queries can be in flight at once.
+        #------------------------------------------------------------------------
+        self.pending_queries = {}
+        self.pending_queries_lock = threading.Lock()
+
+        self.stopped = False
+
+    @staticmethod
+    def _normalise_arguments(arguments: dict) -> dict:
+        #------------------------------------------------------------------------
+        # A receive backend may be given either by name or by class.
+        #------------------------------------------------------------------------
+        from live.receiver import RECEIVE_BACKENDS
+        backend = arguments.get("receive_backend")
+        if isinstance(backend, str) and backend in RECEIVE_BACKENDS:
+            arguments["receive_backend"] = RECEIVE_BACKENDS[backend]
+        return arguments
 
     def listen(self):
-        target = self.osc_server.serve_forever
+        """
+        Start receiving messages from Live. Called automatically before the
+        first query is sent, or the first handler is added.
+        """
+        from live.receiver import RECEIVE_BACKENDS
 
-        self.osc_server_thread = threading.Thread(target=target)
-        self.osc_server_thread.setDaemon(True)
-        self.osc_server_thread.start()
+        with self.start_lock:
+            if self.receiver is None:
+                if isinstance(self.receive_backend, str):
+                    self.receive_backend = RECEIVE_BACKENDS[self.receive_backend]
+                self.receiver = self.receive_backend((self.osc_address[0], self.listen_port),
+                                                     self.handler,
+                                                     **self.receive_backend_kwargs)
+                self.receiver.start()
 
     def stop(self):
         """ Terminate this query object and unbind from OSC listening. """
-        pass
+        self.stopped = True
+        self.stop_exporting_metrics()
+        with self.start_lock:
+            if self.receiver is not None:
+                self.receiver.stop()
+        self.events.shutdown(wait=False)
 
     def cmd(self, msg: str, args: tuple = ()):
         """ Send a Live command without expecting a response back:
 
-            live.cmd("/live/tempo", 110.0) """
+            live.cmd("/live/tempo", 110.0)
+
+        If batching is enabled, the command is queued to be sent in a bundle. """
 
+        if self.batcher is not None:
+            self.logger.debug("OSC output (batched): %s %s", msg, args)
+            if self.tracer is not None:
+                self.tracer.record("out", msg, args)
+            dgram = encode_message(msg, args)
+            if self.metrics is not None:
+                self.metrics.record_send(msg, len(dgram))
+            self.batcher.add(dgram)
+        else:
+            self._send(msg, args)
+
+    def cmd_latest(self, msg: str, args: tuple):
+        """ Send a Live command which sets a value, of the form (*indices, value):
+
+            live.cmd_latest("/live/song/set/tempo", (110.0,))
+
+        If coalescing is enabled, the command replaces any value that is still
+        pending for the same address and indices, so that only the latest value
+        is sent. Otherwise, equivalent to cmd(). """
+
+        coalescer = self.coalescer
+        if coalescer is not None:
+            coalescer.add(msg, args)
+        else:
+            self.cmd(msg, args)
+
+    def _send(self, msg: str, args: tuple = ()):
+        """ Send a message immediately, bypassing any batching. """
         self.logger.debug("OSC output: %s %s", msg, args)
-        with open(os.path.join(tempfile.gettempdir(), "liveosc.log"), "a") as fd:
-            import datetime
-            fd.write("%s %s %s\n" % (datetime.datetime.now(), msg, args))
+        if self.tracer is not None:
+            self.tracer.record("out", msg, args)
+        dgram = encode_message(msg, args)
+        if self.metrics is not None:
+            self.metrics.record_send(msg, len(dgram))
+        self.send_datagram(dgram)
+
+    def send_datagram(self, dgram: bytes):
+        """ Send an encoded OSC message or bundle to Live. """
         try:
-            self.osc_client.send_message(msg, args)
+            if self.osc_client is None:
+                from pythonosc.udp_client import SimpleUDPClient
+                self.osc_client = SimpleUDPClient(*self.osc_address)
+            self.osc_client.send(Datagram(dgram))
 
         except Exception as e:
             raise LiveConnectionError("Couldn't send message to Live (is AbletonOSC present and activated?): %s" % e)
 
+    #------------------------------------------------------------------------
+    # Batching of outgoing commands into OSC bundles.
+    #------------------------------------------------------------------------
+
+    def start_batching(self, mtu: int = DEFAULT_MTU, interval: Optional[float] = 0.005):
+        """
+        Start queueing outgoing commands, to be packed into OSC bundles of at most
+        `mtu` bytes. Queued commands are sent when flush() is called, when a bundle
+        is full, or every `interval` seconds. Queries are always sent immediately,
+        after flushing any queued commands.
+
+        Args:
+            mtu: The maximum size of each datagram, in bytes.
+            interval: The interval between automatic flushes, in seconds.
+                      If None, commands are only sent when flush() is called or a bundle is full.
+        """
+        if self.batcher is not None:
+            self.stop_batching()
+        self.batcher = BundleBatcher(self.send_datagram, mtu, interval)
+
+    def stop_batching(self):
+        """
+        Send any queued commands, and stop batching.
+        """
+        batcher, self.batcher = self.batcher, None
+        if batcher is not None:
+            batcher.stop()
+
+    def flush(self):
+        """
+        Send any commands queued by coalescing or batching.
+        """
+        if self.coalescer is not None:
+            self.coalescer.flush()
+        if self.batcher is not None:
+            self.batcher.flush()
+
+    #------------------------------------------------------------------------
+    # Coalescing of commands that set continuously-changing values.
+    #------------------------------------------------------------------------
+
+    def start_coalescing(self, interval: float = 0.01, max_rate: Optional[float] = None):
+        """
+        Start coalescing the commands sent by cmd_latest(), which is used by the
+        property setters of Set, Track, Clip and Parameter objects. Only the newest
+        value for each property is kept, and pending values are sent every
+        `interval` seconds. Queries first send any pending values.
+
+        Args:
+            interval: The interval between sends of pending values, in seconds.
+            max_rate: If specified, the maximum number of coalesced commands to send per second.
+        """
+        if self.coalescer is not None:
+            self.stop_coalescing()
+        self.coalescer = CommandCoalescer(self.cmd, interval, max_rate)
+
+    def stop_coalescing(self):
+        """
+        Send any pending values, and stop coalescing.
+        """
+        coalescer, self.coalescer = self.coalescer, None
+        if coalescer is not None:
+            coalescer.stop()
+
+    #------------------------------------------------------------------------
+    # Mirroring of properties via Live's listeners.
+    #------------------------------------------------------------------------
+
+    def start_mirroring(self):
+        """
+        Create a StateMirror, which the property getters of Set, Track, Clip and
+        Parameter objects consult before querying Live. Properties are added to the
+        mirror with StateMirror.add(), or Set.start_mirroring().
+
+        Returns:
+            The StateMirror.
+        """
+        from live.mirror import StateMirror
+
+        if self.mirror is None:
+            self.mirror = StateMirror(self)
+        return self.mirror
+
+    def stop_mirroring(self):
+        """
+        Stop listening for changes to mirrored properties, and discard the mirror.
+        """
+        mirror, self.mirror = self.mirror, None
+        if mirror is not None:
+            mirror.clear()
+
+    #------------------------------------------------------------------------
+    # Caching of property values.
+    #------------------------------------------------------------------------
+
+    def start_caching(self, max_size: int = 65536) -> PropertyCache:
+        """
+        Create a PropertyCache, which caches the values of properties of Set, Track,
+        Clip and Parameter objects, so that repeatedly reading them does not query
+        Live each time. Values are cached according to the policy for each property;
+        see PropertyCache.set_policy().
+
+        Args:
+            max_size: The maximum number of values to cache.
+
+        Returns:
+            The PropertyCache.
+        """
+        if self.cache is None:
+            self.cache = PropertyCache(max_size)
+        return self.cache
+
+    def stop_caching(self) -> None:
+        """
+        Discard the cache. Subsequent reads query Live.
+        """
+        self.cache = None
+
+    #------------------------------------------------------------------------
+    # Getting and setting properties of objects.
+    #------------------------------------------------------------------------
+
+    def get_property(self, address: str, indices: tuple = ()):
+        """
+        Returns the value of an object's property, from the mirror or cache if
+        possible, or otherwise by querying Live. Used by the property getters of
+        Set, Track, Clip and Parameter objects.
+
+        Args:
+            address: The getter address of the property, e.g. "/live/track/get/volume".
+            indices: The indices of the object, e.g. (track_index,).
+        """
+        mirror = self.mirror
+        if mirror is not None:
+            value = mirror.get(address, indices)
+            if value is not MISSING:
+                return value
+        cache = self.cache
+        if cache is None:
+            return self.query(address, indices)[len(indices)]
+        value, version = cache.lookup(address, indices)
+        if value is MISSING:
+            value = self.query(address, indices)[len(indices)]
+            cache.store(address, indices, value, version)
+        return value
+
+    def set_property(self, address: str, get_address: str, indices: tuple, value) -> None:
+        """
+        Set the value of an object's property, updating the mirror and cache so
+        that the value can be read back immediately. Used by the property setters
+        of Set, Track, Clip and Parameter objects.
+
+        Args:
+            address: The setter address of the property, e.g. "/live/track/set/volume".
+            get_address: The getter address of the property.
+            indices: The indices of the object, e.g. (track_index,).
+            value: The value to set.
+        """
+        self.cmd_latest(address, indices + (value,))
+        self.set_local(get_address, indices, value)
+
+    def set_local(self, get_address: str, indices: tuple, value) -> None:
+        """
+        Update the mirror and cache with the value of a property that has been set
+        by a command other than its setter, such as a bulk setter.
+
+        Args:
+            get_address: The getter address of the property.
+            indices: The indices of the object, e.g. (track_index,).
+            value: The value that was set.
+        """
+        if self.mirror is not None:
+            self.mirror.set_local(get_address, indices, value)
+        if self.cache is not None:
+            self.cache.write(get_address, indices, value)
+
+    @contextlib.contextmanager
+    def batch(self, mtu: int = DEFAULT_MTU):
+        """
+        Context manager which batches all commands sent within its body, flushing on exit:
+
+            with live.Query().batch():
+                for track in set.tracks:
+                    track.volume = 0.5
+        """
+        if self.batcher is not None:
+            yield
+            self.flush()
+        else:
+            self.start_batching(mtu, interval=None)
+            try:
+                yield
+            finally:
+                self.stop_batching()
+
     def query(self, msg: str, args: tuple = (), timeout: float = None):
         """
         Send a Live command and synchronously wait for its response:
 
         return live.query("/live/tempo")
 
+        If no response is received within the retransmission timeout for the
+        address, idempotent (/get/) queries whose arguments are all echoed in
+        the response are resent, up to max_retries times.
+
         Returns a list of values.
         """
+        return self.query_many([(msg, args)], timeout=timeout)[0]
 
-        #------------------------------------------------------------------------
-        # Create an Event to block the thread until this response has been
-        # triggered.
-        #------------------------------------------------------------------------
-        self.osc_server_events[msg] = threading.Event()
+    def query_many(self, queries: list, timeout: float = None) -> list:
+        """
+        Send a batch of queries back-to-back, and wait for all of their responses
+        together, so that the batch costs roughly one round trip:
+
+        volumes = live.query_many([("/live/track/get/volume", (index,)) for index in range(200)])
+
+        Idempotent (/get/) queries whose responses are not received within the
+        retransmission timeout are resent, up to max_retries times.
+
+        Args:
+            queries: A list of (address, args) tuples.
+            timeout: The overall timeout for the whole batch, in seconds.
+
+        Returns:
+            A list containing the response to each query, in request order.
+
+        Raises:
+            LiveConnectionError: If any response is not received within the timeout.
+        """
+        if timeout is None:
+            timeout = self.osc_timeout
+        deadline = time.monotonic() + timeout
 
         #------------------------------------------------------------------------
-        # query_rv will be populated by the callback, storing the return value
-        # of the OSC query.
+        # Register the queries before sending them, so that their responses
+        # can't arrive before we're ready for them.
         #------------------------------------------------------------------------
-        self.query_address = msg
-        self.query_rv = []
-        self.cmd(msg, args)
+        if self.receiver is None:
+            self.listen()
+        pending_queries = [self._add_pending_query(msg, args) for msg, args in queries]
+        try:
+            self.flush()
+            unresolved = to_send = pending_queries
+            while True:
+                for pending in to_send:
+                    if pending.attempts > 0:
+                        self.logger.debug("Retransmitting query (%s, %s)", pending.address, pending.args)
+                        if self.metrics is not None:
+                            self.metrics.record_retry(pending.address)
+                    pending.attempts += 1
+                    pending.sent_at = time.monotonic()
+                    self._send(pending.address, pending.args)
+
+                #------------------------------------------------------------------------
+                # Wait for the retransmission timeout, doubling with each attempt.
+                # If no further attempts can be made, wait until the deadline.
+                #------------------------------------------------------------------------
+                attempt_deadline = deadline
+                retransmittable = [pending for pending in unresolved if self._can_retransmit(pending)]
+                if retransmittable:
+                    rto = max(self.rtt.rto(pending.address) * 2 ** (pending.attempts - 1) for pending in retransmittable)
+                    attempt_deadline = min(deadline, time.monotonic() + rto)
+
+                for pending in unresolved:
+                    pending.event.wait(max(0.0, attempt_deadline - time.monotonic()))
+                unresolved = [pending for pending in unresolved if not pending.event.is_set()]
+                if not unresolved:
+                    break
+
+                if time.monotonic() >= deadline:
+                    if self.metrics is not None:
+                        for pending in unresolved:
+                            self.metrics.record_timeout(pending.address)
+                    pending = unresolved[0]
+                    self.logger.debug("Timeout during query (%s, %s)", pending.address, pending.args)
+                    raise LiveConnectionError("Timed out waiting for response to query: %s %s. Is Live running and LiveOSC installed?" % (pending.address, pending.args))
+                to_send = [pending for pending in unresolved if self._can_retransmit(pending)]
+        finally:
+            for pending in pending_queries:
+                self._remove_pending_query(pending)
 
         #------------------------------------------------------------------------
-        # Wait for a response. 
+        # Update the round-trip time estimates. Responses to retransmitted
+        # queries are ambiguous, so are not sampled (Karn's algorithm).
         #------------------------------------------------------------------------
-        if timeout is None:
-            timeout = self.osc_timeout
-        rv = self.osc_server_events[msg].wait(timeout)
+        for pending in pending_queries:
+            rtt = pending.received_at - pending.sent_at if pending.attempts == 1 else None
+            if rtt is not None:
+                self.rtt.update(pending.address, rtt)
+            if self.metrics is not None:
+                self.metrics.record_query(pending.address, rtt)
 
-        if not rv:
-            self.logger.debug("Timeout during query ({msg}, {args}, {kwargs})")
-            raise LiveConnectionError("Timed out waiting for response to query: %s %s. Is Live running and LiveOSC installed?" % (self.query_address, args))
+        return [pending.rv for pending in pending_queries]
 
-        return self.query_rv
+    def _can_retransmit(self, pending: PendingQuery) -> bool:
+        #------------------------------------------------------------------------
+        # A retransmitted query may receive more than one response, and the
+        # surplus response will be matched to the next query with the same key.
+        # This is only safe if the key identifies the query completely, so that
+        # both queries are asking the same question.
+        #------------------------------------------------------------------------
+        return is_idempotent(pending.address) and \
+               len(pending.args) <= echoed_argument_count(pending.address) and \
+               pending.attempts <= self.max_retries
+
+    def _add_pending_query(self, msg: str, args: tuple) -> PendingQuery:
+        pending = PendingQuery(msg, tuple(args))
+        with self.pending_queries_lock:
+            if pending.key not in self.pending_queries:
+                self.pending_queries[pending.key] = deque()
+            self.pending_queries[pending.key].append(pending)
+        return pending
+
+    def _remove_pending_query(self, pending: PendingQuery) -> None:
+        with self.pending_queries_lock:
+            queue = self.pending_queries.get(pending.key)
+            if queue is not None and pending in queue:
+                queue.remove(pending)
+                if not queue:
+                    del self.pending_queries[pending.key]
+
+    def _resolve_pending_query(self, address: str, data: tuple) -> bool:
+        """
+        Pass a response to the oldest pending query that it matches.
 
-    def osc_handler(self, address, *args):
-        self.handler(address, args)
+        Returns:
+            True if the response was awaited by a query, False otherwise.
+        """
+        key = query_key(address, data)
+        with self.pending_queries_lock:
+            queue = self.pending_queries.get(key)
+            if not queue:
+                return False
+            pending = queue.popleft()
+            if not queue:
+                del self.pending_queries[key]
+        pending.rv = list(data)
+        pending.received_at = time.monotonic()
+        pending.event.set()
+        return True
 
     def handler(self, address, data):
         self.logger.debug("OSC input: %s %s" % (address, data))
+        if self.tracer is not None:
+            self.tracer.record("in", address, data)
+        if self.metrics is not None:
+            self.metrics.record_receive(address, message_size(address, data))
 
         #------------------------------------------------------------------------
-        # Execute any callbacks that have been registered for this message
+        # If this message is awaiting a synchronous return, trigger the
+        # thread event and update our return value.
         #------------------------------------------------------------------------
-        if address in self.handlers:
-            for handler in self.handlers[address]:
-                handler(*data)
+        self._resolve_pending_query(address, data)
 
         #------------------------------------------------------------------------
-        # If this message is awaiting a synchronous return, trigger the
-        # thread event and update our return value. 
+        # Queue any callbacks that have been registered for this message.
         #------------------------------------------------------------------------
-        if address == self.query_address:
-            self.query_rv += data
-            self.osc_server_events[address].set()
-            return
+        self.events.dispatch(address, data)
 
-        if address == "/live/song/get/beat":
-            if self.beat_callback is not None:
-                #------------------------------------------------------------------------
-                # Beat callbacks are used if we want to trigger an event on each beat,
-                # to synchronise with the timing of the Live set.
-                #
-                # Callbacks may take one argument: the current beat count.
-                # If not specified, call with 0 arguments.
-                #------------------------------------------------------------------------
-                signature = inspect.signature(self.beat_callback)
-                has_arg = len(signature.parameters) > 0
+    #------------------------------------------------------------------------
+    # Metrics.
+    #------------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of this Query's metrics. Per-address metrics are only
+        recorded after start_metrics() has been called.
+
+            {
+                "elapsed": seconds since the metrics were created or reset,
+                "receive_queue_depth": number of received messages awaiting handling,
+                "receive_dropped": number of received messages discarded due to a full queue,
+                "addresses": {
+                    "/live/song/get/tempo": {
+                        "queries", "timeouts", "retries",
+                        "messages_sent", "messages_received", "bytes_sent", "bytes_received",
+                        "send_rate", "receive_rate",
+                        "rtt": { "count", "mean", "max", "p50", "p95", "p99" },
+                    },
+                    ...
+                },
+                "cache": { "size", "hits", "misses", "evictions", "hit_rate" }, if caching
+            }
+
+        Rates are in messages per second, and round-trip times in seconds.
+        """
+        stats = self.metrics.snapshot() if self.metrics is not None else {"elapsed": 0.0, "addresses": {}}
+        stats["receive_queue_depth"] = self.receiver.queue_depth if self.receiver is not None else 0
+        stats["receive_dropped"] = self.receiver.dropped if self.receiver is not None else 0
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+    def start_metrics(self) -> QueryMetrics:
+        """
+        Start recording per-address latency and throughput metrics, as reported by
+        stats(). Recording has a small cost for every message sent and received,
+        so is disabled by default.
+
+        Returns:
+            The QueryMetrics.
+        """
+        if self.metrics is None:
+            self.metrics = QueryMetrics()
+        return self.metrics
+
+    def stop_metrics(self) -> None:
+        """
+        Stop recording metrics, and discard those recorded so far.
+        """
+        self.stop_exporting_metrics()
+        self.metrics = None
 
-                if has_arg:
-                    self.beat_callback(data[0])
-                else:
-                    self.beat_callback()
+    def start_exporting_metrics(self, path: str, interval: float = 10.0) -> None:
+        """
+        Periodically write this Query's metrics to a file, in the Prometheus text
+        exposition format. Starts recording metrics, if not already started.
+        """
+        self.stop_exporting_metrics()
+        self.start_metrics()
+        self.metrics_exporter = MetricsExporter(self.stats, path, interval)
+
+    def stop_exporting_metrics(self) -> None:
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+            self.metrics_exporter = None
+
+    def add_handler(self, address: str, handler: Callable) -> Subscription:
+        """
+        Register a handler for incoming messages whose address matches a given
+        pattern, which may contain OSC wildcards (e.g. "/live/track/get/*").
+        Any number of handlers can be registered for the same address.
 
-        elif address == "/live/startup":
-            if self.startup_callback is not None:
-                self.startup_callback()
+        The handler is called with as many of the message's arguments as it accepts.
 
-    def add_handler(self, address, handler):
-        if not address in self.handlers:
-            self.handlers[address] = []
-        self.handlers[address].append(handler)
+        Returns:
+            The Subscription, which can be passed to remove_handler().
+        """
+        if self.receiver is None:
+            self.listen()
+        return self.events.subscribe(address, handler)
+
+    def remove_handler(self, address: str, handler: Union[Callable, Subscription]) -> None:
+        """
+        Unregister a handler registered with add_handler().
+        """
+        if isinstance(handler, Subscription):
+            self.events.unsubscribe(handler)
+        else:
+            self.events.unsubscribe_handler(address, handler)
+
+    #------------------------------------------------------------------------
+    # Beat callbacks are used if we want to trigger an event on each beat,
+    # to synchronise with the timing of the Live set.
+    #
+    # Callbacks may take one argument: the current beat count.
+    # If not specified, call with 0 arguments.
+    #
+    # Live only sends beat events while a beat callback is registered.
+    #------------------------------------------------------------------------
+
+    @property
+    def beat_callback(self) -> Optional[Callable]:
+        return self._beat_subscription.handler if self._beat_subscription else None
+
+    @beat_callback.setter
+    def beat_callback(self, callback: Optional[Callable]):
+        was_listening = self._beat_subscription is not None
+        if was_listening:
+            self.events.unsubscribe(self._beat_subscription)
+        self._beat_subscription = self.add_handler("/live/song/get/beat", callback) if callback else None
+        if callback and not was_listening:
+            self.cmd("/live/song/start_listen/beat")
+        elif not callback and was_listening:
+            self.cmd("/live/song/stop_listen/beat")
+
+    @property
+    def startup_callback(self) -> Optional[Callable]:
+        return self._startup_subscription.handler if self._startup_subscription else None
+
+    @startup_callback.setter
+    def startup_callback(self, callback: Optional[Callable]):
+        if self._startup_subscription is not None:
+            self.events.unsubscribe(self._startup_subscription)
+        self._startup_subscription = self.add_handler("/live/startup", callback) if callback else None
 
 if __name__ == "__main__":
+    import argparse
+
     parser = argparse.ArgumentParser()
     parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
     parser.add_argument("--reload", action="store_true", help="Prompt AbletonOSC to reload code")
+    parser.add_argument("--trace", type=str, help="Write a trace of all OSC traffic to the given NDJSON file")
     args = parser.parse_args()
     logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
 
     query = Query()
+    query.listen()
+    if args.trace:
+        from live.tracer import WireTracer
+        query.tracer = WireTracer()
+        query.tracer.start_flushing(args.trace)
     if args.reload:
         query.cmd("/live/reload")
     print("Awaiting Live events...")
@@ -0,0 +1,202 @@
+import abc
+import queue
+import socket
+import logging
+import selectors
+import threading
+from typing import Callable, Optional
+
+from pythonosc.osc_packet import OscPacket, ParseError
+
+#------------------------------------------------------------------------
+# Maximum size of a UDP datagram.
+#------------------------------------------------------------------------
+MAX_DATAGRAM_SIZE = 65536
+
+class Receiver(abc.ABC):
+    """
+    Base class for backends which receive OSC messages from Live, and pass
+    each message to a handler function taking (address, args).
+    """
+
+    def __init__(self, address: tuple, handler: Callable[[str, tuple], None]):
+        """
+        Args:
+            address: The (host, port) to listen on.
+            handler: Function called with (address, args) for each incoming message.
+        """
+        self.address = address
+        self.handler = handler
+        self.dropped = 0
+        self.logger = logging.getLogger(__name__)
+
+    @abc.abstractmethod
+    def start(self) -> None:
+        """
+        Start receiving messages.
+        """
+
+    @abc.abstractmethod
+    def stop(self) -> None:
+        """
+        Stop receiving messages, and close the socket.
+        """
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        The number of received messages that are waiting to be handled.
+        """
+        return 0
+
+class ThreadingReceiver(Receiver):
+    """
+    Receives messages using python-osc's ThreadingOSCUDPServer, which handles
+    each incoming datagram on a newly-created thread.
+    """
+
+    def __init__(self, address: tuple, handler: Callable[[str, tuple], None]):
+        from pythonosc.dispatcher import Dispatcher
+        from pythonosc.osc_server import ThreadingOSCUDPServer
+
+        super().__init__(address, handler)
+        self.dispatcher = Dispatcher()
+        self.dispatcher.set_default_handler(self.osc_handler)
+        self.osc_server = ThreadingOSCUDPServer(address, self.dispatcher)
+        self.osc_server_thread = None
+
+    def osc_handler(self, address, *args):
+        self.handler(address, args)
+
+    def start(self) -> None:
+        self.osc_server_thread = threading.Thread(target=self.osc_server.serve_forever, daemon=True)
+        self.osc_server_thread.start()
+
+    def stop(self) -> None:
+        if self.osc_server_thread is not None:
+            self.osc_server.shutdown()
+            self.osc_server.server_close()
+            self.osc_server_thread = None
+
+class SelectorReceiver(Receiver):
+    """
+    Receives messages on a single selector-based thread, which drains all
+    available datagrams from the socket on each wakeup, decodes them, and
+    places the decoded messages on a bounded queue. A second thread takes
+    messages from the queue and passes them to the handler.
+
+    With a fixed pair of threads, CPU use remains steady under high message
+    rates (such as meters and parameter listeners), and bursts are absorbed
+    by the socket's receive buffer and the queue.
+    """
+
+    def __init__(self,
+                 address: tuple,
+                 handler: Callable[[str, tuple], None],
+                 queue_size: int = 65536,
+                 rcvbuf: Optional[int] = 1 << 20,
+                 batch_size: int = 64):
+        """
+        Args:
+            address: The (host, port) to listen on.
+            handler: Function called with (address, args) for each incoming message.
+            queue_size: The maximum number of decoded messages to queue. If the queue
+                        is full, further messages are discarded until it drains.
+            rcvbuf: If specified, the size of the socket's receive buffer (SO_RCVBUF), in bytes.
+            batch_size: The maximum number of datagrams to read on each wakeup.
+        """
+        super().__init__(address, handler)
+        self.batch_size = batch_size
+        self.queue = queue.Queue(queue_size)
+
+        family = socket.AF_INET6 if ":" in address[0] else socket.AF_INET
+        self.socket = socket.socket(family, socket.SOCK_DGRAM)
+        if rcvbuf is not None:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        self.socket.bind(address)
+        self.socket.setblocking(False)
+
+        self.stop_event = threading.Event()
+        self.receive_thread = None
+        self.handle_thread = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self.queue.qsize()
+
+    def start(self) -> None:
+        self.stop_event.clear()
+        self.receive_thread = threading.Thread(target=self._receive_loop, daemon=True)
+        self.handle_thread = threading.Thread(target=self._handle_loop, daemon=True)
+        self.receive_thread.start()
+        self.handle_thread.start()
+
+    def stop(self) -> None:
+        if self.receive_thread is not None:
+            self.stop_event.set()
+            self.receive_thread.join()
+
+            #------------------------------------------------------------------------
+            # Discard any messages still queued, so that the sentinel which stops
+            # the handler thread can't block on a full queue. A handler may
+            # itself stop the receiver, in which case its thread can't be joined.
+            #------------------------------------------------------------------------
+            while True:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            self.queue.put_nowait(None)
+            if self.handle_thread is not threading.current_thread():
+                self.handle_thread.join()
+            self.receive_thread = None
+            self.handle_thread = None
+        self.socket.close()
+
+    def _receive_loop(self) -> None:
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.socket, selectors.EVENT_READ)
+            while not self.stop_event.is_set():
+                #------------------------------------------------------------------------
+                # Wake periodically to check whether we have been stopped.
+                #------------------------------------------------------------------------
+                if not selector.select(timeout=0.1):
+                    continue
+                for _ in range(self.batch_size):
+                    try:
+                        dgram = self.socket.recv(MAX_DATAGRAM_SIZE)
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    except OSError as e:
+                        self.logger.warning("Error receiving OSC datagram: %s", e)
+                        break
+                    self._enqueue(dgram)
+
+    def _enqueue(self, dgram: bytes) -> None:
+        try:
+            packet = OscPacket(dgram)
+        except ParseError:
+            self.logger.warning("Couldn't parse incoming OSC datagram")
+            return
+        for timed_message in packet.messages:
+            message = timed_message.message
+            try:
+                self.queue.put_nowait((message.address, tuple(message.params)))
+            except queue.Full:
+                self.dropped += 1
+                self.logger.debug("Receive queue is full, dropping message: %s", message.address)
+
+    def _handle_loop(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            try:
+                self.handler(*item)
+            except Exception:
+                self.logger.exception("Exception handling OSC message: %s", item[0])
+
+RECEIVE_BACKENDS = {
+    "selector": SelectorReceiver,
+    "threading": ThreadingReceiver,
+}
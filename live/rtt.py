@@ -0,0 +1,67 @@
+import threading
+
+class RTTEstimator:
+    """
+    Estimates the round-trip time of queries to each OSC address, following
+    the smoothed RTT and RTT variance approach used by TCP (RFC 6298), and
+    derives a retransmission timeout (RTO) from the measured latency.
+
+    Samples should only be taken from queries that were not retransmitted,
+    as a response to a retransmitted query is ambiguous (Karn's algorithm).
+    """
+
+    def __init__(self,
+                 initial_rto: float = 1.0,
+                 min_rto: float = 0.05,
+                 max_rto: float = 3.0,
+                 alpha: float = 1 / 8,
+                 beta: float = 1 / 4):
+        """
+        Args:
+            initial_rto: The timeout used for addresses with no RTT samples, in seconds.
+            min_rto: The minimum timeout, in seconds.
+            max_rto: The maximum timeout, in seconds.
+            alpha: The gain applied to each new sample of the smoothed RTT.
+            beta: The gain applied to each new sample of the RTT variance.
+        """
+        self.initial_rto = initial_rto
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.alpha = alpha
+        self.beta = beta
+
+        #------------------------------------------------------------------------
+        # Maps each address to a tuple of (srtt, rttvar), in seconds.
+        #------------------------------------------------------------------------
+        self.estimates: dict[str, tuple[float, float]] = {}
+        self.lock = threading.Lock()
+
+    def update(self, address: str, rtt: float) -> None:
+        """
+        Add a round-trip time sample for an address.
+        """
+        with self.lock:
+            if address not in self.estimates:
+                self.estimates[address] = (rtt, rtt / 2)
+            else:
+                srtt, rttvar = self.estimates[address]
+                rttvar = (1 - self.beta) * rttvar + self.beta * abs(srtt - rtt)
+                srtt = (1 - self.alpha) * srtt + self.alpha * rtt
+                self.estimates[address] = (srtt, rttvar)
+
+    def srtt(self, address: str):
+        """
+        Returns the smoothed round-trip time for an address, or None if it has no samples.
+        """
+        estimate = self.estimates.get(address)
+        return estimate[0] if estimate else None
+
+    def rto(self, address: str) -> float:
+        """
+        Returns the current retransmission timeout for an address, in seconds.
+        """
+        estimate = self.estimates.get(address)
+        if estimate is None:
+            return self.initial_rto
+        srtt, rttvar = estimate
+        return min(self.max_rto, max(self.min_rto, srtt + 4 * rttvar))
@@ -0,0 +1,608 @@
+import json
+import time
+import heapq
+import random
+import socket
+import logging
+import argparse
+import threading
+from typing import Optional
+
+from pythonosc.osc_packet import OscPacket, ParseError
+
+from live.osc import encode_message
+from live.receiver import MAX_DATAGRAM_SIZE
+
+#------------------------------------------------------------------------
+# Default values of song, track and clip properties.
+#------------------------------------------------------------------------
+SONG_DEFAULTS = {
+    "tempo": 120.0,
+    "metronome": 0,
+    "clip_trigger_quantization": 4,
+    "current_song_time": 0.0,
+    "arrangement_overdub": 0,
+    "loop": 0,
+    "is_playing": 0,
+    "is_ableton_link_enabled": 0,
+    "back_to_arranger": 0,
+    "can_undo": 0,
+    "can_redo": 0,
+}
+
+TRACK_DEFAULTS = {
+    "volume": 0.85,
+    "panning": 0.0,
+    "mute": 0,
+    "solo": 0,
+    "arm": 0,
+    "color_index": 0,
+    "playing_slot_index": -2,
+    "fired_slot_index": -1,
+    "has_midi_input": 1,
+    "has_audio_input": 0,
+}
+
+CLIP_DEFAULTS = {
+    "pitch_coarse": 0,
+    "is_playing": 0,
+    "is_midi_clip": 1,
+    "is_audio_clip": 0,
+    "file_path": "",
+}
+
+class AbletonOSCSimulator:
+    """
+    An in-process stand-in for Ableton Live running AbletonOSC, for testing and
+    benchmarking pylive without Live. Implements the song, track, clip_slot,
+    clip and device endpoints used by pylive, /live/song/get/track_data, and
+    the .json export used by Set.scan(mode="file"), for a generated set of
+    configurable size:
+
+        with AbletonOSCSimulator(num_tracks=100, num_scenes=16, latency=0.001):
+            set = live.Set(scan=True)
+
+    Responses can be delayed by a fixed latency plus random jitter, and
+    datagrams in either direction can be dropped at random to simulate packet
+    loss. For deterministic tests, drop_next and reorder_next drop or reorder
+    a given number of subsequent messages. Like Live, messages are handled one
+    at a time, in the order they are received.
+    """
+
+    def __init__(self,
+                 num_tracks: int = 8,
+                 num_scenes: int = 8,
+                 clip_density: float = 0.5,
+                 devices_per_track: int = 1,
+                 parameters_per_device: int = 8,
+                 tracks_per_group: Optional[int] = None,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 loss: float = 0.0,
+                 address: tuple = ("127.0.0.1", 11000),
+                 reply_port: int = 11001,
+                 structure_path: Optional[str] = None,
+                 seed: Optional[int] = 0):
+        """
+        Args:
+            num_tracks: The number of tracks in the generated set.
+            num_scenes: The number of scenes, and hence clip slots per track.
+            clip_density: The proportion of clip slots that contain a clip.
+            devices_per_track: The number of devices on each track.
+            parameters_per_device: The number of parameters of each device.
+            tracks_per_group: If specified, every (tracks_per_group + 1)th track is a group,
+                              containing the tracks that follow it.
+            latency: The delay before each response is sent, in seconds.
+            jitter: The maximum random delay added to the latency, in seconds.
+            loss: The probability that each incoming or outgoing datagram is dropped.
+            address: The (host, port) to listen on.
+            reply_port: The port on the sender's host to which responses are sent.
+            structure_path: The path to which /live/song/export/structure writes the set's
+                            structure. Defaults to the path read by Set.scan().
+            seed: The seed used to generate the set and simulate jitter and loss.
+        """
+        self.address = address
+        self.reply_port = reply_port
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.random = random.Random(seed)
+        self.logger = logging.getLogger(__name__)
+
+        if structure_path is None:
+            from live.classes.set import get_song_structure_path
+            structure_path = get_song_structure_path()
+        self.structure_path = structure_path
+
+        self.song = dict(SONG_DEFAULTS)
+        self.num_scenes = num_scenes
+        self.tracks = [self._create_track(track_index, clip_density, devices_per_track, parameters_per_device, tracks_per_group)
+                       for track_index in range(num_tracks)]
+
+        #------------------------------------------------------------------------
+        # Properties whose changes are sent to clients. Maps (getter address,
+        # indices) to the set of client addresses that are listening.
+        #------------------------------------------------------------------------
+        self.listeners: dict[tuple, set] = {}
+
+        #------------------------------------------------------------------------
+        # Number of messages received and handled.
+        #------------------------------------------------------------------------
+        self.received = 0
+
+        #------------------------------------------------------------------------
+        # Deterministic faults, for testing. drop_next is the number of
+        # subsequent get queries to ignore; reorder_next is the number of
+        # subsequent responses to hold back and then send in reverse order.
+        #------------------------------------------------------------------------
+        self.drop_next = 0
+        self.reorder_next = 0
+        self.reorder_buffer: list[tuple] = []
+
+        family = socket.AF_INET6 if ":" in address[0] else socket.AF_INET
+        self.socket = socket.socket(family, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self.socket.bind(address)
+        self.socket.settimeout(0.1)
+
+        self.outbox: list[tuple] = []
+        self.outbox_condition = threading.Condition()
+        self.outbox_sequence = 0
+        self.stop_event = threading.Event()
+        self.threads: list[threading.Thread] = []
+
+    def _create_track(self, track_index, clip_density, devices_per_track, parameters_per_device, tracks_per_group) -> dict:
+        is_foldable = False
+        group_track = None
+        if tracks_per_group is not None:
+            group_offset = track_index % (tracks_per_group + 1)
+            is_foldable = group_offset == 0
+            if not is_foldable:
+                group_track = track_index - group_offset
+
+        clips = [None] * self.num_scenes
+        if not is_foldable:
+            for clip_index in range(self.num_scenes):
+                if self.random.random() < clip_density:
+                    clips[clip_index] = self._create_clip("Clip %d-%d" % (track_index, clip_index), 4.0)
+
+        devices = []
+        if not is_foldable:
+            for device_index in range(devices_per_track):
+                devices.append({
+                    "name": "Device %d-%d" % (track_index, device_index),
+                    "class_name": "PluginDevice",
+                    "type": 1,
+                    "parameters": [{
+                        "name": "Parameter %d" % parameter_index,
+                        "value": 0.0,
+                        "min": 0.0,
+                        "max": 1.0,
+                        "is_quantized": False,
+                    } for parameter_index in range(parameters_per_device)],
+                })
+
+        return {
+            **TRACK_DEFAULTS,
+            "name": ("Group %d" if is_foldable else "Track %d") % track_index,
+            "is_foldable": is_foldable,
+            "group_track": group_track,
+            "sends": [0.0, 0.0],
+            "clips": clips,
+            "devices": devices,
+        }
+
+    def _create_clip(self, name: str, length: float) -> dict:
+        return {**CLIP_DEFAULTS, "name": name, "length": length, "notes": []}
+
+    #------------------------------------------------------------------------
+    # Lifecycle
+    #------------------------------------------------------------------------
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self) -> None:
+        self.stop_event.clear()
+        self.threads = [threading.Thread(target=self._receive_loop, daemon=True),
+                        threading.Thread(target=self._send_loop, daemon=True),
+                        threading.Thread(target=self._beat_loop, daemon=True)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        with self.outbox_condition:
+            self.outbox_condition.notify()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        self.socket.close()
+
+    #------------------------------------------------------------------------
+    # Transport
+    #------------------------------------------------------------------------
+
+    def _receive_loop(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                dgram, sender = self.socket.recvfrom(MAX_DATAGRAM_SIZE)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            if self.loss and self.random.random() < self.loss:
+                continue
+            try:
+                packet = OscPacket(dgram)
+            except ParseError:
+                self.logger.warning("Couldn't parse incoming OSC datagram")
+                continue
+            reply_address = (sender[0], self.reply_port)
+            for timed_message in packet.messages:
+                message = timed_message.message
+                self.received += 1
+                if self.drop_next > 0 and "/get/" in message.address:
+                    self.drop_next -= 1
+                    continue
+                try:
+                    self.handle(message.address, tuple(message.params), reply_address)
+                except Exception as e:
+                    self.logger.exception("Error handling %s", message.address)
+                    self.reply(reply_address, "/live/error", ("Error handling %s: %s" % (message.address, e),))
+
+    def reply(self, reply_address: tuple, address: str, args: tuple = ()) -> None:
+        """
+        Send a message to the client, after the simulated latency and jitter.
+        """
+        if self.loss and self.random.random() < self.loss:
+            return
+        dgram = encode_message(address, args)
+        if self.reorder_next > 0:
+            self.reorder_buffer.append((dgram, reply_address))
+            self.reorder_next -= 1
+            if self.reorder_next > 0:
+                return
+            held, self.reorder_buffer = self.reorder_buffer, []
+            for dgram, reply_address in reversed(held):
+                self._send(dgram, reply_address)
+            return
+        self._send(dgram, reply_address)
+
+    def _send(self, dgram: bytes, reply_address: tuple) -> None:
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay <= 0:
+            self.socket.sendto(dgram, reply_address)
+            return
+        with self.outbox_condition:
+            self.outbox_sequence += 1
+            heapq.heappush(self.outbox, (time.monotonic() + delay, self.outbox_sequence, dgram, reply_address))
+            self.outbox_condition.notify()
+
+    def _send_loop(self) -> None:
+        while not self.stop_event.is_set():
+            with self.outbox_condition:
+                if not self.outbox:
+                    self.outbox_condition.wait(0.1)
+                    continue
+                due_time = self.outbox[0][0]
+                wait_time = due_time - time.monotonic()
+                if wait_time > 0:
+                    self.outbox_condition.wait(wait_time)
+                    continue
+                _, _, dgram, reply_address = heapq.heappop(self.outbox)
+            try:
+                self.socket.sendto(dgram, reply_address)
+            except OSError as e:
+                self.logger.warning("Couldn't send OSC datagram: %s", e)
+
+    def _beat_loop(self) -> None:
+        beat = 0
+        while not self.stop_event.wait(60.0 / self.song["tempo"]):
+            if self.song["is_playing"]:
+                self._notify("/live/song/get/beat", (), beat)
+                beat += 1
+
+    #------------------------------------------------------------------------
+    # Listeners
+    #------------------------------------------------------------------------
+
+    def _notify(self, address: str, indices: tuple, value) -> None:
+        for reply_address in self.listeners.get((address, indices), ()):
+            self.reply(reply_address, address, indices + (value,))
+
+    def _set_property(self, namespace: str, target: dict, prop: str, indices: tuple, value) -> None:
+        target[prop] = value
+        self._notify("/live/%s/get/%s" % (namespace, prop), indices, value)
+
+    #------------------------------------------------------------------------
+    # Message handling
+    #------------------------------------------------------------------------
+
+    def handle(self, address: str, args: tuple, reply_address: tuple) -> None:
+        """
+        Handle a single incoming message, sending any response to reply_address.
+        """
+        parts = address.strip("/").split("/")
+        if len(parts) < 2 or parts[0] != "live":
+            raise ValueError("Unknown address")
+        namespace, action, rest = parts[1], parts[2] if len(parts) > 2 else None, parts[3:]
+        prop = "/".join(rest)
+
+        if namespace in ("song", "track", "clip", "clip_slot", "device") and action in ("start_listen", "stop_listen"):
+            indices = tuple(args)
+            getter = "/live/%s/get/%s" % (namespace, prop)
+            if action == "start_listen":
+                self.listeners.setdefault((getter, indices), set()).add(reply_address)
+                if getter != "/live/song/get/beat":
+                    self.handle(getter, indices, reply_address)
+            else:
+                self.listeners.get((getter, indices), set()).discard(reply_address)
+            return
+
+        handler = getattr(self, "_handle_%s" % namespace, None)
+        if handler is None:
+            raise ValueError("Unknown address")
+        rv = handler(action, prop, args)
+        if rv is not None:
+            self.reply(reply_address, address, rv)
+
+    def _handle_test(self, action, prop, args):
+        return ("ok",)
+
+    def _handle_application(self, action, prop, args):
+        if action == "get" and prop == "version":
+            return (12, 0)
+        elif action == "get" and prop == "average_process_usage":
+            return (0.0,)
+        raise ValueError("Unknown address")
+
+    def _handle_api(self, action, prop, args):
+        if action == "get":
+            return (self.song.get("log_level", "info"),)
+        elif action == "set":
+            self.song["log_level"] = args[0]
+
+    def _handle_undo(self, action, prop, args):
+        pass
+
+    def _handle_redo(self, action, prop, args):
+        pass
+
+    def _handle_song(self, action, prop, args):
+        if action == "get":
+            if prop == "num_tracks":
+                return (len(self.tracks),)
+            elif prop == "num_scenes":
+                return (self.num_scenes,)
+            elif prop == "track_data":
+                return self._track_data(*args)
+            return (self.song[prop],)
+        elif action == "set":
+            self._set_property("song", self.song, prop, (), args[0])
+        elif action in ("start_playing", "continue_playing"):
+            self._set_property("song", self.song, "is_playing", (), 1)
+        elif action == "stop_playing":
+            self._set_property("song", self.song, "is_playing", (), 0)
+        elif action == "stop_all_clips":
+            for track_index in range(len(self.tracks)):
+                self._stop_track(track_index)
+        elif action == "export" and prop == "structure":
+            self._export_structure()
+            return (1,)
+        elif action in ("create_audio_track", "create_midi_track"):
+            track_index = args[0] if args and args[0] >= 0 else len(self.tracks)
+            track = self._create_track(track_index, 0.0, 0, 0, None)
+            track["has_midi_input"] = int(action == "create_midi_track")
+            track["has_audio_input"] = int(action == "create_audio_track")
+            self.tracks.insert(track_index, track)
+            self._notify("/live/song/get/num_tracks", (), len(self.tracks))
+        elif action == "duplicate_track":
+            track = json.loads(json.dumps(self.tracks[args[0]]))
+            self.tracks.insert(args[0] + 1, track)
+            self._notify("/live/song/get/num_tracks", (), len(self.tracks))
+        elif action in ("delete_track", "delete_return_track"):
+            del self.tracks[args[0]]
+            self._notify("/live/song/get/num_tracks", (), len(self.tracks))
+        elif action == "create_scene":
+            scene_index = args[0] if args and args[0] >= 0 else self.num_scenes
+            for track in self.tracks:
+                track["clips"].insert(scene_index, None)
+            self.num_scenes += 1
+            self._notify("/live/song/get/num_scenes", (), self.num_scenes)
+        elif action == "delete_scene":
+            for track in self.tracks:
+                del track["clips"][args[0]]
+            self.num_scenes -= 1
+            self._notify("/live/song/get/num_scenes", (), self.num_scenes)
+        elif action in ("jump_to_prev_cue", "jump_to_next_cue"):
+            pass
+        else:
+            raise ValueError("Unknown address")
+
+    def _handle_track(self, action, prop, args):
+        track_index = args[0]
+        track = self.tracks[track_index]
+        if action == "get":
+            if prop == "send":
+                return (track_index, args[1], track["sends"][args[1]])
+            elif prop == "num_devices":
+                return (track_index, len(track["devices"]))
+            return (track_index, track[prop])
+        elif action == "set":
+            if prop == "send":
+                track["sends"][args[1]] = args[2]
+                self._notify("/live/track/get/send", (track_index, args[1]), args[2])
+            else:
+                self._set_property("track", track, prop, (track_index,), args[1])
+        elif action == "stop_all_clips":
+            self._stop_track(track_index)
+        else:
+            raise ValueError("Unknown address")
+
+    def _handle_clip_slot(self, action, prop, args):
+        track_index, clip_index = args[:2]
+        track = self.tracks[track_index]
+        if action == "fire":
+            #------------------------------------------------------------------------
+            # Firing a group's clip slot fires the corresponding clips of the
+            # tracks within the group.
+            #------------------------------------------------------------------------
+            for index, candidate in enumerate(self.tracks):
+                if index == track_index or candidate["group_track"] == track_index:
+                    clip = candidate["clips"][clip_index]
+                    if clip is not None:
+                        self._stop_track(index)
+                        self._set_property("clip", clip, "is_playing", (index, clip_index), 1)
+                        self._set_property("track", candidate, "playing_slot_index", (index,), clip_index)
+        elif action == "create_clip":
+            track["clips"][clip_index] = self._create_clip("", args[2])
+        elif action == "delete_clip":
+            track["clips"][clip_index] = None
+        elif action == "get" and prop == "has_clip":
+            return (track_index, clip_index, track["clips"][clip_index] is not None)
+        else:
+            raise ValueError("Unknown address")
+
+    def _handle_clip(self, action, prop, args):
+        track_index, clip_index = args[:2]
+        clip = self.tracks[track_index]["clips"][clip_index]
+        if clip is None:
+            raise ValueError("No clip in slot")
+        if action == "get":
+            if prop == "notes":
+                return (track_index, clip_index, *[value for note in clip["notes"] for value in note])
+            return (track_index, clip_index, clip[prop])
+        elif action == "set":
+            self._set_property("clip", clip, prop, (track_index, clip_index), args[2])
+        elif action == "fire":
+            self._handle_clip_slot("fire", "", args)
+        elif action == "stop":
+            self._stop_track(track_index)
+        elif action == "add" and prop == "notes":
+            notes = args[2:]
+            for index in range(0, len(notes), 5):
+                clip["notes"].append(tuple(notes[index:index + 5]))
+        else:
+            raise ValueError("Unknown address")
+
+    def _handle_device(self, action, prop, args):
+        track_index, device_index = args[:2]
+        device = self.tracks[track_index]["devices"][device_index]
+        parameters = device["parameters"]
+        if action == "get":
+            if prop == "num_parameters":
+                return (track_index, device_index, len(parameters))
+            elif prop.startswith("parameters/"):
+                name = prop.split("/")[1]
+                return (track_index, device_index, *[parameter[name] for parameter in parameters])
+            elif prop.startswith("parameter/"):
+                name = prop.split("/")[1]
+                parameter_index = args[2]
+                return (track_index, device_index, parameter_index, parameters[parameter_index][name])
+            return (track_index, device_index, device[prop])
+        elif action == "set":
+            if prop == "parameter/value":
+                parameter_index, value = args[2:4]
+                self._set_parameter(track_index, device_index, parameter_index, value)
+            elif prop == "parameters/value":
+                for parameter_index, value in enumerate(args[2:]):
+                    self._set_parameter(track_index, device_index, parameter_index, value)
+            else:
+                raise ValueError("Unknown address")
+        else:
+            raise ValueError("Unknown address")
+
+    def _set_parameter(self, track_index: int, device_index: int, parameter_index: int, value: float) -> None:
+        parameter = self.tracks[track_index]["devices"][device_index]["parameters"][parameter_index]
+        parameter["value"] = min(parameter["max"], max(parameter["min"], value))
+        self._notify("/live/device/get/parameter/value", (track_index, device_index, parameter_index), parameter["value"])
+
+    def _stop_track(self, track_index: int) -> None:
+        track = self.tracks[track_index]
+        for clip_index, clip in enumerate(track["clips"]):
+            if clip is not None and clip["is_playing"]:
+                self._set_property("clip", clip, "is_playing", (track_index, clip_index), 0)
+        if track["playing_slot_index"] != -2:
+            self._set_property("track", track, "playing_slot_index", (track_index,), -2)
+
+    def _track_data(self, track_index_min: int, track_index_max: int, *properties) -> tuple:
+        """
+        Returns the given properties of a range of tracks, in the format of
+        AbletonOSC's /live/song/get/track_data: for each track, for each property,
+        either a single value (track properties) or one value per clip slot or device.
+        """
+        rv = []
+        for track in self.tracks[track_index_min:track_index_max]:
+            for prop in properties:
+                obj, name = prop.split(".")
+                if obj == "track":
+                    if name == "num_devices":
+                        rv.append(len(track["devices"]))
+                    else:
+                        rv.append(track[name])
+                elif obj == "clip":
+                    rv.extend(clip[name] if clip is not None else None for clip in track["clips"])
+                elif obj == "clip_slot":
+                    if name != "has_clip":
+                        raise ValueError("Unknown clip_slot property: %s" % name)
+                    rv.extend(clip is not None for clip in track["clips"])
+                elif obj == "device":
+                    rv.extend(device[name] for device in track["devices"])
+                else:
+                    raise ValueError("Unknown track_data property: %s" % prop)
+        return tuple(rv)
+
+    def _export_structure(self) -> None:
+        tracks = []
+        for track_index, track in enumerate(self.tracks):
+            tracks.append({
+                "index": track_index,
+                "name": track["name"],
+                "is_foldable": track["is_foldable"],
+                "group_track": track["group_track"],
+                "clips": [{
+                    "index": clip_index,
+                    "name": clip["name"],
+                    "length": clip["length"],
+                } for clip_index, clip in enumerate(track["clips"]) if clip is not None],
+                "devices": [{
+                    "name": device["name"],
+                    "class_name": device["class_name"],
+                    "type": device["type"],
+                    "parameters": device["parameters"],
+                } for device in track["devices"]],
+            })
+        with open(self.structure_path, "w") as fd:
+            json.dump({"tracks": tracks}, fd)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate Ableton Live running AbletonOSC")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    parser.add_argument("--tracks", type=int, default=8, help="Number of tracks")
+    parser.add_argument("--scenes", type=int, default=8, help="Number of scenes")
+    parser.add_argument("--devices", type=int, default=1, help="Number of devices per track")
+    parser.add_argument("--parameters", type=int, default=8, help="Number of parameters per device")
+    parser.add_argument("--latency", type=float, default=0.0, help="Response latency, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random response jitter, in seconds")
+    parser.add_argument("--loss", type=float, default=0.0, help="Probability of dropping each datagram")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+
+    simulator = AbletonOSCSimulator(num_tracks=args.tracks,
+                                    num_scenes=args.scenes,
+                                    devices_per_track=args.devices,
+                                    parameters_per_device=args.parameters,
+                                    latency=args.latency,
+                                    jitter=args.jitter,
+                                    loss=args.loss)
+    simulator.start()
+    print("Simulating Live set with %d tracks on port %d..." % (args.tracks, simulator.address[1]))
+    try:
+        simulator.stop_event.wait()
+    except KeyboardInterrupt:
+        simulator.stop()
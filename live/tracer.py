@@ -0,0 +1,164 @@
+import json
+import time
+import struct
+import logging
+import threading
+from collections import deque
+
+from live.osc import encode_message
+from pythonosc.osc_message import OscMessage
+
+DIRECTION_OUT = "out"
+DIRECTION_IN = "in"
+
+#------------------------------------------------------------------------
+# Binary trace files begin with TRACE_MAGIC, followed by a series of
+# records, each of which is a TRACE_RECORD header (monotonic timestamp,
+# direction, message length) followed by the OSC-encoded message.
+#------------------------------------------------------------------------
+TRACE_MAGIC = b"PYLIVETRACE\x01"
+TRACE_RECORD = struct.Struct("<dBI")
+
+class WireTracer:
+    """
+    Records OSC traffic to and from Live in a fixed-size in-memory ring buffer,
+    which can be flushed in bulk to disk, optionally by a background thread.
+
+    Tracing is disabled by default. To enable it:
+
+        tracer = live.WireTracer()
+        live.Query().tracer = tracer
+        tracer.start_flushing("liveosc.ndjson")
+
+    Each record is a tuple of (monotonic timestamp, direction, address, args),
+    where direction is "out" for messages sent to Live and "in" for messages
+    received from Live. If the buffer fills before it is flushed, the oldest
+    records are discarded.
+    """
+
+    def __init__(self, capacity: int = 65536):
+        """
+        Args:
+            capacity: The maximum number of records to buffer.
+        """
+        self.records = deque(maxlen=capacity)
+        self.logger = logging.getLogger(__name__)
+
+        self.flush_thread = None
+        self.flush_stop_event = threading.Event()
+        self.flush_lock = threading.Lock()
+
+    def record(self, direction: str, address: str, args) -> None:
+        """
+        Append a record to the ring buffer. Safe to call from any thread.
+        """
+        self.records.append((time.monotonic(), direction, address, args))
+
+    def drain(self) -> list[tuple]:
+        """
+        Remove and return all buffered records, oldest first.
+        """
+        records = []
+        try:
+            while True:
+                records.append(self.records.popleft())
+        except IndexError:
+            pass
+        return records
+
+    def flush(self, path: str, format: str = "ndjson") -> int:
+        """
+        Append all buffered records to a file.
+
+        Args:
+            path: The path of the trace file.
+            format: Either "ndjson", for one JSON object per line, or "binary",
+                    for the compact OSC-encoded format read by read_trace().
+
+        Returns:
+            The number of records written.
+        """
+        if format not in ("ndjson", "binary"):
+            raise ValueError("Invalid value for 'format': %s" % format)
+
+        with self.flush_lock:
+            records = self.drain()
+            if not records:
+                return 0
+
+            if format == "ndjson":
+                with open(path, "a") as fd:
+                    for timestamp, direction, address, args in records:
+                        fd.write(json.dumps({"t": timestamp, "dir": direction, "address": address, "args": _args_list(args)},
+                                            default=repr) + "\n")
+            else:
+                with open(path, "ab") as fd:
+                    if fd.tell() == 0:
+                        fd.write(TRACE_MAGIC)
+                    for timestamp, direction, address, args in records:
+                        dgram = encode_message(address, args)
+                        fd.write(TRACE_RECORD.pack(timestamp, direction == DIRECTION_IN, len(dgram)))
+                        fd.write(dgram)
+
+        return len(records)
+
+    def start_flushing(self, path: str, interval: float = 1.0, format: str = "ndjson") -> None:
+        """
+        Start a background thread which flushes the buffer to a file periodically.
+
+        Args:
+            path: The path of the trace file.
+            interval: The interval between flushes, in seconds.
+            format: The trace file format, as accepted by flush().
+        """
+        if self.flush_thread is not None:
+            raise RuntimeError("WireTracer is already flushing")
+
+        def run():
+            while not self.flush_stop_event.wait(interval):
+                self._flush_safely(path, format)
+            self._flush_safely(path, format)
+
+        self.flush_stop_event.clear()
+        self.flush_thread = threading.Thread(target=run, daemon=True)
+        self.flush_thread.start()
+
+    def stop_flushing(self) -> None:
+        """
+        Stop the background flush thread, after writing any remaining records.
+        """
+        if self.flush_thread is not None:
+            self.flush_stop_event.set()
+            self.flush_thread.join()
+            self.flush_thread = None
+
+    def _flush_safely(self, path: str, format: str) -> None:
+        try:
+            self.flush(path, format)
+        except Exception as e:
+            self.logger.warning("Couldn't write wire trace to %s: %s", path, e)
+
+def read_trace(path: str):
+    """
+    Read a binary trace file written by WireTracer.flush().
+
+    Yields:
+        Records of (monotonic timestamp, direction, address, args).
+    """
+    with open(path, "rb") as fd:
+        if fd.read(len(TRACE_MAGIC)) != TRACE_MAGIC:
+            raise ValueError("Not a pylive trace file: %s" % path)
+        while True:
+            header = fd.read(TRACE_RECORD.size)
+            if len(header) < TRACE_RECORD.size:
+                return
+            timestamp, is_input, length = TRACE_RECORD.unpack(header)
+            message = OscMessage(fd.read(length))
+            yield (timestamp, DIRECTION_IN if is_input else DIRECTION_OUT, message.address, tuple(message.params))
+
+def _args_list(args) -> list:
+    if args is None:
+        return []
+    if isinstance(args, (list, tuple)):
+        return list(args)
+    return [args]
@@ -13,6 +13,10 @@ setup(
     url = 'https://github.com/ideoforms/pylive',
     packages = find_packages(),
     install_requires = ['python-osc'],
+    extras_require = {
+        'fast': ['orjson'],
+        'numpy': ['numpy'],
+    },
     keywords = ('sound', 'music', 'ableton', 'osc'),
     classifiers = [
         'Topic :: Multimedia :: Sound/Audio',
@@ -1,6 +1,8 @@
 import live
 import pytest
 
+from live.simulator import AbletonOSCSimulator
+
 def open_test_set():
     set = live.Set(scan=False)
     set.open("tests/Tests Project/Tests.als", wait_for_startup=True)
@@ -11,4 +13,20 @@ def open_test_set():
 @pytest.fixture(scope="module")
 def live_set():
     set = live.Set(scan=True)
-    return set
\ No newline at end of file
+    return set
+
+
+def start_simulator(port: int = 11000, reply_port: int = 11001, **kwargs):
+    """
+    Start an AbletonOSCSimulator with empty clip slots, whose responses are
+    delayed by up to 20ms of jitter. Each track's volume is distinct
+    (index / 128), so that mismatched responses are detected.
+    """
+    kwargs.setdefault("num_tracks", 128)
+    kwargs.setdefault("clip_density", 0.0)
+    kwargs.setdefault("jitter", 0.02)
+    simulator = AbletonOSCSimulator(address=("127.0.0.1", port), reply_port=reply_port, **kwargs)
+    for track_index, track in enumerate(simulator.tracks):
+        track["volume"] = track_index / 128
+    simulator.start()
+    return simulator
@@ -0,0 +1,69 @@
+""" Unit tests for PyLive """
+
+import pytest
+import asyncio
+
+import live
+from pythonosc.udp_client import SimpleUDPClient
+
+from .shared import start_simulator
+
+ADDRESS = ("127.0.0.1", 11100)
+LISTEN_PORT = 11101
+
+class MockTrack(live.Track):
+    def __init__(self, index):
+        self.index = index
+
+@pytest.fixture(scope="module")
+def simulator():
+    simulator = start_simulator(ADDRESS[1], LISTEN_PORT)
+    yield simulator
+    simulator.stop()
+
+def run(coroutine_fn):
+    async def wrapper():
+        async with live.AsyncQuery(ADDRESS, LISTEN_PORT) as live_async:
+            return await coroutine_fn(live_async)
+    return asyncio.run(wrapper())
+
+def test_async_query(simulator):
+    async def fn(live_async):
+        return await live_async.query("/live/track/get/volume", (3,))
+    assert run(fn) == [3, 3 / 128]
+
+def test_async_query_concurrent(simulator):
+    async def fn(live_async):
+        return await asyncio.gather(*(live_async.query("/live/track/get/volume", (index,)) for index in range(100)))
+    assert run(fn) == [[index, index / 128] for index in range(100)]
+
+def test_async_query_timeout(simulator):
+    async def fn(live_async):
+        with pytest.raises(live.LiveConnectionError):
+            await live_async.query("/live/clip/get/name", (0, 0), timeout=0.05)
+        assert live_async.pending_queries == {}
+    run(fn)
+
+def test_async_get_set(simulator):
+    async def fn(live_async):
+        track = MockTrack(5)
+        assert await live_async.get(track, "volume") == 5 / 128
+        await live_async.set(track, "volume", 0.25)
+        assert await live_async.get(track, "volume") == 0.25
+        with pytest.raises(ValueError):
+            await live_async.get(track, "is_midi_track")
+    run(fn)
+
+def test_async_subscribe(simulator):
+    async def fn(live_async):
+        subscription = live_async.subscribe("/live/song/get/beat")
+        client = SimpleUDPClient("127.0.0.1", LISTEN_PORT)
+        for beat in range(4):
+            client.send_message("/live/song/get/beat", beat)
+        beats = []
+        async for data in subscription:
+            beats.append(data[0])
+            if len(beats) == 4:
+                subscription.close()
+        return beats
+    assert run(fn) == [0, 1, 2, 3]
@@ -0,0 +1,95 @@
+""" Unit tests for PyLive """
+
+import pytest
+import time
+import threading
+
+import live
+from live.dispatch import AddressTrie, EventDispatcher, compile_segment_pattern
+
+from .shared import start_simulator
+
+@pytest.fixture(scope="module")
+def simulator():
+    simulator = start_simulator()
+    yield simulator
+    simulator.stop()
+
+def test_address_trie():
+    trie = AddressTrie()
+    trie.add("/live/song/get/beat", "beat")
+    trie.add("/live/track/get/*", "track")
+    trie.add("/live/track/get/{volume,panning}", "mix")
+    trie.add("/live/*/get/volume", "volume")
+
+    assert trie.match("/live/song/get/beat") == ["beat"]
+    assert sorted(trie.match("/live/track/get/volume")) == ["mix", "track", "volume"]
+    assert sorted(trie.match("/live/track/get/mute")) == ["track"]
+    assert trie.match("/live/clip/get/name") == []
+
+    assert trie.remove("/live/track/get/*", "track")
+    assert not trie.remove("/live/track/get/*", "track")
+    assert sorted(trie.match("/live/track/get/volume")) == ["mix", "volume"]
+
+def test_segment_pattern_character_class():
+    assert compile_segment_pattern("[a-c]").match("b")
+    assert not compile_segment_pattern("[a-c]").match("-")
+    assert not compile_segment_pattern("[!a-c]").match("b")
+    assert compile_segment_pattern("[!a-c]").match("d")
+    assert compile_segment_pattern("[a-]").match("-")
+    assert not compile_segment_pattern("[.]").match("x")
+
+    trie = AddressTrie()
+    trie.add("/live/track/get/[m-p]*", "m-p")
+    assert trie.match("/live/track/get/mute") == ["m-p"]
+    assert trie.match("/live/track/get/panning") == ["m-p"]
+    assert trie.match("/live/track/get/volume") == []
+
+def test_event_dispatcher_arity():
+    dispatcher = EventDispatcher()
+    results = []
+    dispatcher.subscribe("/live/song/get/beat", lambda: results.append(()))
+    dispatcher.subscribe("/live/song/get/beat", lambda beat: results.append(beat))
+    dispatcher.subscribe("/live/song/get/beat", lambda *args: results.append(args))
+    dispatcher.dispatch("/live/song/get/beat", (4, "extra"))
+    dispatcher.shutdown()
+    assert sorted(results, key=str) == sorted([(), 4, (4, "extra")], key=str)
+
+def test_event_dispatcher_ordering():
+    dispatcher = EventDispatcher(max_workers=4)
+    results = []
+    dispatcher.subscribe("/live/song/get/beat", lambda beat: results.append(beat))
+    for beat in range(100):
+        dispatcher.dispatch("/live/song/get/beat", (beat,))
+    dispatcher.shutdown()
+    assert results == list(range(100))
+
+def test_slow_handler_does_not_block_queries(simulator):
+    query = live.Query()
+    release = threading.Event()
+    subscription = query.add_handler("/live/track/get/*", lambda *args: release.wait(2.0))
+    try:
+        t0 = time.monotonic()
+        for index in range(8):
+            assert live.query("/live/track/get/volume", (index,)) == [index, index / 128]
+        assert time.monotonic() - t0 < 1.0
+    finally:
+        release.set()
+        query.remove_handler("/live/track/get/*", subscription)
+
+def test_beat_callback(simulator):
+    query = live.Query()
+    beats = []
+    event = threading.Event()
+
+    def callback(beat):
+        beats.append(beat)
+        event.set()
+
+    query.beat_callback = callback
+    try:
+        query.handler("/live/song/get/beat", (7,))
+        assert event.wait(1.0)
+        assert beats == [7]
+    finally:
+        query.beat_callback = None
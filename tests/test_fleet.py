@@ -0,0 +1,56 @@
+""" Unit tests for PyLive """
+
+import pytest
+
+import live
+
+from .shared import start_simulator
+
+ENDPOINTS = [
+    (("127.0.0.1", 11300), 11301),
+    (("127.0.0.1", 11310), 11311),
+]
+
+@pytest.fixture(scope="module")
+def simulators():
+    simulators = [start_simulator(address[1], listen_port) for address, listen_port in ENDPOINTS]
+    yield simulators
+    for simulator in simulators:
+        simulator.stop()
+
+@pytest.fixture(scope="module")
+def fleet(simulators):
+    fleet = live.Fleet.from_endpoints(ENDPOINTS)
+    yield fleet
+    fleet.stop()
+
+def test_query_per_endpoint(fleet):
+    address, listen_port = ENDPOINTS[0]
+    assert live.Query(address=address, listen_port=listen_port) is fleet.queries[0]
+    assert live.Query(address, listen_port) is fleet.queries[0]
+    assert fleet.queries[0] is not fleet.queries[1]
+    assert fleet.queries[0] is not live.Query()
+
+def test_set_injected_query(fleet):
+    set_a = live.Set(live=fleet.queries[0])
+    set_b = live.Set(live=fleet.queries[1])
+    set_a.tempo = 100.0
+    set_b.tempo = 140.0
+    assert set_a.tempo == 100.0
+    assert set_b.tempo == 140.0
+
+    track = live.Track(set_b, 2, "Track")
+    assert track.live is fleet.queries[1]
+    assert live.Clip(track, 0, "Clip").live is fleet.queries[1]
+
+def test_fleet_query(fleet):
+    fleet.cmd("/live/track/set/volume", (1, 0.5))
+    assert fleet.query("/live/track/get/volume", (1,)) == [[1, 0.5], [1, 0.5]]
+    assert fleet.query_many([("/live/track/get/volume", (2,)), ("/live/track/get/volume", (3,))]) == \
+        [[[2, 2 / 128], [3, 3 / 128]], [[2, 2 / 128], [3, 3 / 128]]]
+
+def test_fleet_query_timeout(fleet):
+    with pytest.raises(live.LiveConnectionError):
+        fleet.query("/live/clip/get/name", (0, 0), timeout=0.05)
+    results = fleet.query("/live/clip/get/name", (0, 0), timeout=0.05, return_exceptions=True)
+    assert all(isinstance(result, live.LiveConnectionError) for result in results)
@@ -21,7 +21,7 @@ def test_group_properties(group):
     assert group.is_group
 
 def test_group_get_clips(group):
-    assert len(group.clips) == 1024
+    assert len(group.clips) == group.set.num_scenes
 
 def test_group_get_active_clips(group):
     assert len(group.active_clips) == 4
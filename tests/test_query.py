@@ -0,0 +1,383 @@
+""" Unit tests for PyLive """
+
+import pytest
+import time
+import threading
+
+import live
+from live.query import query_key
+
+from .shared import start_simulator
+
+@pytest.fixture(scope="module")
+def simulator():
+    simulator = start_simulator(parameters_per_device=16)
+    yield simulator
+    simulator.stop()
+
+def test_query_key():
+    assert query_key("/live/song/get/tempo", ()) == ("/live/song/get/tempo", ())
+    assert query_key("/live/track/get/volume", (3, 0.5)) == ("/live/track/get/volume", (3,))
+    assert query_key("/live/clip/get/name", (1, 2, "foo")) == ("/live/clip/get/name", (1, 2))
+    assert query_key("/live/track/get/send", (1, 2)) == ("/live/track/get/send", (1, 2))
+    assert query_key("/live/device/get/parameter/value", (1, 2, 3)) == ("/live/device/get/parameter/value", (1, 2, 3))
+    assert query_key("/live/device/get/parameters/value", (1, 2)) == ("/live/device/get/parameters/value", (1, 2))
+    assert query_key("/live/song/get/track_data", (0, 4, "track.name")) == ("/live/song/get/track_data", ())
+
+def test_query(simulator):
+    assert live.query("/live/song/get/tempo") == [120.0]
+    assert live.query("/live/track/get/volume", (3,)) == [3, 3 / 128]
+
+def test_query_concurrent(simulator):
+    results = {}
+
+    def worker(track_index):
+        results[track_index] = live.query("/live/track/get/volume", (track_index,))
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(32)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {index: [index, index / 128] for index in range(32)}
+    assert live.Query().pending_queries == {}
+
+def test_query_timeout(simulator):
+    with pytest.raises(live.LiveConnectionError):
+        live.query("/live/clip/get/name", (0, 0), timeout=0.05)
+    assert live.Query().pending_queries == {}
+
+def test_query_many(simulator):
+    queries = [("/live/track/get/volume", (index,)) for index in range(100)]
+    queries.append(("/live/song/get/tempo", ()))
+    t0 = time.monotonic()
+    results = live.query_many(queries)
+    assert results[:100] == [[index, index / 128] for index in range(100)]
+    assert results[100] == [120.0]
+    assert time.monotonic() - t0 < 1.0
+    assert live.Query().pending_queries == {}
+
+def test_query_many_reordered(simulator):
+    parameters = simulator.tracks[0]["devices"][0]["parameters"]
+    for parameter_index, parameter in enumerate(parameters):
+        parameter["value"] = parameter_index / 16
+    simulator.reorder_next = len(parameters)
+    queries = [("/live/device/get/parameter/value", (0, 0, index)) for index in range(len(parameters))]
+    assert live.query_many(queries) == [[0, 0, index, index / 16] for index in range(len(parameters))]
+    assert live.Query().pending_queries == {}
+
+def test_query_many_timeout(simulator):
+    with pytest.raises(live.LiveConnectionError):
+        live.query_many([("/live/track/get/volume", (0,)), ("/live/clip/get/name", (0, 0))], timeout=0.1)
+    assert live.Query().pending_queries == {}
+
+def test_rtt_estimator():
+    from live.rtt import RTTEstimator
+    estimator = RTTEstimator(initial_rto=1.0, min_rto=0.01, max_rto=3.0)
+    assert estimator.rto("/live/song/get/tempo") == 1.0
+    for _ in range(20):
+        estimator.update("/live/song/get/tempo", 0.005)
+    assert estimator.srtt("/live/song/get/tempo") == pytest.approx(0.005)
+    assert estimator.rto("/live/song/get/tempo") < 0.02
+    assert estimator.rto("/live/song/get/tempo") >= 0.01
+    assert estimator.srtt("/live/song/get/tempo_other") is None
+
+def test_query_retransmit(simulator):
+    query = live.Query()
+    for _ in range(5):
+        query.query("/live/song/get/tempo")
+    assert query.rtt.srtt("/live/song/get/tempo") is not None
+
+    simulator.drop_next = 1
+    t0 = time.monotonic()
+    assert query.query("/live/song/get/tempo") == [120.0]
+    assert time.monotonic() - t0 < query.osc_timeout / 2
+    assert query.pending_queries == {}
+
+def test_query_retransmit_budget(simulator):
+    query = live.Query()
+    max_retries = query.max_retries
+    query.max_retries = 0
+    simulator.drop_next = 1
+    try:
+        with pytest.raises(live.LiveConnectionError):
+            query.query("/live/song/get/tempo", timeout=0.2)
+    finally:
+        query.max_retries = max_retries
+        simulator.drop_next = 0
+    assert query.pending_queries == {}
+
+def test_query_retransmit_ambiguous(simulator):
+    #------------------------------------------------------------------------
+    # The response to a clip notes query echoes the clip's indices but not
+    # the requested range, so a surplus response could be mismatched: not
+    # retransmitted.
+    #------------------------------------------------------------------------
+    query = live.Query()
+    query.start_metrics()
+    simulator.drop_next = 1
+    try:
+        with pytest.raises(live.LiveConnectionError):
+            query.query("/live/clip/get/notes", (0, 0, 0, 128, 0.0, 4.0), timeout=0.3)
+    finally:
+        simulator.drop_next = 0
+    assert query.stats()["addresses"]["/live/clip/get/notes"]["retries"] == 0
+
+    #------------------------------------------------------------------------
+    # The response to a track send query echoes both the track and send
+    # indices, so it can be retransmitted.
+    #------------------------------------------------------------------------
+    simulator.drop_next = 1
+    assert query.query("/live/track/get/send", (0, 1)) == [0, 1, 0.0]
+    assert query.stats()["addresses"]["/live/track/get/send"]["retries"] == 1
+
+def test_latency_histogram():
+    from live.metrics import LatencyHistogram
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+    for value in range(1, 101):
+        histogram.record(value / 1000)
+    assert histogram.percentile(50) == pytest.approx(0.050, rel=0.2)
+    assert histogram.percentile(99) == pytest.approx(0.099, rel=0.2)
+    assert histogram.percentile(100) == 0.1
+    assert histogram.summary()["mean"] == pytest.approx(0.0505)
+
+def test_query_stats(simulator, tmp_path):
+    query = live.Query()
+    query.start_metrics().reset()
+    for index in range(10):
+        query.query("/live/track/get/volume", (index,))
+    with pytest.raises(live.LiveConnectionError):
+        query.query("/live/clip/get/name", (0, 0), timeout=0.05)
+
+    stats = query.stats()
+    assert stats["receive_queue_depth"] >= 0
+    volume = stats["addresses"]["/live/track/get/volume"]
+    assert volume["queries"] == 10
+    assert volume["messages_sent"] == 10
+    assert volume["messages_received"] == 10
+    assert volume["bytes_sent"] == 10 * len(live.osc.encode_message("/live/track/get/volume", (0,)))
+    assert volume["bytes_received"] == 10 * len(live.osc.encode_message("/live/track/get/volume", (0, 0)))
+    assert volume["rtt"]["count"] == 10
+    assert volume["rtt"]["p50"] <= volume["rtt"]["p99"] <= volume["rtt"]["max"]
+    assert stats["addresses"]["/live/clip/get/name"]["timeouts"] == 1
+
+    path = str(tmp_path / "metrics.prom")
+    query.start_exporting_metrics(path, interval=60.0)
+    query.stop_exporting_metrics()
+    with open(path) as fd:
+        exposition = fd.read()
+    assert 'pylive_queries_total{address="/live/track/get/volume"} 10' in exposition
+    assert 'pylive_rtt_seconds{address="/live/track/get/volume",quantile="0.99"}' in exposition
+
+def test_property_cache():
+    cache = live.PropertyCache(max_size=2)
+    volume = "/live/track/get/volume"
+    value, version = cache.lookup(volume, (0,))
+    assert value is live.MISSING
+    cache.store(volume, (0,), 0.5, version)
+    assert cache.lookup(volume, (0,))[0] == 0.5
+
+    #------------------------------------------------------------------------
+    # A value queried while a write was in progress is not cached.
+    #------------------------------------------------------------------------
+    value, version = cache.lookup(volume, (1,))
+    cache.write(volume, (0,), 0.6)
+    cache.store(volume, (1,), 0.7, version)
+    assert cache.lookup(volume, (1,))[0] is live.MISSING
+    assert cache.lookup(volume, (0,))[0] is live.MISSING
+
+    #------------------------------------------------------------------------
+    # TTL values are written through, and expire.
+    #------------------------------------------------------------------------
+    cache.set_policy(volume, live.CACHE_TTL, ttl=0.05)
+    cache.write(volume, (0,), 0.6)
+    assert cache.lookup(volume, (0,))[0] == 0.6
+    time.sleep(0.06)
+    assert cache.lookup(volume, (0,))[0] is live.MISSING
+
+    #------------------------------------------------------------------------
+    # Least-recently-used values are evicted.
+    #------------------------------------------------------------------------
+    for index in range(3):
+        cache.store("/live/track/get/mute", (index,), 0, cache.version)
+    assert len(cache) == 2
+    assert cache.lookup("/live/track/get/mute", (0,))[0] is live.MISSING
+    cache.store("/live/track/get/playing_slot_index", (0,), 1, cache.version)
+    assert cache.lookup("/live/track/get/playing_slot_index", (0,))[0] is live.MISSING
+
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 2
+    assert stats["evictions"] == 1
+
+    #------------------------------------------------------------------------
+    # All values of an object can be invalidated together.
+    #------------------------------------------------------------------------
+    cache.invalidate(indices=(2,))
+    assert cache.lookup("/live/track/get/mute", (2,))[0] is live.MISSING
+    assert cache.lookup("/live/track/get/mute", (1,))[0] == 0
+
+def test_query_deferred_start():
+    import socket
+    query = live.Query(("127.0.0.1", 11500), 11501)
+    assert query.receiver is None
+    assert query.osc_client is None
+    assert query.metrics is None
+
+    #------------------------------------------------------------------------
+    # The listen port is not bound until it is needed.
+    #------------------------------------------------------------------------
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 11501))
+    sock.close()
+
+    try:
+        query.add_handler("/live/song/get/tempo", lambda tempo: None)
+        assert query.receiver is not None
+    finally:
+        query.stop()
+
+def test_query_shared_per_endpoint():
+    query = live.Query(("127.0.0.1", 11510), 11511, receive_backend="threading")
+    try:
+        assert live.Query(("127.0.0.1", 11510), 11511) is query
+        assert live.Query(("127.0.0.1", 11510), 11511, "threading") is query
+        with pytest.raises(ValueError, match="127.0.0.1:11511"):
+            live.Query(("127.0.0.1", 11510), 11511, receive_backend="selector")
+
+        #------------------------------------------------------------------------
+        # A backend given by class is equivalent to one given by name, before
+        # and after the receiver is started.
+        #------------------------------------------------------------------------
+        from live.receiver import ThreadingReceiver
+        assert live.Query(("127.0.0.1", 11510), 11511, receive_backend=ThreadingReceiver) is query
+        query.listen()
+        assert live.Query(("127.0.0.1", 11510), 11511, receive_backend=ThreadingReceiver) is query
+        assert live.Query(("127.0.0.1", 11510), 11511, receive_backend="threading") is query
+    finally:
+        query.stop()
+
+def test_import_lazy():
+    import sys
+    import subprocess
+    code = "import sys, live; " \
+           "assert 'live.classes' not in sys.modules and 'asyncio' not in sys.modules; " \
+           "assert 'inspect' not in sys.modules; " \
+           "live.Set; live.AsyncQuery; " \
+           "assert 'live.classes' in sys.modules and 'live.async_query' in sys.modules; " \
+           "assert callable(live.query) and live.Group is live.classes.Group"
+    subprocess.check_call([sys.executable, "-c", code])
+
+    code = "import sys, live; " \
+           "live.Fleet; live.WireTracer; " \
+           "assert 'live.classes' not in sys.modules and 'asyncio' not in sys.modules; " \
+           "assert not hasattr(live, 'Nonexistent')"
+    subprocess.check_call([sys.executable, "-c", code])
+
+def test_query_tracer(simulator, tmp_path):
+    from live.tracer import read_trace
+    query = live.Query()
+    query.tracer = live.WireTracer(capacity=4)
+    try:
+        live.query("/live/track/get/volume", (2,))
+        live.cmd("/live/song/set/tempo", (110.0,))
+    finally:
+        query.tracer, tracer = None, query.tracer
+
+    records = tracer.drain()
+    assert [record[1:] for record in records] == [("out", "/live/track/get/volume", (2,)),
+                                                 ("in", "/live/track/get/volume", (2, 2 / 128)),
+                                                 ("out", "/live/song/set/tempo", (110.0,))]
+
+    binary_path = tmp_path / "trace.bin"
+    tracer.records.extend(records)
+    assert tracer.flush(binary_path, format="binary") == 3
+    assert [record[1:] for record in read_trace(binary_path)] == [record[1:] for record in records]
+
+    ndjson_path = tmp_path / "trace.ndjson"
+    tracer.records.extend(records)
+    assert tracer.flush(ndjson_path) == 3
+    assert len(ndjson_path.read_text().splitlines()) == 3
+
+def test_bundle_batcher():
+    from live.osc import BundleBatcher, encode_message
+    from pythonosc.osc_bundle import OscBundle
+    from pythonosc.osc_message import OscMessage
+
+    sent = []
+    batcher = BundleBatcher(sent.append, mtu=256)
+    for index in range(20):
+        batcher.add(encode_message("/live/track/set/volume", (index, 0.5)))
+    batcher.flush()
+
+    assert all(len(dgram) <= 256 for dgram in sent)
+    assert len(sent) < 20
+    messages = []
+    for dgram in sent:
+        if OscBundle.dgram_is_bundle(dgram):
+            messages.extend(OscBundle(dgram))
+        else:
+            messages.append(OscMessage(dgram))
+    assert [message.params[0] for message in messages] == list(range(20))
+
+def test_query_batch(simulator):
+    query = live.Query()
+    with query.batch():
+        for index in range(20):
+            live.cmd("/live/track/set/panning", (index, 0.25))
+        assert len(query.batcher.queue) > 0
+    assert query.batcher is None
+    results = live.query_many([("/live/track/get/panning", (index,)) for index in range(20)])
+    assert results == [[index, 0.25] for index in range(20)]
+
+def test_command_coalescer():
+    from live.coalescer import CommandCoalescer
+
+    sent = []
+    coalescer = CommandCoalescer(lambda msg, args: sent.append((msg, args)), interval=60.0)
+    for value in range(100):
+        coalescer.add("/live/song/set/tempo", (float(value),))
+        coalescer.add("/live/track/set/volume", (0, value / 100))
+        coalescer.add("/live/track/set/volume", (1, value / 200))
+    assert coalescer.drain(limit=2) == 2
+    assert sent == [("/live/song/set/tempo", (99.0,)), ("/live/track/set/volume", (0, 0.99))]
+    coalescer.stop()
+    assert sent[2:] == [("/live/track/set/volume", (1, 0.495))]
+
+def test_command_coalescer_discard():
+    from live.coalescer import CommandCoalescer
+
+    sent = []
+    coalescer = CommandCoalescer(lambda msg, args: sent.append((msg, args)), interval=60.0)
+    coalescer.add("/live/track/set/volume", (0, 0.5))
+    coalescer.add("/live/track/set/volume", (1, 0.5))
+    coalescer.discard("/live/track/set/volume", (0,))
+    coalescer.stop()
+    assert sent == [("/live/track/set/volume", (1, 0.5))]
+
+def test_query_coalescing(simulator):
+    query = live.Query()
+    query.start_coalescing(interval=60.0)
+    try:
+        for value in range(100):
+            live.cmd_latest("/live/track/set/mute", (7, value))
+        assert len(query.coalescer.pending) == 1
+        assert live.query("/live/track/get/mute", (7,)) == [7, 99]
+    finally:
+        query.stop_coalescing()
+
+@pytest.mark.parametrize("args", [(), (1,), (1, 0.5), (True, False, None, 3), (1, "name"), (2 ** 40,), [1, 2], 5])
+def test_message_template(args):
+    from live.osc import MessageTemplate, encode_message
+    from pythonosc.osc_message_builder import OscMessageBuilder
+
+    template = MessageTemplate("/live/track/set/volume")
+    assert template == "/live/track/set/volume"
+
+    builder = OscMessageBuilder("/live/track/set/volume")
+    for arg in (args if isinstance(args, (tuple, list)) else (args,)):
+        builder.add_arg(arg)
+    assert template.pack(args) == builder.build().dgram
+    assert encode_message(template, args) == encode_message("/live/track/set/volume", args)
@@ -0,0 +1,74 @@
+""" Unit tests for PyLive """
+
+import pytest
+import time
+import threading
+
+from live.receiver import SelectorReceiver, ThreadingReceiver
+from pythonosc.udp_client import SimpleUDPClient
+
+@pytest.mark.parametrize("receiver_class, count", [(SelectorReceiver, 500), (ThreadingReceiver, 20)])
+def test_receiver(receiver_class, count):
+    received = []
+    lock = threading.Lock()
+
+    def handler(address, args):
+        with lock:
+            received.append((address, args))
+
+    receiver = receiver_class(("127.0.0.1", 11201), handler)
+    receiver.start()
+    try:
+        client = SimpleUDPClient("127.0.0.1", 11201)
+        for index in range(count):
+            client.send_message("/live/track/get/volume", (index, 0.5))
+            if index % 50 == 0:
+                time.sleep(0.001)
+
+        deadline = time.monotonic() + 2.0
+        while len(received) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        receiver.stop()
+
+    assert sorted(args[0] for address, args in received) == list(range(count))
+    assert receiver.queue_depth == 0
+
+def test_selector_receiver_ordering():
+    received = []
+    receiver = SelectorReceiver(("127.0.0.1", 11202), lambda address, args: received.append(args[0]))
+    receiver.start()
+    try:
+        client = SimpleUDPClient("127.0.0.1", 11202)
+        for index in range(200):
+            client.send_message("/live/song/get/beat", index)
+        deadline = time.monotonic() + 2.0
+        while len(received) < 200 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        receiver.stop()
+    assert received == list(range(200))
+
+def test_selector_receiver_stop_when_full():
+    #------------------------------------------------------------------------
+    # A handler which stops the receiver while the queue is full must not
+    # block on the queue.
+    #------------------------------------------------------------------------
+    full = threading.Event()
+    stopped = threading.Event()
+
+    def handler(address, args):
+        if full.wait(2.0):
+            receiver.stop()
+            stopped.set()
+
+    receiver = SelectorReceiver(("127.0.0.1", 11203), handler, queue_size=1)
+    receiver.start()
+    client = SimpleUDPClient("127.0.0.1", 11203)
+    for index in range(3):
+        client.send_message("/live/song/get/beat", index)
+    deadline = time.monotonic() + 2.0
+    while receiver.queue_depth < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    full.set()
+    assert stopped.wait(2.0)
@@ -0,0 +1,448 @@
+""" Unit tests for PyLive """
+
+import pytest
+import time
+import pickle
+
+import live
+from live.simulator import AbletonOSCSimulator
+
+@pytest.fixture(scope="module")
+def simulator(tmp_path_factory):
+    structure_path = str(tmp_path_factory.mktemp("simulator") / "abletonosc-song-structure.json")
+    with AbletonOSCSimulator(num_tracks=12, num_scenes=4, tracks_per_group=3, structure_path=structure_path) as simulator:
+        yield simulator
+
+@pytest.fixture
+def set(simulator, monkeypatch) -> live.Set:
+    monkeypatch.setattr(live.classes.set, "get_song_structure_path", lambda: simulator.structure_path)
+    set = live.Set()
+    set.live.start_metrics()
+    set.scan(mode="network")
+    return set
+
+def describe(set: live.Set) -> list:
+    return [(track.name, track.is_group, track.group.index if track.group else None,
+             [(clip.index, clip.name, clip.length) for clip in track.active_clips],
+             [device.name for device in track.devices]) for track in set.tracks]
+
+def test_simulator_scan(simulator, set):
+    assert len(set.tracks) == 12
+    assert len(set.groups) == 3
+    assert set.tracks[0].is_group
+    assert set.tracks[1].group is set.tracks[0]
+    assert set.tracks[1].devices[0].name == "Device 1-0"
+
+    network_structure = describe(set)
+    set.scan(mode="file")
+    assert describe(set) == network_structure
+
+def test_simulator_scan_file(simulator, set):
+    set.scan(mode="file")
+    tracks = list(set.tracks)
+    set.scan(mode="file")
+    assert set.tracks == tracks
+
+    parameter_data = simulator.tracks[1]["devices"][0]["parameters"]
+    parameters = set.tracks[1].devices[0].parameters
+    assert [(parameter.name, parameter.value, parameter.min, parameter.max) for parameter in parameters] == \
+           [(data["name"], data["value"], data["min"], data["max"]) for data in parameter_data]
+    assert parameters[0].device is set.tracks[1].devices[0]
+
+    simulator.tracks[2]["name"] = "Renamed"
+    try:
+        set.scan(mode="file")
+        assert set.tracks[2].name == "Renamed"
+        assert set.tracks[1] is not tracks[1]
+    finally:
+        simulator.tracks[2]["name"] = tracks[2].name
+
+def test_simulator_scan_blocks(simulator, set):
+    def track_data_queries():
+        return set.live.stats()["addresses"]["/live/song/get/track_data"]["queries"]
+
+    structure = describe(set)
+    query_count = track_data_queries()
+    set.max_tracks_per_query = 5
+    set.scan(mode="network")
+    assert describe(set) == structure
+    assert [track.index for track in set.tracks] == list(range(12))
+    assert track_data_queries() == query_count + 3 * 3
+
+def test_simulator_clip_slots(simulator, set):
+    track = set.tracks[1]
+    assert len(track.clips) == 4
+    assert track.active_clips == [clip for clip in track.clips if clip is not None]
+
+    empty_slot = track.clips.index(None)
+    track.create_clip(empty_slot, 4.0)
+    try:
+        assert track.clips[empty_slot] in track.active_clips
+    finally:
+        track.delete_clip(empty_slot)
+    assert track.clips[empty_slot] is None
+    assert track.active_clips == [clip for clip in track.clips if clip is not None]
+
+    set.create_scene(0)
+    try:
+        assert len(track.clips) == 5
+        assert all(clip.index == index for index, clip in enumerate(track.clips) if clip is not None)
+    finally:
+        set.delete_scene(0)
+    assert len(track.clips) == 4
+    assert all(clip.index == index for index, clip in enumerate(track.clips) if clip is not None)
+
+def test_simulator_properties(simulator, set):
+    set.tempo = 100.0
+    assert set.tempo == 100.0
+
+    track = set.tracks[1]
+    track.volume = 0.5
+    assert track.volume == 0.5
+    assert track.is_midi_track
+
+    clip = track.active_clips[0]
+    clip.play()
+    assert track.playing_slot_index == clip.index
+    assert clip.is_playing
+    clip.stop()
+    assert track.playing_slot_index == -2
+
+def test_simulator_device_parameters(simulator, set):
+    set.max_devices_per_query = 5
+    set._scan_via_network(scan_device_parameters=True)
+    for track in set.tracks:
+        for device in track.devices:
+            assert [parameter.name for parameter in device.parameters] == \
+                   [parameter["name"] for parameter in simulator.tracks[track.index]["devices"][device.index]["parameters"]]
+    parameter = set.tracks[1].devices[0].parameters[2]
+    assert parameter.name == "Parameter 2"
+    parameter.value = 0.25
+    assert parameter.value == 0.25
+
+def test_simulator_pickle(simulator, set):
+    set._scan_via_network(scan_device_parameters=True)
+    parameter = set.tracks[1].devices[0].parameters[2]
+    assert not hasattr(parameter, "__dict__")
+
+    restored = pickle.loads(pickle.dumps(set))
+    assert describe(restored) == describe(set)
+    restored_parameter = restored.tracks[1].devices[0].parameters[2]
+    assert (restored_parameter.name, restored_parameter.min, restored_parameter.max) == \
+           (parameter.name, parameter.min, parameter.max)
+    assert restored_parameter.device is restored.tracks[1].devices[0]
+    assert restored.tracks[1].group is restored.tracks[0]
+
+def test_simulator_to_arrays(simulator, set):
+    np = pytest.importorskip("numpy")
+    set.scan(mode="file")
+    arrays = set.to_arrays()
+    parameters = arrays["parameters"]
+    assert set.tracks[1]._device_data is not None
+
+    expected = [(track_index, device_index, parameter_index, parameter["value"], parameter["min"], parameter["max"])
+                for track_index, track in enumerate(simulator.tracks)
+                for device_index, device in enumerate(track["devices"])
+                for parameter_index, parameter in enumerate(device["parameters"])]
+    assert list(zip(*[parameters[name].tolist() for name in ("track", "device", "index", "value", "min", "max")])) == expected
+    assert parameters["is_quantized"].dtype == np.bool_
+
+    clips = arrays["clips"]
+    assert list(zip(clips["track"].tolist(), clips["index"].tolist(), clips["length"].tolist())) == \
+           [(track.index, clip.index, clip.length) for track in set.tracks for clip in track.active_clips]
+
+    #--------------------------------------------------------------------------------
+    # The same snapshot is produced once Device and Parameter objects exist.
+    #--------------------------------------------------------------------------------
+    set.tracks[1].devices[0].parameters
+    assert set.to_arrays()["parameters"]["value"].tolist() == parameters["value"].tolist()
+
+def test_simulator_set_parameters(simulator, set):
+    def messages_sent(address):
+        return set.live.stats()["addresses"].get(address, {}).get("messages_sent", 0)
+
+    set.scan(mode="file")
+    device = set.tracks[1].devices[0]
+    simulator_parameters = simulator.tracks[1]["devices"][0]["parameters"]
+    values = [index / 10 for index in range(len(device.parameters))]
+    device.set_parameters(values)
+    time.sleep(0.05)
+    assert [parameter["value"] for parameter in simulator_parameters] == pytest.approx(values)
+    assert device.parameters[3].value == pytest.approx(0.3)
+
+    device.set_parameters({0: 0.5, "Parameter 2": 0.75})
+    time.sleep(0.05)
+    assert simulator_parameters[0]["value"] == 0.5
+    assert simulator_parameters[2]["value"] == 0.75
+    assert simulator_parameters[1]["value"] == pytest.approx(0.1)
+
+    #--------------------------------------------------------------------------------
+    # Randomising all of a device's parameters sends a single message.
+    #--------------------------------------------------------------------------------
+    device.parameters[1].is_quantized = True
+    message_count = messages_sent("/live/device/set/parameters/value")
+    device.randomise()
+    assert messages_sent("/live/device/set/parameters/value") == message_count + 1
+    assert all(0.0 <= parameter._value <= 1.0 for parameter in device.parameters)
+    assert device.parameters[1]._value in (0, 1)
+    time.sleep(0.05)
+    assert [parameter["value"] for parameter in simulator_parameters] == \
+           pytest.approx([parameter._value for parameter in device.parameters])
+
+    with pytest.raises(ValueError):
+        device.set_parameters([0.0] * (len(device.parameters) + 1))
+
+def test_simulator_set_parameters_coalescing(simulator, set):
+    set.scan(mode="file")
+    device = set.tracks[1].devices[0]
+    simulator_parameters = simulator.tracks[1]["devices"][0]["parameters"]
+    set.live.start_coalescing(interval=10.0)
+    try:
+        #--------------------------------------------------------------------------------
+        # Values still held back by the coalescer are superseded by bulk writes.
+        #--------------------------------------------------------------------------------
+        device.parameters[0].value = 0.9
+        device.set_parameters([0.1] * len(device.parameters))
+        device.parameters[1].value = 0.8
+        device.set_parameters({1: 0.2, "Parameter 2": 0.3})
+        time.sleep(0.05)
+        assert [parameter["value"] for parameter in simulator_parameters[:3]] == pytest.approx([0.1, 0.2, 0.3])
+        set.live.flush()
+        time.sleep(0.05)
+        assert [parameter["value"] for parameter in simulator_parameters[:3]] == pytest.approx([0.1, 0.2, 0.3])
+    finally:
+        set.live.stop_coalescing()
+
+def test_simulator_listener(simulator, set):
+    values = []
+    set.live.add_handler("/live/track/get/volume", lambda track_index, volume: values.append((track_index, volume)))
+    set.live.cmd("/live/track/start_listen/volume", (2,))
+    set.tracks[2].volume = 0.75
+    time.sleep(0.1)
+    set.live.cmd("/live/track/stop_listen/volume", (2,))
+    assert values == [(2, pytest.approx(0.85)), (2, 0.75)]
+
+def test_simulator_beat_listener(simulator, set):
+    assert ("/live/song/get/beat", ()) not in simulator.listeners
+    set.set_beat_callback(lambda beat: None)
+    time.sleep(0.05)
+    assert simulator.listeners[("/live/song/get/beat", ())]
+    set.set_beat_callback(None)
+    time.sleep(0.05)
+    assert not simulator.listeners[("/live/song/get/beat", ())]
+
+def test_simulator_mirror(simulator, set):
+    def queries(address):
+        return set.live.stats()["addresses"].get(address, {}).get("queries", 0)
+
+    mirror = set.start_mirroring()
+    try:
+        time.sleep(0.1)
+        track = set.tracks[1]
+        clip = track.active_clips[0]
+        query_count = queries("/live/track/get/volume")
+        assert track.volume == simulator.tracks[1]["volume"]
+        assert set.tempo == simulator.song["tempo"]
+        assert not clip.is_playing
+        assert queries("/live/track/get/volume") == query_count
+
+        #--------------------------------------------------------------------------------
+        # Changes made within Live are reflected in the mirror.
+        #--------------------------------------------------------------------------------
+        simulator._set_property("track", simulator.tracks[1], "volume", (1,), 0.3)
+        simulator._set_property("song", simulator.song, "tempo", (), 90.0)
+        time.sleep(0.1)
+        assert track.volume == pytest.approx(0.3)
+        assert set.tempo == 90.0
+
+        clip.play()
+        time.sleep(0.1)
+        assert clip.is_playing
+        assert track.playing_slot_index == clip.index
+        clip.stop()
+
+        #--------------------------------------------------------------------------------
+        # Values that are set can be read back immediately.
+        #--------------------------------------------------------------------------------
+        track.volume = 0.6
+        assert track.volume == 0.6
+        assert queries("/live/track/get/volume") == query_count
+        assert len(mirror) > 0
+    finally:
+        set.stop_mirroring()
+
+    time.sleep(0.1)
+    assert not simulator.listeners[("/live/track/get/volume", (1,))]
+    assert track.volume == pytest.approx(0.6)
+    assert queries("/live/track/get/volume") == query_count + 1
+
+def test_simulator_caching(simulator, set):
+    def queries(address):
+        return set.live.stats()["addresses"].get(address, {}).get("queries", 0)
+
+    set.caching = True
+    try:
+        track = set.tracks[1]
+        query_count = queries("/live/track/get/volume")
+        for _ in range(3):
+            assert track.volume == pytest.approx(simulator.tracks[1]["volume"])
+        assert queries("/live/track/get/volume") == query_count + 1
+
+        #--------------------------------------------------------------------------------
+        # Values that are set are read back from Live.
+        #--------------------------------------------------------------------------------
+        track.volume = 0.4
+        assert track.volume == pytest.approx(0.4)
+        assert queries("/live/track/get/volume") == query_count + 2
+        assert set.live.stats()["cache"]["hits"] >= 2
+    finally:
+        set.caching = False
+
+def test_simulator_caching_structure(simulator, set):
+    set.caching = True
+    try:
+        #--------------------------------------------------------------------------------
+        # A clip created in a slot does not have the cached properties of the clip
+        # previously in that slot.
+        #--------------------------------------------------------------------------------
+        track = set.tracks[1]
+        slot = track.clips.index(None)
+        clip = track.create_clip(slot, 4.0)
+        time.sleep(0.05)
+        simulator.tracks[1]["clips"][slot]["pitch_coarse"] = 5
+        assert clip.pitch_coarse == 5
+        track.delete_clip(slot)
+        clip = track.create_clip(slot, 4.0)
+        time.sleep(0.05)
+        assert clip.pitch_coarse == 0
+        track.delete_clip(slot)
+
+        #--------------------------------------------------------------------------------
+        # Clips that are moved by creating a scene are not given the cached properties
+        # of the clips previously at their new indices.
+        #--------------------------------------------------------------------------------
+        clips = [clip for clip in track.clips if clip is not None]
+        for pitch, clip in enumerate(clips):
+            simulator.tracks[1]["clips"][clip.index]["pitch_coarse"] = pitch
+        assert [clip.pitch_coarse for clip in clips] == list(range(len(clips)))
+        set.create_scene(0)
+        try:
+            time.sleep(0.05)
+            assert [clip.pitch_coarse for clip in clips] == list(range(len(clips)))
+        finally:
+            set.delete_scene(0)
+    finally:
+        set.caching = False
+        time.sleep(0.05)
+        for clip in simulator.tracks[1]["clips"]:
+            if clip is not None:
+                clip["pitch_coarse"] = 0
+
+def test_simulator_rescan_file(simulator, set, monkeypatch):
+    set.scan(mode="file")
+    tracks = list(set.tracks)
+
+    #--------------------------------------------------------------------------------
+    # An unchanged structure is not parsed again.
+    #--------------------------------------------------------------------------------
+    with monkeypatch.context() as patch:
+        patch.setattr(live.classes.set, "parse_json", None)
+        assert not any(set.rescan(mode="file").values())
+    assert set.tracks == tracks
+
+    simulator.tracks[2]["name"] = "Renamed"
+    try:
+        changes = set.rescan(mode="file")
+        assert changes["tracks_added"] == changes["tracks_removed"] == 1
+        assert set.tracks[2].name == "Renamed"
+        assert set.tracks[1] is tracks[1]
+    finally:
+        simulator.tracks[2]["name"] = tracks[2].name
+
+def test_simulator_rescan():
+    address, listen_port = ("127.0.0.1", 11410), 11411
+    with AbletonOSCSimulator(num_tracks=6, num_scenes=4, clip_density=1.0, parameters_per_device=2,
+                             address=address, reply_port=listen_port) as simulator:
+        query = live.Query(address, listen_port)
+        try:
+            set = live.Set(live=query)
+            set._scan_via_network(scan_device_parameters=True)
+            tracks = list(set.tracks)
+            clips = tracks[3].active_clips
+            devices = tracks[3].devices
+            parameters = devices[0].parameters
+
+            changes = set.rescan(mode="network", scan_device_parameters=True)
+            assert not any(changes.values())
+            assert all(track is previous for track, previous in zip(set.tracks, tracks))
+            assert set.tracks[3].devices[0].parameters[0] is parameters[0]
+
+            #--------------------------------------------------------------------------------
+            # Delete a track and rename a clip: the other objects are kept, and the
+            # tracks after the deleted track have new indices.
+            #--------------------------------------------------------------------------------
+            simulator.tracks[3]["clips"][1]["name"] = "Renamed"
+            set.start_mirroring()
+            for index, track in enumerate(simulator.tracks):
+                simulator._set_property("track", track, "volume", (index,), index / 10)
+            time.sleep(0.1)
+            set.delete_track(1)
+            changes = set.rescan(mode="network")
+            assert changes == {"tracks_added": 0, "tracks_removed": 1, "clips_added": 1, "clips_removed": 5,
+                               "devices_added": 0, "devices_removed": 1}
+            assert set.tracks == [tracks[0]] + tracks[2:]
+            assert tracks[3].index == 2
+            assert tracks[3].clips[0] is clips[0]
+            assert tracks[3].clips[1].name == "Renamed"
+            assert tracks[3].clips[1].track is tracks[3]
+            assert tracks[3].devices == devices
+
+            #--------------------------------------------------------------------------------
+            # Mirrored properties follow the tracks to their new indices.
+            #--------------------------------------------------------------------------------
+            time.sleep(0.1)
+            assert [track.volume for track in set.tracks] == \
+                   pytest.approx([track["volume"] for track in simulator.tracks])
+            set.stop_mirroring()
+
+            #--------------------------------------------------------------------------------
+            # Rescan automatically when a track is created.
+            #--------------------------------------------------------------------------------
+            set.start_auto_rescan(mode="network")
+            time.sleep(0.1)
+            set.create_midi_track(-1)
+            time.sleep(0.2)
+            set.stop_auto_rescan()
+            assert len(set.tracks) == 6
+            assert set.tracks[:5] == [tracks[0]] + tracks[2:]
+        finally:
+            query.stop()
+
+def test_simulator_scan_jitter():
+    address, listen_port = ("127.0.0.1", 11420), 11421
+    with AbletonOSCSimulator(num_tracks=300, jitter=0.01, address=address, reply_port=listen_port, seed=1) as simulator:
+        query = live.Query(address, listen_port)
+        try:
+            set = live.Set(live=query)
+            set.max_tracks_per_query = 50
+            set.scan(mode="network")
+            assert [track.name for track in set.tracks] == [track["name"] for track in simulator.tracks]
+            assert [[clip.name for clip in track.active_clips] for track in set.tracks] == \
+                   [[clip["name"] for clip in track["clips"] if clip is not None] for track in simulator.tracks]
+        finally:
+            query.stop()
+
+def test_simulator_latency_and_loss():
+    address, listen_port = ("127.0.0.1", 11400), 11401
+    with AbletonOSCSimulator(num_tracks=4, latency=0.02, jitter=0.01, loss=0.2,
+                             address=address, reply_port=listen_port, seed=1):
+        query = live.Query(address, listen_port)
+        query.start_metrics()
+        try:
+            t0 = time.monotonic()
+            for _ in range(10):
+                assert query.query("/live/song/get/tempo") == [120.0]
+            assert time.monotonic() - t0 >= 10 * 0.02
+            assert query.stats()["addresses"]["/live/song/get/tempo"]["retries"] > 0
+        finally:
+            query.stop()
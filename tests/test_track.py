@@ -15,7 +15,7 @@ def track():
     return set.tracks[1]
 
 def test_track_get_clips(track):
-    assert len(track.clips) == 1024
+    assert len(track.clips) == track.set.num_scenes
     assert len(list(filter(lambda n: n is not None, track.clips))) == 4
 
 def test_track_get_active_clips(track):